@@ -34,8 +34,13 @@ except ImportError:
     DB_AVAILABLE = False
     logger.warning("无法导入psycopg2模块，数据库功能将被禁用")
 
-def get_db_connection():
-    """获取数据库连接"""
+def get_db_connection(**options):
+    """
+    获取数据库连接
+
+    Args:
+        **options: 传给 psycopg2.connect 的额外连接参数，如 connect_timeout、keepalives_idle
+    """
     if not DB_AVAILABLE:
         logger.warning("psycopg2模块不可用，无法连接数据库")
         return None
@@ -46,7 +51,8 @@ def get_db_connection():
             port=int(os.getenv("DB_PORT", "5432")),
             user=os.getenv("DB_USER", "postgres"),
             password=os.getenv("DB_PASSWORD", "postgres"),
-            dbname=os.getenv("DB_NAME", "evm_tracker")
+            dbname=os.getenv("DB_NAME", "evm_tracker"),
+            **options
         )
         return conn
     except Exception as e:
@@ -246,26 +252,154 @@ def load_config(skip_db_settings=False):
                     "username": os.getenv("SMTP_USER", ""),
                     "password": os.getenv("SMTP_PASSWORD", ""),
                     "sender": os.getenv("EMAIL_SENDER", ""),
-                    "recipients": os.getenv("EMAIL_RECIPIENTS", "").split(",")
+                    "recipients": os.getenv("EMAIL_RECIPIENTS", "").split(","),
+                    "use_tls": os.getenv("SMTP_USE_TLS", "true").lower() == "true",
+                    "pool": {
+                        "enabled": os.getenv("SMTP_POOL_ENABLED", "true").lower() == "true",
+                        "max_size": int(os.getenv("SMTP_POOL_SIZE", "2")),
+                        "idle_timeout": int(os.getenv("SMTP_POOL_IDLE_TIMEOUT", "60")),
+                        "noop_interval": int(os.getenv("SMTP_POOL_NOOP_INTERVAL", "10"))
+                    }
                 },
                 "telegram": {
                     "enabled": os.getenv("TELEGRAM_ENABLED", "false").lower() == "true",
                     "token": os.getenv("TELEGRAM_TOKEN", ""),
-                    "chat_ids": [int(id.strip()) for id in os.getenv("TELEGRAM_CHAT_IDS", "").split(",") if id.strip()]
+                    "chat_ids": [int(id.strip()) for id in os.getenv("TELEGRAM_CHAT_IDS", "").split(",") if id.strip()],
+                    "api_base": os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org"),
+                    "fanout_workers": int(os.getenv("TELEGRAM_FANOUT_WORKERS", "8")),
+                    "rate_limit": {
+                        "global_per_second": float(os.getenv("TELEGRAM_GLOBAL_PER_SECOND", "30")),
+                        "chat_per_second": float(os.getenv("TELEGRAM_CHAT_PER_SECOND", "1")),
+                        "group_per_minute": float(os.getenv("TELEGRAM_GROUP_PER_MINUTE", "20")),
+                        "chat_burst": 1,
+                        "max_wait_seconds": 300
+                    },
+                    "max_parts": int(os.getenv("TELEGRAM_MAX_PARTS", "3"))
+                },
+                "queue": {
+                    "max_size": int(os.getenv("NOTIFY_QUEUE_SIZE", "1000")),
+                    "workers": int(os.getenv("NOTIFY_QUEUE_WORKERS", "2")),
+                    "overflow": os.getenv("NOTIFY_QUEUE_OVERFLOW", "drop_oldest")
+                },
+                # 通知模板覆盖，如 {"endpoint_down": {"subject": "...", "telegram": {"body": "..."}}}
+                "templates": {},
+                # 其他通知渠道插件，如 {"ops_webhook": {"type": "webhook", "enabled": true, "url": "..."}}
+                "channels": {},
+                "outbox": {
+                    "enabled": os.getenv("NOTIFY_OUTBOX_ENABLED", "true").lower() == "true",
+                    "path": os.getenv("NOTIFY_OUTBOX_PATH", "notification_outbox.db"),
+                    "retry_base_seconds": int(os.getenv("NOTIFY_RETRY_BASE", "30")),
+                    "retry_max_seconds": int(os.getenv("NOTIFY_RETRY_MAX", "3600")),
+                    "max_attempts": int(os.getenv("NOTIFY_MAX_ATTEMPTS", "20")),
+                    # 为空时按最慢渠道的超时 + Telegram节流等待 + 60秒计算
+                    "lease_seconds": None,
+                    "retention_days": 7,
+                    "poll_interval_seconds": 5
+                },
+                "dedup": {
+                    "ttl_seconds": int(os.getenv("ALERT_DEDUP_TTL", "86400")),
+                    "max_entries": 10000,
+                    "policies": {
+                        "endpoint": {"resend_interval_seconds": int(os.getenv("ENDPOINT_ALERT_RESEND", "10800"))},
+                        "system": {"resend_interval_seconds": int(os.getenv("SYSTEM_ALERT_RESEND", "1800"))},
+                        "database": {"resend_interval_seconds": int(os.getenv("DATABASE_ALERT_RESEND", "1800"))},
+                        "api": {"resend_interval_seconds": 60}
+                    },
+                    "default_policy": {"resend_interval_seconds": 3600}
+                },
+                "digest": {
+                    "email": {
+                        "window_seconds": int(os.getenv("EMAIL_DIGEST_WINDOW", "0")),
+                        "bypass_levels": ["critical"],
+                        "max_details": 50
+                    },
+                    "telegram": {
+                        "window_seconds": int(os.getenv("TELEGRAM_DIGEST_WINDOW", "0")),
+                        "bypass_levels": ["critical"],
+                        "max_details": 50
+                    }
                 }
             },
             "service_checks": {
                 "enabled": os.getenv("SERVICE_CHECKS_ENABLED", "true").lower() == "true",
                 "interval_minutes": int(os.getenv("SERVICE_CHECK_INTERVAL", "5")),
-                "endpoints": []
+                "endpoints": [],
+                "sharding": {
+                    "enabled": os.getenv("SERVICE_CHECK_SHARDING", "false").lower() == "true",
+                    "workers": int(os.getenv("SERVICE_CHECK_WORKERS", "0")),
+                    "threads_per_worker": int(os.getenv("SERVICE_CHECK_WORKER_THREADS", "20"))
+                }
+            },
+            "config_reload": {
+                "enabled": os.getenv("CONFIG_RELOAD_ENABLED", "false").lower() == "true",
+                "interval_seconds": int(os.getenv("CONFIG_RELOAD_INTERVAL", "5"))
+            },
+            "shutdown": {
+                "drain_timeout_seconds": int(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "30")),
+                "state_file": os.getenv("STATE_FILE", "monitor_state.json")
+            },
+            "high_availability": {
+                "enabled": os.getenv("HA_ENABLED", "false").lower() == "true",
+                "backend": os.getenv("HA_BACKEND", "auto"),
+                "lease_seconds": int(os.getenv("HA_LEASE_SECONDS", "10")),
+                "renew_interval": int(os.getenv("HA_RENEW_INTERVAL", "2")),
+                "lock_file": os.getenv("HA_LOCK_FILE", "monitor.lock"),
+                "sqlite_path": os.getenv("HA_SQLITE_PATH", "monitor_lease.db"),
+                "advisory_lock_key": int(os.getenv("HA_ADVISORY_LOCK_KEY", "73100"))
             },
             "system_monitoring": {
                 "enabled": os.getenv("SYSTEM_MONITORING_ENABLED", "true").lower() == "true",
                 "interval_minutes": int(os.getenv("SYSTEM_MONITORING_INTERVAL", "5")),
+                # 资源来源: host（整机）、cgroup（容器所在cgroup）、auto（在容器中时使用cgroup）
+                "source": os.getenv("SYSTEM_MONITORING_SOURCE", "host"),
+                # 整机数据的采集方式: psutil，或 proc（直接读取/proc，仅Linux）
+                "collector": os.getenv("SYSTEM_COLLECTOR", "psutil"),
+                "sampler": {
+                    "interval_seconds": float(os.getenv("SYSTEM_SAMPLE_INTERVAL", "10"))
+                },
+                "history": {
+                    "enabled": os.getenv("SYSTEM_HISTORY_ENABLED", "true").lower() == "true",
+                    "max_series": 500
+                },
+                "processes": {
+                    "enabled": os.getenv("SYSTEM_PROCESS_TOP_ENABLED", "true").lower() == "true",
+                    "top_n": int(os.getenv("SYSTEM_PROCESS_TOP_N", "5"))
+                },
+                "forecast": {
+                    "enabled": os.getenv("DISK_FORECAST_ENABLED", "true").lower() == "true",
+                    "window_hours": 6,
+                    "alert_hours": float(os.getenv("DISK_FORECAST_ALERT_HOURS", "24")),
+                    "interval_seconds": 300,
+                    "replace_percent_threshold": False
+                },
+                "io": {
+                    "enabled": os.getenv("SYSTEM_IO_ENABLED", "true").lower() == "true",
+                    "disk_include": [],
+                    "include_partitions": False,
+                    "nic_include": []
+                },
+                "disks": {
+                    "include_fstypes": [],
+                    "include_paths": [],
+                    "refresh_seconds": 60
+                },
                 "thresholds": {
                     "cpu_percent": float(os.getenv("CPU_THRESHOLD", "80")),
                     "memory_percent": float(os.getenv("MEMORY_THRESHOLD", "80")),
-                    "disk_percent": float(os.getenv("DISK_THRESHOLD", "85"))
+                    "disk_percent": float(os.getenv("DISK_THRESHOLD", "85")),
+                    # 磁盘I/O和网卡阈值，None表示不告警
+                    "disk_busy_percent": float(os.getenv("DISK_BUSY_THRESHOLD", "90")),
+                    "disk_iops": None,
+                    "disk_mb_per_sec": None,
+                    "net_util_percent": float(os.getenv("NET_UTIL_THRESHOLD", "90")),
+                    "net_mb_per_sec": None,
+                    "net_errors_per_sec": float(os.getenv("NET_ERRORS_THRESHOLD", "10")),
+                    "net_drops_per_sec": float(os.getenv("NET_DROPS_THRESHOLD", "100")),
+                    # 按cgroup采集时的CPU限流比例和PSI压力（avg10，%），None表示不告警
+                    "cpu_throttled_percent": None,
+                    "psi_cpu_some_avg10": None,
+                    "psi_memory_full_avg10": None,
+                    "psi_io_full_avg10": None
                 }
             }
         }
@@ -294,5 +428,23 @@ def load_config(skip_db_settings=False):
         logger.error(f"加载配置失败: {str(e)}")
         raise
 
+def load_endpoints_from_file(file_path=None):
+    """
+    只从配置文件读取服务检查端点列表，用于配置热加载
+    
+    Args:
+        file_path: 配置文件路径，默认为CONFIG_FILE
+        
+    Returns:
+        list: 端点配置列表
+    """
+    file_path = file_path or CONFIG_FILE
+    with open(file_path, "r", encoding="utf-8") as f:
+        yaml_config = yaml.safe_load(f) or {}
+    endpoints = (yaml_config.get("service_checks") or {}).get("endpoints") or []
+    if not isinstance(endpoints, list):
+        raise ValueError("service_checks.endpoints必须是列表")
+    return endpoints
+
 # 全局配置
 CONFIG = load_config() 
\ No newline at end of file
@@ -0,0 +1,119 @@
+import os
+import logging
+import threading
+
+from app.config import settings
+from app.config.settings import CONFIG
+from app.core.scheduler import task_scheduler
+from app.services.service_check import service_checker
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigWatcher:
+    """
+    配置文件监视器
+
+    定期检查配置文件是否变化，变化时只对比服务检查端点并增量应用：
+    新增、移除、检查间隔或断言条件变化。未变化端点的调度任务和告警状态保持不变，
+    热加载过程中不会暂停正在进行的检查。
+    """
+
+    def __init__(self, file_path=None, interval_seconds=5):
+        self.file_path = file_path or settings.CONFIG_FILE
+        self.interval_seconds = interval_seconds
+        # 由配置文件管理的端点，通过API添加的端点不受热加载影响
+        self.managed_names = {endpoint["name"] for endpoint in CONFIG["service_checks"].get("endpoints", [])}
+        self.reload_count = 0
+        self.last_result = None
+        self._last_signature = self._file_signature()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.file_path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def start(self):
+        """启动监视线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"配置热加载已启用: {self.file_path}, 检查间隔: {self.interval_seconds}秒")
+
+    def stop(self):
+        """停止监视线程"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval_seconds + 1)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval_seconds):
+            signature = self._file_signature()
+            if signature is None or signature == self._last_signature:
+                continue
+            self._last_signature = signature
+            logger.info(f"检测到配置文件变化: {self.file_path}")
+            self.reload()
+
+    def reload(self):
+        """
+        重新读取配置文件中的端点并增量应用变更
+
+        Returns:
+            dict: 变更摘要
+        """
+        with self._lock:
+            try:
+                endpoints = settings.load_endpoints_from_file(self.file_path)
+            except Exception as e:
+                logger.error(f"读取配置文件失败，保持当前配置: {str(e)}")
+                return {"status": "failed", "error": f"读取配置文件失败: {str(e)}"}
+
+            new_names = {endpoint.get("name") for endpoint in endpoints if isinstance(endpoint, dict)}
+            applied, results, changes = service_checker.bulk_upsert_endpoints(endpoints)
+            if not applied:
+                errors = [result for result in results if result["errors"]]
+                logger.error(f"配置文件中存在无效的端点配置，本次热加载未生效: {errors}")
+                return {"status": "failed", "error": "存在无效的端点配置", "results": errors}
+
+            removed = sorted(self.managed_names - new_names)
+            for name in removed:
+                task_scheduler.remove_endpoint_job(name)
+                service_checker.remove_endpoint(name)
+
+            task_scheduler.apply_endpoint_changes(
+                created=changes["created"],
+                interval_changed=changes["interval_changed"],
+                updated=changes["updated"]
+            )
+            self.managed_names = new_names
+            self.reload_count += 1
+
+            self.last_result = {
+                "status": "success",
+                "added": [endpoint["name"] for endpoint in changes["created"]],
+                "removed": removed,
+                "updated": [endpoint["name"] for endpoint in changes["updated"]],
+                "interval_changed": [endpoint["name"] for endpoint in changes["interval_changed"]]
+            }
+            logger.info(
+                f"配置热加载完成: 新增 {len(self.last_result['added'])} 个, "
+                f"移除 {len(removed)} 个, 更新 {len(self.last_result['updated'])} 个端点"
+                f"（其中调整间隔 {len(self.last_result['interval_changed'])} 个）"
+            )
+            return self.last_result
+
+
+def create_config_watcher():
+    """根据配置创建配置监视器，未启用热加载时返回None"""
+    reload_config = CONFIG.get("config_reload", {})
+    if not reload_config.get("enabled", False):
+        return None
+    return ConfigWatcher(interval_seconds=reload_config.get("interval_seconds", 5))
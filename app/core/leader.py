@@ -0,0 +1,366 @@
+import os
+import time
+import socket
+import sqlite3
+import logging
+import threading
+
+from app.config.settings import CONFIG, DB_AVAILABLE, get_db_connection
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseBackend:
+    """租约后端基类，子类实现具体的加锁方式"""
+
+    name = "base"
+
+    def __init__(self, holder_id):
+        self.holder_id = holder_id
+
+    def try_acquire(self):
+        """尝试获取租约，成功返回True"""
+        raise NotImplementedError
+
+    def renew(self):
+        """续约，租约已丢失时返回False"""
+        raise NotImplementedError
+
+    def release(self):
+        """释放租约"""
+        raise NotImplementedError
+
+
+class FileLockLeaseBackend(LeaseBackend):
+    """基于本地文件锁的租约，适用于单机测试；持有进程退出时由操作系统自动释放"""
+
+    name = "file"
+
+    def __init__(self, holder_id, path):
+        super().__init__(holder_id)
+        if not FCNTL_AVAILABLE:
+            raise RuntimeError("当前平台不支持文件锁")
+        self.path = path
+        self._fd = None
+
+    def try_acquire(self):
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, self.holder_id.encode("utf-8"))
+        self._fd = fd
+        return True
+
+    def renew(self):
+        return self._fd is not None
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class SQLiteLeaseBackend(LeaseBackend):
+    """基于SQLite的租约，租约到期未续约时可被其他实例接管"""
+
+    name = "sqlite"
+
+    def __init__(self, holder_id, path, lease_seconds, lease_name="scheduler"):
+        super().__init__(holder_id)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.lease_name = lease_name
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+        conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def try_acquire(self):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT holder, expires_at FROM leases WHERE name = ?", (self.lease_name,)
+            ).fetchone()
+            if row and row[0] != self.holder_id and row[1] > now:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO leases (name, holder, expires_at) VALUES (?, ?, ?)",
+                (self.lease_name, self.holder_id, now + self.lease_seconds)
+            )
+            conn.execute("COMMIT")
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"SQLite租约操作失败: {str(e)}")
+            return False
+        finally:
+            conn.close()
+
+    def renew(self):
+        return self.try_acquire()
+
+    def release(self):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "DELETE FROM leases WHERE name = ? AND holder = ?", (self.lease_name, self.holder_id)
+            )
+        except sqlite3.Error as e:
+            logger.error(f"释放SQLite租约失败: {str(e)}")
+        finally:
+            conn.close()
+
+
+class PostgresAdvisoryLeaseBackend(LeaseBackend):
+    """
+    基于PostgreSQL会话级咨询锁的租约，持有连接断开时锁自动释放
+
+    使用独立的连接（不与业务查询共用），连接超时、TCP keepalive 和语句超时都小于续约间隔，
+    网络中断或数据库无响应时续约在下一次检查之前失败，而不是长时间阻塞在socket上。
+    """
+
+    name = "postgres"
+
+    def __init__(self, holder_id, lock_key, renew_interval=2):
+        super().__init__(holder_id)
+        self.lock_key = lock_key
+        self.renew_interval = renew_interval
+        self._conn = None
+
+    def connect_options(self):
+        """独立租约连接的超时参数，均小于续约间隔"""
+        half = max(1, int(self.renew_interval / 2))
+        return {
+            "connect_timeout": half,
+            "keepalives": 1,
+            "keepalives_idle": half,
+            "keepalives_interval": 1,
+            "keepalives_count": 2,
+            "options": f"-c statement_timeout={max(100, int(self.renew_interval * 500))}"
+        }
+
+    def try_acquire(self):
+        if self._conn is not None:
+            return self.renew()
+        conn = get_db_connection(**self.connect_options())
+        if not conn:
+            return False
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", (self.lock_key,))
+                acquired = cursor.fetchone()[0]
+        except Exception as e:
+            logger.error(f"获取PostgreSQL咨询锁失败: {str(e)}")
+            conn.close()
+            return False
+        if not acquired:
+            conn.close()
+            return False
+        self._conn = conn
+        return True
+
+    def renew(self):
+        if self._conn is None:
+            return False
+        try:
+            with self._conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            return True
+        except Exception as e:
+            # 连接断开时数据库已释放该锁
+            logger.error(f"PostgreSQL租约连接已断开: {str(e)}")
+            self._close()
+            return False
+
+    def release(self):
+        if self._conn is None:
+            return
+        try:
+            with self._conn.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (self.lock_key,))
+        except Exception as e:
+            logger.error(f"释放PostgreSQL咨询锁失败: {str(e)}")
+        self._close()
+
+    def _close(self):
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+        self._conn = None
+
+
+def _postgres_reachable(ha_config):
+    """auto模式下先试连一次数据库，连不上时退回文件锁，避免所有实例都拿不到租约"""
+    probe = PostgresAdvisoryLeaseBackend("probe", 0, ha_config.get("renew_interval", 2))
+    conn = get_db_connection(**probe.connect_options())
+    if not conn:
+        logger.warning("高可用后端为auto但数据库无法连接，改用本地文件锁（仅能协调同一台机器上的实例）")
+        return False
+    conn.close()
+    return True
+
+
+def create_lease_backend(ha_config, holder_id):
+    """根据配置创建租约后端"""
+    backend = ha_config.get("backend", "auto")
+    if backend == "auto":
+        backend = "postgres" if DB_AVAILABLE and _postgres_reachable(ha_config) else "file"
+
+    if backend == "postgres":
+        return PostgresAdvisoryLeaseBackend(
+            holder_id,
+            ha_config.get("advisory_lock_key", 73100),
+            ha_config.get("renew_interval", 2)
+        )
+    if backend == "sqlite":
+        return SQLiteLeaseBackend(
+            holder_id,
+            ha_config.get("sqlite_path", "monitor_lease.db"),
+            ha_config.get("lease_seconds", 10)
+        )
+    if backend == "file":
+        return FileLockLeaseBackend(holder_id, ha_config.get("lock_file", "monitor.lock"))
+    raise ValueError(f"不支持的租约后端: {backend}")
+
+
+class LeaderElector:
+    """
+    基于租约的主备选举
+
+    只有持有租约的实例运行调度任务并发送通知；备用实例定期尝试获取租约，
+    主实例租约到期或进程退出后在数秒内接管。
+    续约在单独的线程中执行，超过续约间隔仍未返回按续约失败处理，立即转为备用节点，
+    避免后端阻塞时本实例在租约已被接管后继续发送通知。
+    """
+
+    def __init__(self, backend, renew_interval=2, on_elected=None, on_demoted=None):
+        self.backend = backend
+        self.renew_interval = renew_interval
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.is_leader = False
+        self.leader_since = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._renew_thread = None
+        self._renew_result = False
+
+    def start(self):
+        """启动选举线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="leader-elector", daemon=True)
+        self._thread.start()
+        logger.info(f"主备选举已启动: 后端={self.backend.name}, 实例={self.backend.holder_id}")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                if self.is_leader:
+                    if not self._renew():
+                        self._set_leader(False)
+                elif self._renew_pending():
+                    pass  # 超时的续约仍未返回，等它结束后再尝试获取租约
+                elif self.backend.try_acquire():
+                    self._set_leader(True)
+            except Exception as e:
+                logger.error(f"主备选举出错: {str(e)}")
+                if self.is_leader:
+                    self._set_leader(False)
+            self._stop_event.wait(self.renew_interval)
+
+    def _renew_pending(self):
+        return self._renew_thread is not None and self._renew_thread.is_alive()
+
+    def _renew(self):
+        """续约，在续约间隔内没有完成时返回False"""
+        if self._renew_pending():
+            # 上一次续约仍阻塞在后端，不再叠加新的续约线程
+            return False
+        self._renew_result = False
+
+        def run():
+            self._renew_result = self.backend.renew()
+
+        self._renew_thread = threading.Thread(target=run, name="leader-renew", daemon=True)
+        self._renew_thread.start()
+        self._renew_thread.join(self.renew_interval)
+        if self._renew_thread.is_alive():
+            logger.error(f"续约超过{self.renew_interval}秒未完成，按失去租约处理")
+            return False
+        return self._renew_result
+
+    def _set_leader(self, is_leader):
+        self.is_leader = is_leader
+        if is_leader:
+            self.leader_since = time.time()
+            logger.info(f"当前实例成为主节点: {self.backend.holder_id}")
+            callback = self.on_elected
+        else:
+            self.leader_since = None
+            logger.warning(f"当前实例失去主节点租约，转为备用节点: {self.backend.holder_id}")
+            callback = self.on_demoted
+        if callback:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"主备切换回调执行失败: {str(e)}")
+
+    def stop(self):
+        """停止选举并释放租约"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.renew_interval + 1)
+        if self.is_leader:
+            self._set_leader(False)
+        self.backend.release()
+
+    def get_status(self):
+        """获取选举状态"""
+        return {
+            "role": "leader" if self.is_leader else "standby",
+            "instance": self.backend.holder_id,
+            "backend": self.backend.name,
+            "leader_since": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.leader_since))
+            if self.leader_since else None
+        }
+
+
+def create_leader_elector(on_elected=None, on_demoted=None):
+    """根据配置创建主备选举器，未启用高可用时返回None"""
+    ha_config = CONFIG.get("high_availability", {})
+    if not ha_config.get("enabled", False):
+        return None
+    holder_id = f"{socket.gethostname()}:{os.getpid()}"
+    backend = create_lease_backend(ha_config, holder_id)
+    return LeaderElector(
+        backend,
+        renew_interval=ha_config.get("renew_interval", 2),
+        on_elected=on_elected,
+        on_demoted=on_demoted
+    )
@@ -0,0 +1,95 @@
+import sys
+import time
+import signal
+import logging
+import threading
+
+from app.config.settings import CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class ShutdownManager:
+    """
+    优雅停机管理器
+
+    各组件注册停机钩子，收到SIGTERM/SIGINT时按顺序执行：停止分发新的检查、
+    等待进行中的检查、发送队列中的通知、保存状态，所有钩子共享同一个截止时间。
+    """
+
+    def __init__(self):
+        shutdown_config = CONFIG.get("shutdown", {})
+        self.drain_timeout = shutdown_config.get("drain_timeout_seconds", 30)
+        self._hooks = []  # [(order, name, func)]
+        self._lock = threading.Lock()
+        self._shutting_down = False
+
+    @property
+    def shutting_down(self):
+        return self._shutting_down
+
+    def register(self, name, func, order=50):
+        """
+        注册停机钩子
+
+        Args:
+            name: 钩子名称
+            func: 回调函数，参数为剩余可用时间（秒）
+            order: 执行顺序，数值小的先执行
+        """
+        with self._lock:
+            self._hooks = [hook for hook in self._hooks if hook[1] != name]
+            self._hooks.append((order, name, func))
+            self._hooks.sort(key=lambda hook: hook[0])
+
+    def shutdown(self, timeout=None):
+        """
+        执行所有停机钩子
+
+        Args:
+            timeout: 总截止时间（秒），默认使用配置中的drain_timeout_seconds
+
+        Returns:
+            bool: 是否在截止时间内完成
+        """
+        with self._lock:
+            if self._shutting_down:
+                return False
+            self._shutting_down = True
+            hooks = list(self._hooks)
+
+        timeout = self.drain_timeout if timeout is None else timeout
+        deadline = time.time() + timeout
+        logger.info(f"开始优雅停机，截止时间 {timeout} 秒")
+
+        for order, name, func in hooks:
+            remaining = max(deadline - time.time(), 0)
+            try:
+                logger.info(f"执行停机步骤: {name} (剩余 {remaining:.1f} 秒)")
+                func(remaining)
+            except Exception as e:
+                logger.error(f"停机步骤执行失败: {name}, 错误: {str(e)}")
+
+        completed = time.time() <= deadline
+        if completed:
+            logger.info("优雅停机完成")
+        else:
+            logger.warning("优雅停机超过截止时间，部分任务可能未完成")
+        return completed
+
+    def install_signal_handlers(self):
+        """安装SIGTERM/SIGINT处理器，必须在主线程调用"""
+        def handle_signal(signum, frame):
+            if self._shutting_down:
+                logger.warning(f"正在停机中，忽略重复的信号: {signum}")
+                return
+            logger.info(f"收到停机信号: {signal.Signals(signum).name}")
+            self.shutdown()
+            sys.exit(0)
+
+        signal.signal(signal.SIGTERM, handle_signal)
+        signal.signal(signal.SIGINT, handle_signal)
+
+
+# 创建停机管理器实例
+shutdown_manager = ShutdownManager()
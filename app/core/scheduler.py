@@ -2,12 +2,20 @@ import logging
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.executors.pool import ThreadPoolExecutor
+import os
+import json
 import time
+import functools
+import threading
+from datetime import datetime
 
 from app.config.settings import CONFIG, DB_AVAILABLE
 from app.services.service_check import service_checker
 from app.services.system_monitor import system_monitor
-from app.services.notifier import notifier
+from app.services.notification_queue import notification_queue
+from app.services.alert_dedup import alert_deduplicator
+from app.services.templates import message_templates
+from app.core.sharding import ShardCoordinator
 
 # 有条件地导入数据库监控模块
 if DB_AVAILABLE:
@@ -41,6 +49,31 @@ class TaskScheduler:
         self.db_monitoring_interval = 5  # 数据库监控间隔（分钟）
         self.jobs = []
         self.endpoint_jobs = {}  # 存储端点检查任务 {endpoint_name: job}
+        self.notification_states = {}  # 端点通知状态 {endpoint_name: state}
+        self.shard_coordinator = None  # 分片模式下的协调器
+        self.db_monitoring_enabled = True
+        # 正在执行的任务数，用于停机时等待进行中的检查
+        self.in_flight_jobs = 0
+        self._in_flight_lock = threading.Lock()
+
+    def _tracked(self, func):
+        """
+        包装任务函数，在函数实际执行期间计入进行中的任务数
+
+        不使用调度器的任务事件计数：SUBMITTED 在任务提交到线程池之后才由调度线程发出，
+        任务很快完成时 EXECUTED 可能先到，计数会变为负数，drain 误判为已全部完成。
+        这里在函数进入时加一，finally 中减一，异常时也会减回。
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self._in_flight_lock:
+                self.in_flight_jobs += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._in_flight_lock:
+                    self.in_flight_jobs -= 1
+        return wrapper
     
     def start(self, db_monitoring_enabled=True):
         """
@@ -49,10 +82,14 @@ class TaskScheduler:
         Args:
             db_monitoring_enabled: 是否启用数据库监控，默认为True
         """
+        self.db_monitoring_enabled = db_monitoring_enabled
         if not self.scheduler.running:
             # 添加服务检查任务
             if CONFIG["service_checks"]["enabled"]:
-                self._add_service_check_jobs()
+                if CONFIG["service_checks"].get("sharding", {}).get("enabled", False):
+                    self._start_sharded_checks()
+                else:
+                    self._add_service_check_jobs()
             
             # 添加系统监控任务
             if CONFIG["system_monitoring"]["enabled"]:
@@ -88,111 +125,23 @@ class TaskScheduler:
         name = endpoint["name"]
         interval = service_checker.get_endpoint_interval(endpoint)
 
-        # 创建通知状态字典，用于跟踪该端点的通知状态
-        notification_status = {
-            "last_status": None,  # 上次通知时的状态
-            "notified": False,    # 是否已经发送过通知
-            "last_notification_time": 0  # 上次通知时间戳
-        }
+        # 分片模式下由分片工作进程执行检查
+        if self.shard_coordinator:
+            self.shard_coordinator.add_endpoint(endpoint)
+            logger.info(f"已将服务检查分配到分片: {name} -> {self.shard_coordinator.shard_for(name)}, 间隔时间: {interval}分钟")
+            return
         
         # 创建检查函数，只检查指定的端点
         def check_single_endpoint():
-            logger.info(f"执行计划检查: {name} (间隔: {interval}分钟)")
+            logger.info(f"执行计划检查: {name} (间隔: {service_checker.get_endpoint_interval(name)}分钟)")
             is_ok, details = service_checker.check_endpoint_by_name(name)
             logger.info(f"计划检查完成: {name}, 结果: {'正常' if is_ok else '异常'} - {details}")
-            
-            # 当前时间戳
-            current_time = time.time()
-            # 通知重发间隔（小时）
-            notification_resend_hours = 3
-            # 转换为秒
-            notification_resend_interval = notification_resend_hours * 60 * 60
-            
-            # 决定是否需要发送通知
-            should_notify = False
-            
-            # 初始状态判断
-            if notification_status["last_status"] is None:
-                # 首次检查：如果异常则发送通知
-                should_notify = not is_ok
-                notification_status["last_status"] = is_ok
-            elif notification_status["last_status"] != is_ok:
-                # 状态变化：始终发送通知
-                should_notify = True
-                notification_status["last_status"] = is_ok
-                # 重置通知标志
-                notification_status["notified"] = False
-                notification_status["last_notification_time"] = current_time
-            elif not is_ok:
-                # 持续异常状态：检查是否已经过了重发间隔
-                time_since_last = current_time - notification_status["last_notification_time"]
-                logger.debug(f"服务 {name} 持续异常状态，距上次通知已过 {time_since_last/3600:.2f} 小时")
-                
-                if time_since_last >= notification_resend_interval:
-                    # 已经过了重发间隔，重新发送通知
-                    should_notify = True
-                    notification_status["last_notification_time"] = current_time
-                    logger.info(f"服务 {name} 仍然异常，触发定期重发通知")
-            
-            # 如果需要发送通知
-            if should_notify:
-                # 从端点中获取方法和URL信息
-                endpoint_info = None
-                for ep in service_checker.endpoints:
-                    if ep["name"] == name:
-                        endpoint_info = ep
-                        break
-                
-                # 构建通知消息
-                if endpoint_info:
-                    method = endpoint_info.get("method", "GET")
-                    url = endpoint_info.get("url", "未知URL")
-                    if notification_status["last_status"] is not None and notification_status["last_status"] == is_ok and not is_ok:
-                        # 持续异常状态
-                        message = f"服务 {name} ({method} {url}) 持续异常\n详情: {details}"
-                        subject = f"服务持续异常: {name}"
-                    elif is_ok:
-                        # 恢复正常
-                        message = f"服务 {name} ({method} {url}) 已恢复正常\n详情: {details}"
-                        subject = f"服务已恢复: {name}"
-                    else:
-                        # 变为异常
-                        message = f"服务 {name} ({method} {url}) 变为异常\n详情: {details}"
-                        subject = f"服务异常: {name}"
-                else:
-                    if notification_status["last_status"] is not None and notification_status["last_status"] == is_ok and not is_ok:
-                        # 持续异常状态
-                        message = f"服务 {name} 持续异常\n详情: {details}"
-                        subject = f"服务持续异常: {name}"
-                    elif is_ok:
-                        # 恢复正常
-                        message = f"服务 {name} 已恢复正常\n详情: {details}"
-                        subject = f"服务已恢复: {name}"
-                    else:
-                        # 变为异常
-                        message = f"服务 {name} 变为异常\n详情: {details}"
-                        subject = f"服务异常: {name}"
-                
-                # 设置通知级别
-                level = "info" if is_ok else "error"
-                
-                # 记录日志
-                if not is_ok:
-                    logger.warning(f"服务检查异常: {name}")
-                else:
-                    logger.info(f"服务已恢复正常: {name}")
-                
-                # 发送通知
-                success = notifier.send_notification(subject, message, level)
-                
-                if success:
-                    # 更新通知状态
-                    notification_status["notified"] = True
-                    logger.info(f"已发送{subject}")
+            self._handle_check_result(name, is_ok, details)
+
         # 添加任务
         job_id = f"service_check_{name}"
         job = self.scheduler.add_job(
-            check_single_endpoint,
+            self._tracked(check_single_endpoint),
             IntervalTrigger(minutes=interval),
             id=job_id,
             name=f'服务检查 - {name}',
@@ -202,11 +151,147 @@ class TaskScheduler:
         self.endpoint_jobs[job_id] = job
         self.jobs.append(job)
         logger.info(f"已添加服务检查任务: {name}, 间隔时间: {interval}分钟")
+
+    def apply_endpoint_changes(self, created=(), interval_changed=(), updated=()):
+        """
+        批量应用端点变更，统一更新调度任务
+        
+        Args:
+            created: 新增的端点列表
+            interval_changed: 检查间隔发生变化的端点列表
+            updated: 配置发生变化的端点列表（包含检查间隔变化的端点）
+        """
+        if self.shard_coordinator:
+            for endpoint in created:
+                self.shard_coordinator.add_endpoint(endpoint)
+            # 分片工作进程持有端点配置的副本，所有更新过的端点都要同步过去
+            forwarded = {endpoint["name"]: endpoint for endpoint in interval_changed}
+            forwarded.update((endpoint["name"], endpoint) for endpoint in updated)
+            for endpoint in forwarded.values():
+                self.shard_coordinator.update_endpoint(endpoint)
+        elif self.scheduler.running:
+            for endpoint in created:
+                self._add_endpoint_check_job(endpoint)
+            for endpoint in interval_changed:
+                # 只重设触发器，保留任务本身
+                job_id = f"service_check_{endpoint['name']}"
+                interval = service_checker.get_endpoint_interval(endpoint)
+                if job_id in self.endpoint_jobs:
+                    self.scheduler.reschedule_job(job_id, trigger=IntervalTrigger(minutes=interval))
+                else:
+                    self._add_endpoint_check_job(endpoint)
+        logger.info(f"已应用端点调度变更: 新增 {len(created)} 个, 更新 {len(updated)} 个, "
+                    f"调整间隔 {len(interval_changed)} 个")
+
+    def remove_endpoint_job(self, name):
+        """
+        移除端点的检查任务及其通知状态
+        
+        Args:
+            name: 端点名称
+        """
+        if self.shard_coordinator:
+            self.shard_coordinator.remove_endpoint(name)
+        job_id = f"service_check_{name}"
+        if self.endpoint_jobs.pop(job_id, None) is not None:
+            self.remove_job(job_id)
+        self.notification_states.pop(name, None)
+        alert_deduplicator.forget("endpoint", name)
+
+    def _handle_check_result(self, name, is_ok, details):
+        """
+        处理端点检查结果，决定是否发送通知
+
+        Args:
+            name: 端点名称
+            is_ok: 是否正常
+            details: 检查详情
+        """
+        # 检查期间端点已被移除，丢弃结果
+        if service_checker.get_endpoint(name) is None:
+            return
+
+        service_checker.record_status(name, is_ok, details)
+
+        # 获取该端点的通知状态，用于跟踪状态变化
+        notification_status = self.notification_states.setdefault(name, {
+            "last_status": None,  # 上次检查的状态
+            "notified": False     # 是否已经发送过通知
+        })
+
+        # 首次检查正常或持续正常时不需要通知；其余情况（首次异常、状态变化、持续异常）
+        # 交给告警去重按指纹判断：状态变化始终发送，持续异常按重发策略间隔发送
+        previous_status = notification_status["last_status"]
+        notification_status["last_status"] = is_ok
+        if previous_status != is_ok:
+            notification_status["notified"] = False
+        should_notify = (
+            (not is_ok or (previous_status is not None and previous_status != is_ok))
+            and alert_deduplicator.should_send("endpoint", name, "up" if is_ok else "down")
+        )
+        
+        # 如果需要发送通知
+        if should_notify:
+            # 从端点中获取方法和URL信息
+            endpoint_info = service_checker.get_endpoint(name)
+            if endpoint_info:
+                target = f"{name} ({endpoint_info.get('method', 'GET')} {endpoint_info.get('url', '未知URL')})"
+            else:
+                target = name
+            
+            # 按模板构建通知消息
+            if previous_status is not None and previous_status == is_ok and not is_ok:
+                # 持续异常状态
+                template_name = "endpoint_still_down"
+            elif is_ok:
+                # 恢复正常
+                template_name = "endpoint_recovered"
+            else:
+                # 变为异常
+                template_name = "endpoint_down"
+            values = {"name": name, "target": target, "details": details}
+            subject, message = message_templates.render(template_name, values)
+            
+            # 设置通知级别
+            level = "info" if is_ok else "error"
+            
+            # 记录日志
+            if not is_ok:
+                logger.warning(f"服务检查异常: {name}")
+            else:
+                logger.info(f"服务已恢复正常: {name}")
+            
+            # 加入通知队列，由投递线程发送，不阻塞检查任务
+            def on_delivered(handle):
+                if handle.result:
+                    # 更新通知状态
+                    notification_status["notified"] = True
+                    logger.info(f"已发送{subject}")
+
+            notification_queue.enqueue(
+                subject, message, level, resource=name, template=(template_name, values)
+            ).add_done_callback(on_delivered)
+
+    def _start_sharded_checks(self):
+        """以分片模式启动服务检查，端点分布到多个工作进程"""
+        sharding_config = CONFIG["service_checks"].get("sharding", {})
+        self.shard_coordinator = ShardCoordinator(
+            num_shards=sharding_config.get("workers", 0),
+            result_handler=self._handle_check_result,
+            threads_per_worker=sharding_config.get("threads_per_worker", 20)
+        )
+        self.shard_coordinator.start(service_checker.endpoints)
+
+    def get_shard_status(self):
+        """获取分片检查状态，未启用分片时返回None"""
+        if not self.shard_coordinator:
+            return None
+        return self.shard_coordinator.get_status()
     
     def _add_system_monitoring_job(self):
         """添加系统监控任务"""
         job = self.scheduler.add_job(
-            system_monitor.check_system_resources,
+            self._tracked(system_monitor.check_system_resources),
             IntervalTrigger(minutes=self.system_monitoring_interval),
             id='system_monitoring',
             name='系统资源监控',
@@ -222,7 +307,7 @@ class TaskScheduler:
             return
             
         job = self.scheduler.add_job(
-            db_monitor.check_connection,
+            self._tracked(db_monitor.check_connection),
             IntervalTrigger(minutes=self.db_monitoring_interval),
             id='db_monitoring',
             name='数据库连接监控',
@@ -267,10 +352,115 @@ class TaskScheduler:
             message += "数据库连接监控: 已禁用\n"
         
         # 发送通知
-        notifier.send_notification(subject, message, "info")
+        notification_queue.enqueue(subject, message, "info")
     
+    def pause(self):
+        """暂停执行所有任务（例如转为备用节点时），已添加的任务保留"""
+        if self.shard_coordinator:
+            self.shard_coordinator.stop()
+        if self.scheduler.running:
+            self.scheduler.pause()
+            logger.info("任务调度器已暂停")
+
+    def resume(self):
+        """恢复执行已暂停的任务"""
+        if not self.scheduler.running:
+            self.start(db_monitoring_enabled=self.db_monitoring_enabled)
+            return
+        if self.shard_coordinator:
+            self.shard_coordinator.start(service_checker.endpoints)
+        self.scheduler.resume()
+        logger.info("任务调度器已恢复")
+
+    def drain(self, timeout):
+        """
+        优雅停止：不再分发新的检查，等待进行中的检查完成后关闭调度器
+        
+        Args:
+            timeout: 最长等待时间（秒），超时后不再等待未完成的检查
+            
+        Returns:
+            bool: 进行中的检查是否全部完成
+        """
+        deadline = time.time() + timeout
+        if self.scheduler.running:
+            self.scheduler.pause()
+        if self.shard_coordinator:
+            self.shard_coordinator.stop(timeout=max(deadline - time.time(), 0))
+
+        while self.in_flight_jobs > 0 and time.time() < deadline:
+            time.sleep(0.1)
+
+        drained = self.in_flight_jobs <= 0
+        if not drained:
+            logger.warning(f"停机截止时间已到，仍有 {self.in_flight_jobs} 个任务未完成，不再等待")
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+        logger.info(f"任务调度器已停止分发检查 ({'全部完成' if drained else '部分未完成'})")
+        return drained
+
+    def save_state(self, file_path):
+        """
+        保存端点的告警状态和最近检查结果，重启后可恢复
+        
+        Args:
+            file_path: 状态文件路径
+        """
+        state = {
+            "saved_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "notification_states": self.notification_states,
+            "alert_fingerprints": alert_deduplicator.export_state(),
+            "status_history": {
+                name: {
+                    "is_ok": status["is_ok"],
+                    "details": status.get("details"),
+                    "last_check": status["last_check"].strftime("%Y-%m-%d %H:%M:%S")
+                    if status.get("last_check") else None
+                }
+                for name, status in list(service_checker.status_history.items())
+            }
+        }
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, file_path)
+        logger.info(f"已保存运行状态: {file_path}")
+
+    def load_state(self, file_path):
+        """
+        从状态文件恢复端点的告警状态和最近检查结果
+        
+        Args:
+            file_path: 状态文件路径
+            
+        Returns:
+            bool: 是否恢复成功
+        """
+        if not os.path.exists(file_path):
+            return False
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"读取状态文件失败: {str(e)}")
+            return False
+
+        self.notification_states.update(state.get("notification_states", {}))
+        alert_deduplicator.import_state(state.get("alert_fingerprints"))
+        for name, status in state.get("status_history", {}).items():
+            last_check = status.get("last_check")
+            service_checker.status_history[name] = {
+                "is_ok": status.get("is_ok"),
+                "details": status.get("details"),
+                "last_check": datetime.strptime(last_check, "%Y-%m-%d %H:%M:%S") if last_check else None
+            }
+        logger.info(f"已从状态文件恢复 {len(self.notification_states)} 个端点的告警状态 (保存于 {state.get('saved_at')})")
+        return True
+
     def stop(self):
         """停止调度器"""
+        if self.shard_coordinator:
+            self.shard_coordinator.stop()
         if self.scheduler.running:
             self.scheduler.shutdown()
             logger.info("任务调度器已停止")
@@ -278,7 +468,7 @@ class TaskScheduler:
     def add_scheduled_task(self, func, minutes, job_id, job_name):
         """添加自定义定时任务"""
         job = self.scheduler.add_job(
-            func,
+            self._tracked(func),
             IntervalTrigger(minutes=minutes),
             id=job_id,
             name=job_name,
@@ -300,11 +490,7 @@ class TaskScheduler:
             bool: 是否更新成功
         """
         # 查找端点
-        endpoint = None
-        for ep in service_checker.endpoints:
-            if ep["name"] == endpoint_name:
-                endpoint = ep
-                break
+        endpoint = service_checker.get_endpoint(endpoint_name)
         
         if not endpoint:
             logger.error(f"找不到端点: {endpoint_name}")
@@ -312,6 +498,12 @@ class TaskScheduler:
         
         # 更新端点配置
         endpoint["interval_minutes"] = new_interval
+
+        # 分片模式下通知对应分片重新调度
+        if self.shard_coordinator:
+            self.shard_coordinator.update_endpoint(endpoint)
+            logger.info(f"已更新端点检查间隔: {endpoint_name}, 新间隔: {new_interval}分钟")
+            return True
         
         # 更新调度任务
         job_id = f"service_check_{endpoint_name}"
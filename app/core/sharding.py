@@ -0,0 +1,298 @@
+import os
+import time
+import heapq
+import signal
+import bisect
+import hashlib
+import logging
+import threading
+import multiprocessing
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class ConsistentHashRing:
+    """一致性哈希环，按端点名称将端点分配到各个分片"""
+
+    def __init__(self, nodes, virtual_nodes=64):
+        self.virtual_nodes = virtual_nodes
+        self._keys = []
+        self._ring = {}
+        for node in nodes:
+            self.add_node(node)
+
+    @staticmethod
+    def _hash(key):
+        return int(hashlib.md5(key.encode("utf-8")).hexdigest()[:16], 16)
+
+    def add_node(self, node):
+        """添加分片节点（含虚拟节点）"""
+        for i in range(self.virtual_nodes):
+            h = self._hash(f"{node}#{i}")
+            self._ring[h] = node
+            bisect.insort(self._keys, h)
+
+    def get_node(self, key):
+        """获取某个键所属的分片"""
+        if not self._keys:
+            return None
+        idx = bisect.bisect(self._keys, self._hash(key)) % len(self._keys)
+        return self._ring[self._keys[idx]]
+
+
+def _shard_worker_main(shard_id, endpoints, command_queue, result_queue, threads):
+    """
+    分片工作进程入口
+
+    每个工作进程维护自己负责的端点，按各自的检查间隔执行检查，
+    并把检查结果发送回协调进程。工作进程本身不发送任何通知。
+    """
+    # 中断信号由协调进程统一处理，停机时由协调进程发送停止命令
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    from app.services.service_check import service_checker
+
+    schedule = {}  # {name: (endpoint, generation)}
+    heap = []
+    generation = 0
+
+    def _schedule(endpoint):
+        nonlocal generation
+        generation += 1
+        name = endpoint["name"]
+        interval = service_checker.get_endpoint_interval(endpoint)
+        schedule[name] = (endpoint, generation)
+        next_run = time.time() + interval * 60
+        heapq.heappush(heap, (next_run, generation, name))
+
+    def _run_check(endpoint):
+        name = endpoint["name"]
+        start_time = time.time()
+        try:
+            is_ok, details = service_checker.check_service(endpoint)
+        except Exception as e:
+            is_ok, details = False, f"服务检查出错: {str(e)}"
+        result_queue.put((shard_id, name, is_ok, details, start_time, time.time() - start_time))
+
+    for endpoint in endpoints:
+        _schedule(endpoint)
+
+    executor = ThreadPoolExecutor(threads)
+    running = True
+    while running:
+        # 等待到下一个到期任务，期间处理协调进程的命令
+        wait = min(max(heap[0][0] - time.time(), 0), 1.0) if heap else 1.0
+        try:
+            command, payload = command_queue.get(timeout=wait)
+            if command == "add":
+                _schedule(payload)
+            elif command == "update":
+                entry = schedule.get(payload["name"])
+                if entry and service_checker.get_endpoint_interval(entry[0]) == service_checker.get_endpoint_interval(payload):
+                    # 间隔不变时只替换端点配置，保留下次检查时间
+                    schedule[payload["name"]] = (payload, entry[1])
+                else:
+                    _schedule(payload)
+            elif command == "remove":
+                schedule.pop(payload, None)
+            elif command == "stop":
+                running = False
+                continue
+        except queue.Empty:
+            pass
+
+        now = time.time()
+        while heap and heap[0][0] <= now:
+            next_run, gen, name = heapq.heappop(heap)
+            entry = schedule.get(name)
+            if not entry or entry[1] != gen:
+                continue  # 端点已被移除或重新调度
+            endpoint = entry[0]
+            executor.submit(_run_check, endpoint)
+            interval = service_checker.get_endpoint_interval(endpoint)
+            heapq.heappush(heap, (next_run + interval * 60, gen, name))
+
+    executor.shutdown(wait=True)
+
+
+class ShardCoordinator:
+    """
+    分片协调器
+
+    将端点按名称一致性哈希分配到N个工作进程，每个进程独立执行检查。
+    协调器汇总所有检查结果，并且是唯一发送通知的进程。
+    """
+
+    def __init__(self, num_shards, result_handler, threads_per_worker=20):
+        self.num_shards = num_shards or os.cpu_count() or 1
+        self.result_handler = result_handler
+        self.threads_per_worker = threads_per_worker
+        self.ring = ConsistentHashRing(range(self.num_shards))
+        self.shards = {}  # {shard_id: {"process", "commands", "endpoints"}}
+        self.results_received = 0
+        self._running = False
+        self._lock = threading.Lock()
+        self._handler_pool = None
+        self._consumer = None
+        self._ctx = self._get_context()
+        self.result_queue = self._ctx.Queue()
+
+    @staticmethod
+    def _get_context():
+        """
+        工作进程的启动方式
+
+        协调进程中已经运行着调度器、采样和通知投递线程，fork 时其他线程持有的锁（如日志、SSL）会被复制为已加锁状态，
+        子进程可能死锁。这里使用 forkserver（由单线程的服务进程 fork，预先导入检查模块），不支持时使用 spawn，
+        端点配置都通过参数显式传给工作进程。
+        """
+        try:
+            ctx = multiprocessing.get_context("forkserver")
+            ctx.set_forkserver_preload(["app.services.service_check"])
+            return ctx
+        except ValueError:
+            return multiprocessing.get_context("spawn")
+
+    def shard_for(self, name):
+        """获取端点所属分片"""
+        return self.ring.get_node(name)
+
+    def start(self, endpoints):
+        """按分片启动工作进程"""
+        if self._running:
+            return
+        self._handler_pool = ThreadPoolExecutor(4)
+        for shard_id in range(self.num_shards):
+            self.shards[shard_id] = {"process": None, "commands": None, "endpoints": {}}
+        for endpoint in endpoints:
+            self.shards[self.shard_for(endpoint["name"])]["endpoints"][endpoint["name"]] = endpoint
+
+        for shard_id in self.shards:
+            self._start_worker(shard_id)
+
+        self._running = True
+        self._consumer = threading.Thread(target=self._consume_results, name="shard-coordinator", daemon=True)
+        self._consumer.start()
+        logger.info(f"分片检查已启动: {self.num_shards} 个工作进程, {len(endpoints)} 个端点")
+
+    def _start_worker(self, shard_id):
+        shard = self.shards[shard_id]
+        shard["commands"] = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_shard_worker_main,
+            args=(shard_id, list(shard["endpoints"].values()), shard["commands"],
+                  self.result_queue, self.threads_per_worker),
+            name=f"shard-worker-{shard_id}",
+            daemon=True
+        )
+        process.start()
+        shard["process"] = process
+        logger.info(f"分片工作进程已启动: 分片={shard_id}, PID={process.pid}, 端点数={len(shard['endpoints'])}")
+
+    def _send(self, name, command, payload):
+        shard_id = self.shard_for(name)
+        with self._lock:
+            shard = self.shards[shard_id]
+            if command == "remove":
+                shard["endpoints"].pop(name, None)
+            else:
+                shard["endpoints"][name] = payload
+            if self._running:
+                shard["commands"].put((command, payload))
+
+    def add_endpoint(self, endpoint):
+        """将新端点分配到对应分片"""
+        self._send(endpoint["name"], "add", endpoint)
+
+    def update_endpoint(self, endpoint):
+        """更新端点配置，检查间隔变化时重新调度"""
+        self._send(endpoint["name"], "update", endpoint)
+
+    def remove_endpoint(self, name):
+        """从对应分片移除端点"""
+        self._send(name, "remove", name)
+
+    def _consume_results(self):
+        """汇总工作进程的检查结果，并在协调进程中处理通知"""
+        last_liveness_check = time.time()
+        while self._running:
+            try:
+                shard_id, name, is_ok, details, start_time, duration = self.result_queue.get(timeout=1.0)
+                self.results_received += 1
+                self._handler_pool.submit(self._handle_result, name, is_ok, details)
+            except queue.Empty:
+                pass
+            except (EOFError, OSError):
+                break
+
+            if time.time() - last_liveness_check >= 5:
+                last_liveness_check = time.time()
+                self._restart_dead_workers()
+
+    def _handle_result(self, name, is_ok, details):
+        try:
+            self.result_handler(name, is_ok, details)
+        except Exception as e:
+            logger.error(f"处理分片检查结果失败: {name}, 错误: {str(e)}")
+
+    def _restart_dead_workers(self):
+        with self._lock:
+            for shard_id, shard in self.shards.items():
+                process = shard["process"]
+                if self._running and process is not None and not process.is_alive():
+                    logger.warning(f"分片工作进程已退出 (分片={shard_id}, 退出码={process.exitcode})，正在重启")
+                    self._start_worker(shard_id)
+
+    def stop(self, timeout=10):
+        """停止所有工作进程，工作进程会先完成正在进行的检查"""
+        if not self._running:
+            return
+        self._running = False
+        for shard in self.shards.values():
+            try:
+                shard["commands"].put(("stop", None))
+            except Exception:
+                pass
+        deadline = time.time() + timeout
+        if self._consumer:
+            self._consumer.join(timeout=2)
+
+        # 工作进程退出前仍会上报进行中检查的结果，在此继续汇总
+        pending = [shard["process"] for shard in self.shards.values()]
+        while True:
+            try:
+                shard_id, name, is_ok, details, start_time, duration = self.result_queue.get(timeout=0.1)
+                self.results_received += 1
+                self._handler_pool.submit(self._handle_result, name, is_ok, details)
+            except queue.Empty:
+                if not any(process.is_alive() for process in pending) or time.time() >= deadline:
+                    break
+            except (EOFError, OSError):
+                break
+
+        for process in pending:
+            process.join(max(deadline - time.time(), 0))
+            if process.is_alive():
+                logger.warning(f"分片工作进程未在截止时间内退出，强制终止: PID={process.pid}")
+                process.terminate()
+        self._handler_pool.shutdown(wait=True)
+        logger.info("分片检查已停止")
+
+    def get_status(self):
+        """获取分片运行状态"""
+        return {
+            "workers": self.num_shards,
+            "results_received": self.results_received,
+            "shards": [
+                {
+                    "shard": shard_id,
+                    "pid": shard["process"].pid if shard["process"] else None,
+                    "alive": bool(shard["process"] and shard["process"].is_alive()),
+                    "endpoints": len(shard["endpoints"])
+                }
+                for shard_id, shard in self.shards.items()
+            ]
+        }
@@ -3,11 +3,13 @@
 
 import os
 import sys
+import json
 import logging
 import argparse
 import time
 import importlib
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 # 导入配置和核心模块
 from app.config.settings import CONFIG, load_config
@@ -20,7 +22,13 @@ except ImportError:
     logging.warning("数据库模块不可用，将只从配置文件读取配置")
 
 from app.core.scheduler import task_scheduler
+from app.core.leader import create_leader_elector
+from app.core.config_watcher import ConfigWatcher, create_config_watcher
+from app.core.lifecycle import shutdown_manager
 from app.services.notifier import notifier
+from app.services.notification_queue import notification_queue
+from app.services.alert_dedup import alert_deduplicator
+from app.services.delivery_metrics import delivery_metrics
 from app.services.service_check import service_checker
 from app.services.system_monitor import system_monitor
 
@@ -30,6 +38,11 @@ logger = logging.getLogger(__name__)
 # 创建Flask应用
 app = Flask(__name__)
 
+# 主备选举器（未启用高可用时为None）
+leader_elector = None
+# 配置文件监视器（未启用热加载时为None）
+config_watcher = None
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """健康检查接口"""
@@ -57,13 +70,24 @@ def status():
             scheduler_jobs = []
         
         # 确保返回的数据可以被JSON序列化
-        return jsonify({
+        result = {
             "status": "运行中",
             "version": "0.1.0",
             "services": service_status,
             "system": system_status,
             "scheduled_jobs": scheduler_jobs
-        })
+        }
+
+        # 高可用模式下附加主备状态
+        if leader_elector:
+            result["high_availability"] = leader_elector.get_status()
+
+        # 分片模式下附加分片状态
+        shard_status = task_scheduler.get_shard_status()
+        if shard_status:
+            result["shards"] = shard_status
+
+        return jsonify(result)
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
@@ -74,6 +98,53 @@ def status():
             "version": "0.1.0"
         }), 500
 
+@app.route('/api/system/history', methods=['GET'])
+def system_history():
+    """查询系统指标历史，参数: name, start, end（Unix时间戳）或 seconds（最近N秒）, resolution（秒）"""
+    try:
+        name = request.args.get('name')
+        start = request.args.get('start', type=float)
+        end = request.args.get('end', type=float)
+        seconds = request.args.get('seconds', type=float)
+        if seconds is not None and start is None:
+            start = time.time() - seconds
+        result = system_monitor.get_history(name, start, end, request.args.get('resolution', type=float))
+    except Exception as e:
+        logger.error(f"查询系统指标历史失败: {str(e)}")
+        return jsonify({"error": f"查询系统指标历史失败: {str(e)}"}), 500
+    if result is None:
+        return jsonify({"error": "指标不存在或未启用历史记录" if name else "未启用历史记录"}), 404
+    return jsonify(result)
+
+@app.route('/api/system/mounts', methods=['GET'])
+def system_mounts():
+    """获取当前监控的磁盘挂载点、挂载表刷新次数和采集耗时"""
+    return jsonify(system_monitor.get_mount_status())
+
+@app.route('/api/system/processes', methods=['GET'])
+def system_processes():
+    """获取CPU或内存占用最高的进程，参数: sort（cpu或memory，默认cpu）, n（进程数）"""
+    resource = request.args.get('sort', 'cpu')
+    if resource not in ('cpu', 'memory'):
+        return jsonify({"error": "sort 只能是 cpu 或 memory"}), 400
+    result = system_monitor.get_top_processes(resource, request.args.get('n', type=int))
+    if result is None:
+        return jsonify({"error": "进程排行未启用"}), 404
+    return jsonify(result)
+
+@app.route('/api/system/io', methods=['GET'])
+def system_io():
+    """获取最近一次采样的各磁盘I/O速率和各网卡流量速率"""
+    result = system_monitor.get_io_rates()
+    if result is None:
+        return jsonify({"error": "磁盘I/O和网卡速率采集未启用"}), 404
+    return jsonify(result)
+
+@app.route('/api/system/rules', methods=['GET'])
+def system_rules():
+    """获取系统资源阈值规则的当前聚合值和超标状态"""
+    return jsonify(system_monitor.get_rule_status())
+
 @app.route('/api/endpoints', methods=['GET', 'POST'])
 def manage_endpoints():
     """管理服务检查端点"""
@@ -106,13 +177,69 @@ def manage_endpoints():
         
         # 如果调度器已启动，为新端点添加任务
         if task_scheduler.scheduler.running:
-            for endpoint in service_checker.endpoints:
-                if endpoint["name"] == data['name']:
-                    task_scheduler._add_endpoint_check_job(endpoint)
-                    break
+            endpoint = service_checker.get_endpoint(data['name'])
+            if endpoint:
+                task_scheduler._add_endpoint_check_job(endpoint)
         
         return jsonify({"status": "success", "message": f"已添加端点: {data['name']}"}), 201
 
+def _parse_bulk_items():
+    """解析批量请求体，支持JSON数组和NDJSON（每行一个JSON对象）"""
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        items = []
+        for line_no, line in enumerate(request.get_data(cache=False).splitlines(), start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                raise ValueError(f"第{line_no}行不是有效的JSON: {str(e)}")
+        return items
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise ValueError("请求体必须是端点配置的JSON数组或NDJSON")
+    return data
+
+@app.route('/api/endpoints/bulk', methods=['POST'])
+def bulk_endpoints():
+    """批量添加或更新服务检查端点"""
+    start_time = time.time()
+    try:
+        items = _parse_bulk_items()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not items:
+        return jsonify({"error": "请提供至少一个端点配置"}), 400
+
+    # 先校验全部条目，任一条目无效则整体不生效
+    applied, results, changes = service_checker.bulk_upsert_endpoints(items)
+    if not applied:
+        return jsonify({
+            "status": "failed",
+            "message": "存在无效的端点配置，未做任何变更",
+            "errors": sum(1 for result in results if result["errors"]),
+            "results": results
+        }), 400
+
+    # 统一更新调度任务
+    task_scheduler.apply_endpoint_changes(
+        created=changes["created"],
+        interval_changed=changes["interval_changed"],
+        updated=changes["updated"]
+    )
+
+    return jsonify({
+        "status": "success",
+        "created": len(changes["created"]),
+        "updated": len(changes["updated"]),
+        "unchanged": sum(1 for result in results if result["status"] == "unchanged"),
+        "elapsed_ms": round((time.time() - start_time) * 1000, 2),
+        "results": results
+    }), 200
+
 @app.route('/api/endpoints/<endpoint_name>/interval', methods=['PUT'])
 def update_endpoint_interval(endpoint_name):
     """更新端点的检查间隔时间"""
@@ -137,6 +264,17 @@ def update_endpoint_interval(endpoint_name):
     else:
         return jsonify({"error": f"找不到端点: {endpoint_name}"}), 404
 
+@app.route('/api/config/reload', methods=['POST'])
+def reload_config():
+    """重新加载配置文件中的端点，只应用变化部分"""
+    global config_watcher
+    if config_watcher is None:
+        config_watcher = ConfigWatcher()
+    result = config_watcher.reload()
+    if result.get("status") != "success":
+        return jsonify(result), 400
+    return jsonify(result), 200
+
 @app.route('/api/notify', methods=['POST'])
 def send_notification():
     """发送测试通知"""
@@ -147,18 +285,92 @@ def send_notification():
     subject = data.get('subject', '测试通知')
     message = data.get('message', '这是一条测试通知消息')
     level = data.get('level', 'info')
-    
-    success = notifier.send_notification(subject, message, level)
+
+    # 备用节点不发送通知，入队后只会停留在发件箱中，直接拒绝让调用方改投主节点
+    if not notifier.active:
+        body = {"error": "当前实例为备用节点，不发送通知"}
+        if leader_elector:
+            body["high_availability"] = leader_elector.get_status()
+        return jsonify(body), 503
+
+    # 相同 (source, resource, state) 的告警经过去重，force=true时跳过去重直接发送
+    handle = notification_queue.enqueue(
+        subject, message, level,
+        resource=data.get('resource'),
+        source=None if data.get('force') else data.get('source', 'api'),
+        state=data.get('state')
+    )
+    if handle.status == "suppressed":
+        return jsonify({"status": "suppressed", "message": "重复告警已被抑制", "notification": handle.to_dict()}), 200
+
+    # wait=false时只入队，立即返回
+    if not data.get('wait', True):
+        return jsonify({"status": "queued", "message": "通知已加入发送队列", "notification": handle.to_dict()}), 202
+
+    success = handle.wait(timeout=data.get('timeout', 60))
     
     if success:
         return jsonify({"status": "success", "message": "通知已发送"}), 200
+    elif success is None:
+        return jsonify({"status": "queued", "message": "通知仍在发送中", "notification": handle.to_dict()}), 202
     else:
         return jsonify({"error": "通知发送失败"}), 500
 
+@app.route('/api/notifications/queue', methods=['GET'])
+def notification_queue_stats():
+    """获取通知队列统计信息"""
+    return jsonify(notification_queue.get_stats())
+
+@app.route('/api/notifications/telegram', methods=['GET'])
+def telegram_notification_stats():
+    """获取Telegram发送节流统计和最近一次发送结果"""
+    return jsonify(notifier.get_telegram_stats())
+
+@app.route('/api/notifications/digest', methods=['GET'])
+def notification_digest_stats():
+    """获取各渠道的告警汇总统计"""
+    return jsonify(notifier.get_digest_stats())
+
+@app.route('/api/notifications/channels', methods=['GET'])
+def notification_channel_stats():
+    """获取各通知渠道的配置和发送统计"""
+    return jsonify(notifier.get_channel_stats())
+
+@app.route('/api/notifications/dedup', methods=['GET'])
+def notification_dedup_stats():
+    """获取告警去重统计，包括被抑制的告警数量"""
+    return jsonify(alert_deduplicator.get_stats())
+
+@app.route('/api/notifications/metrics', methods=['GET'])
+def notification_delivery_metrics():
+    """获取各渠道和各收件人的投递计数、失败率和耗时分布"""
+    return jsonify(notifier.get_delivery_metrics())
+
+def _notification_gauges():
+    """通知队列和发件箱的瞬时状态，/metrics 导出时读取"""
+    queue_stats = notification_queue.get_stats()
+    # 发件箱统计超时或发件箱已关闭时为None，对应的指标本次不导出
+    outbox_stats = queue_stats.get("outbox") or {}
+    return {
+        "queue_depth": queue_stats["depth"],
+        "queue_in_flight": queue_stats["in_flight"],
+        "queue_oldest_age_seconds": queue_stats["oldest_age_seconds"],
+        "outbox_pending": outbox_stats.get("pending"),
+        "outbox_dead": outbox_stats.get("dead"),
+        "outbox_oldest_pending_age_seconds": outbox_stats.get("oldest_pending_age_seconds")
+    }
+
+delivery_metrics.set_gauge_provider(_notification_gauges)
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """以Prometheus文本格式导出通知投递指标和队列状态"""
+    return Response(generate_latest(delivery_metrics.registry), content_type=CONTENT_TYPE_LATEST)
+
 def setup_services():
     """初始化所有服务"""
     try:
-        global CONFIG
+        global CONFIG, leader_elector, config_watcher
         # 初始化数据库（如果可用）
         db_monitoring_enabled = False
         if DB_AVAILABLE:
@@ -195,8 +407,55 @@ def setup_services():
                     json_check=endpoint.get("json_check")
                 )
         
-        # 启动调度器
-        task_scheduler.start(db_monitoring_enabled=db_monitoring_enabled)
+        # 启动系统资源后台采样，主备节点都采样，状态接口直接读取快照
+        system_monitor.sampler.start()
+
+        # 上次停机时保存的告警状态
+        state_file = CONFIG.get("shutdown", {}).get("state_file", "monitor_state.json")
+
+        # 启动调度器；启用高可用时只有获得租约的主节点运行任务并发送通知
+        def on_elected():
+            notifier.set_active(True)
+            if task_scheduler.scheduler.running:
+                task_scheduler.resume()
+            else:
+                task_scheduler.load_state(state_file)
+                task_scheduler.start(db_monitoring_enabled=db_monitoring_enabled)
+
+        def on_demoted():
+            notifier.set_active(False)
+            task_scheduler.pause()
+
+        leader_elector = create_leader_elector(on_elected=on_elected, on_demoted=on_demoted)
+        if leader_elector:
+            notifier.set_active(False)
+            leader_elector.start()
+        else:
+            task_scheduler.load_state(state_file)
+            task_scheduler.start(db_monitoring_enabled=db_monitoring_enabled)
+
+        # 启动配置热加载
+        config_watcher = create_config_watcher()
+        if config_watcher:
+            config_watcher.start()
+
+        # 注册停机步骤，按顺序执行
+        def save_state(remaining):
+            # 备用节点不覆盖主节点保存的状态
+            if leader_elector is None or leader_elector.is_leader:
+                task_scheduler.save_state(state_file)
+
+        if config_watcher:
+            shutdown_manager.register("停止配置热加载", lambda remaining: config_watcher.stop(), order=10)
+        shutdown_manager.register("停止系统资源采样", lambda remaining: system_monitor.sampler.stop(), order=15)
+        shutdown_manager.register("停止分发检查并等待进行中的检查", task_scheduler.drain, order=20)
+        shutdown_manager.register("发送队列中的通知", notification_queue.stop, order=50)
+        shutdown_manager.register("发送告警汇总窗口中的通知", lambda remaining: notifier.flush_digests(), order=55)
+        shutdown_manager.register("关闭通知渠道", lambda remaining: notifier.close_channels(), order=58)
+        shutdown_manager.register("关闭SMTP连接", lambda remaining: notifier.smtp_pool.close_all(), order=60)
+        shutdown_manager.register("保存运行状态", save_state, order=80)
+        if leader_elector:
+            shutdown_manager.register("释放主节点租约", lambda remaining: leader_elector.stop(), order=90)
         
         logger.info("所有服务初始化完成")
         return True
@@ -226,6 +485,9 @@ def main():
     if not setup_services():
         sys.exit(1)
     
+    # 收到SIGTERM/SIGINT时优雅停机
+    shutdown_manager.install_signal_handlers()
+    
     # 启动Web服务
     app.run(host=args.host, port=args.port, debug=args.debug)
 
@@ -0,0 +1,131 @@
+import time
+import logging
+import threading
+
+from cachetools import TTLCache
+
+from app.config.settings import CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class AlertDeduplicator:
+    """
+    告警去重
+
+    以告警指纹 (来源, 对象, 状态) 判断是否需要发送：
+    - 对象首次出现或状态发生变化时始终发送
+    - 状态持续不变时，按来源的重发策略间隔重发，其余的被抑制
+    - 长时间没有再出现的指纹按TTL淘汰
+    """
+
+    def __init__(self, policies=None, default_policy=None, ttl_seconds=86400, max_entries=10000):
+        """
+        Args:
+            policies: 各来源的重发策略 {source: {"resend_interval_seconds": N}}，N为0表示状态不变时不重发
+            default_policy: 未单独配置的来源使用的策略
+            ttl_seconds: 指纹在最后一次出现后保留的时间
+            max_entries: 最多保留的指纹数量
+        """
+        self.policies = policies or {}
+        self.default_policy = default_policy or {"resend_interval_seconds": 3600}
+        self.ttl_seconds = ttl_seconds
+        # {(source, resource): {"state", "first_seen", "last_sent", "occurrences", "suppressed"}}
+        self._entries = TTLCache(maxsize=max_entries, ttl=ttl_seconds, timer=time.time)
+        self._lock = threading.Lock()
+        self.stats = {"sent": 0, "suppressed": 0}
+        self.suppressed_by_source = {}
+
+    def get_policy(self, source):
+        return self.policies.get(source, self.default_policy)
+
+    def should_send(self, source, resource, state, now=None):
+        """
+        判断告警是否需要发送，并记录本次出现
+
+        Args:
+            source: 告警来源 (endpoint, system, database, api)
+            resource: 告警对象，如端点名称
+            state: 告警状态，如 down、up、overload
+
+        Returns:
+            bool: 是否需要发送
+        """
+        now = now or time.time()
+        key = (source, resource)
+        resend_interval = self.get_policy(source).get("resend_interval_seconds", 0)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["state"] != state:
+                # 新指纹：首次出现或状态变化
+                entry = {"state": state, "first_seen": now, "last_sent": now, "occurrences": 1, "suppressed": 0}
+                send = True
+            else:
+                entry["occurrences"] += 1
+                send = bool(resend_interval) and now - entry["last_sent"] >= resend_interval
+                if send:
+                    entry["last_sent"] = now
+                else:
+                    entry["suppressed"] += 1
+            # 重新写入以刷新TTL
+            self._entries[key] = entry
+
+            if send:
+                self.stats["sent"] += 1
+            else:
+                self.stats["suppressed"] += 1
+                self.suppressed_by_source[source] = self.suppressed_by_source.get(source, 0) + 1
+
+        if not send:
+            logger.debug(f"重复告警已抑制: {source}/{resource}/{state}")
+        return send
+
+    def forget(self, source, resource):
+        """删除对象的告警记录，如端点被移除时"""
+        with self._lock:
+            self._entries.pop((source, resource), None)
+
+    def export_state(self):
+        """导出告警记录，用于保存运行状态"""
+        with self._lock:
+            return [
+                {"source": source, "resource": resource, **entry}
+                for (source, resource), entry in self._entries.items()
+            ]
+
+    def import_state(self, entries):
+        """从保存的运行状态恢复告警记录，已超过TTL的记录会被忽略"""
+        now = time.time()
+        restored = 0
+        with self._lock:
+            for item in entries or []:
+                item = dict(item)
+                key = (item.pop("source"), item.pop("resource"))
+                if now - item.get("last_sent", 0) < self.ttl_seconds:
+                    self._entries[key] = item
+                    restored += 1
+        return restored
+
+    def get_stats(self):
+        """获取去重统计，包括各来源被抑制的告警数量"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["suppressed_by_source"] = dict(self.suppressed_by_source)
+            stats["active_fingerprints"] = len(self._entries)
+        stats["ttl_seconds"] = self.ttl_seconds
+        return stats
+
+
+def _create_alert_deduplicator():
+    dedup_config = CONFIG["notifications"].get("dedup", {})
+    return AlertDeduplicator(
+        policies=dedup_config.get("policies", {}),
+        default_policy=dedup_config.get("default_policy"),
+        ttl_seconds=dedup_config.get("ttl_seconds", 86400),
+        max_entries=dedup_config.get("max_entries", 10000)
+    )
+
+
+# 创建告警去重实例
+alert_deduplicator = _create_alert_deduplicator()
@@ -0,0 +1,284 @@
+import os
+import time
+import logging
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+PSI_RESOURCES = ("cpu", "memory", "io")
+
+# cgroup v1 中不限制内存时 limit_in_bytes 为接近 2^63 的值（按页对齐）
+V1_UNLIMITED = 2 ** 62
+
+
+class _ControlFile:
+    """
+    保持打开的cgroup控制文件
+
+    cgroup和proc文件每次读取都由内核重新生成内容，用 pread 从偏移0读取即可得到最新值，
+    不需要重复 open/close。文件不存在时 read 返回None。
+    """
+
+    __slots__ = ("path", "fd", "size")
+
+    def __init__(self, path, size=4096):
+        self.path = path
+        self.size = size
+        try:
+            self.fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            self.fd = None
+
+    def read(self):
+        if self.fd is None:
+            return None
+        try:
+            return os.pread(self.fd, self.size, 0).decode("ascii", "replace")
+        except OSError as e:
+            logger.warning(f"读取 {self.path} 失败: {str(e)}")
+            return None
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def _parse_int(text):
+    if text is None:
+        return None
+    text = text.strip()
+    if not text or text == "max":
+        return None
+    return int(text)
+
+
+def _parse_keyed(text):
+    """解析 "键 值" 每行一对的文件，如 memory.stat、cpu.stat"""
+    values = {}
+    for line in (text or "").splitlines():
+        key, _, value = line.partition(" ")
+        if value:
+            values[key] = int(value)
+    return values
+
+
+def parse_pressure(text):
+    """
+    解析PSI文件，如 cpu.pressure:
+        some avg10=0.00 avg60=0.00 avg300=0.00 total=0
+        full avg10=0.00 avg60=0.00 avg300=0.00 total=0
+
+    Returns:
+        dict: {"some": {"avg10", "avg60", "avg300"}, "full": {...}}
+    """
+    result = {}
+    for line in (text or "").splitlines():
+        kind, _, fields = line.partition(" ")
+        result[kind] = {
+            key: float(value)
+            for key, _, value in (field.partition("=") for field in fields.split())
+            if key != "total"
+        }
+    return result
+
+
+def detect_cgroup(root=CGROUP_ROOT):
+    """
+    检测当前进程所在的cgroup
+
+    Returns:
+        (int, dict): (版本, {控制器: 目录})。v2 的字典只有 "unified" 一项；检测不到时返回 (None, {})
+    """
+    try:
+        with open("/proc/self/cgroup") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None, {}
+
+    def resolve(base, path):
+        # 容器使用独立的cgroup命名空间时路径为 /，否则是宿主机上的完整路径
+        full = os.path.normpath(os.path.join(base, path.lstrip("/")))
+        return full if os.path.isdir(full) else base
+
+    v1_paths = {}
+    unified = None
+    for line in lines:
+        _, controllers, path = line.split(":", 2)
+        if controllers == "":
+            unified = path
+        for controller in controllers.split(","):
+            if controller:
+                v1_paths[controller] = path
+
+    if unified is not None and not v1_paths.get("memory") and os.path.exists(os.path.join(root, "cgroup.controllers")):
+        return 2, {"unified": resolve(root, unified)}
+    if "memory" in v1_paths or "cpuacct" in v1_paths:
+        directories = {}
+        for controller in ("memory", "cpu", "cpuacct"):
+            base = os.path.join(root, controller)
+            if controller in v1_paths and os.path.isdir(base):
+                directories[controller] = resolve(base, v1_paths[controller])
+        # 混合模式下PSI在unified层级中
+        hybrid = os.path.join(root, "unified")
+        if unified is not None and os.path.isdir(hybrid):
+            directories["unified"] = resolve(hybrid, unified)
+        return 1, directories
+    return None, {}
+
+
+class CgroupCollector:
+    """
+    cgroup v1/v2 资源采集
+
+    容器中 psutil 读取的是宿主机的 /proc/meminfo 和 /proc/stat，使用率相对于整台主机；
+    这里直接读取容器所在cgroup的内存用量和限制、CPU配额和累计用量以及PSI压力，
+    控制文件在初始化时打开并保持打开，每次采集只做 pread。
+
+    - 内存使用率 = 工作集 / 内存限制，工作集 = 用量 - inactive_file（与kubelet一致，不含可回收的页缓存）；
+      未设置限制时按主机内存计算
+    - CPU使用率 = 累计CPU时间增量 / (经过的时间 × 配额核数)；未设置配额时按可用CPU数计算
+    - PSI: v2 读取cgroup自身的 *.pressure，v1 读取混合模式下unified层级的文件，都没有时读取主机的 /proc/pressure
+    """
+
+    def __init__(self, root=CGROUP_ROOT):
+        self.version, self.directories = detect_cgroup(root)
+        if self.version is None:
+            raise RuntimeError("未检测到cgroup，无法按容器采集资源使用情况")
+        self.host_memory = psutil.virtual_memory().total
+        self.cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else psutil.cpu_count()
+        self._files = {}
+        if self.version == 2:
+            unified = self.directories["unified"]
+            self._open("memory_usage", unified, "memory.current")
+            self._open("memory_limit", unified, "memory.max")
+            self._open("memory_stat", unified, "memory.stat", size=16384)
+            self._open("cpu_max", unified, "cpu.max")
+            self._open("cpu_stat", unified, "cpu.stat")
+        else:
+            memory = self.directories.get("memory")
+            if memory:
+                self._open("memory_usage", memory, "memory.usage_in_bytes")
+                self._open("memory_limit", memory, "memory.limit_in_bytes")
+                self._open("memory_stat", memory, "memory.stat", size=16384)
+            cpu = self.directories.get("cpu")
+            if cpu:
+                self._open("cpu_quota", cpu, "cpu.cfs_quota_us")
+                self._open("cpu_period", cpu, "cpu.cfs_period_us")
+                self._open("cpu_stat", cpu, "cpu.stat")
+            cpuacct = self.directories.get("cpuacct")
+            if cpuacct:
+                self._open("cpu_usage", cpuacct, "cpuacct.usage")
+
+        self.psi_scope = None
+        pressure_directory = self.directories.get("unified")
+        if pressure_directory and os.path.exists(os.path.join(pressure_directory, "cpu.pressure")):
+            self.psi_scope = "cgroup"
+        elif os.path.isdir("/proc/pressure"):
+            pressure_directory, self.psi_scope = "/proc/pressure", "host"
+        if self.psi_scope:
+            for resource in PSI_RESOURCES:
+                name = resource if self.psi_scope == "host" else f"{resource}.pressure"
+                self._open(f"psi_{resource}", pressure_directory, name)
+
+        self._last_cpu = None  # (读取时间, 累计CPU秒数, nr_periods, nr_throttled)
+        logger.info(f"按cgroup v{self.version}采集资源使用情况: {self.directories}，PSI: {self.psi_scope or '不可用'}")
+
+    def _open(self, key, directory, name, size=4096):
+        control = _ControlFile(os.path.join(directory, name), size)
+        if control.fd is not None:
+            self._files[key] = control
+
+    def _read(self, key):
+        control = self._files.get(key)
+        return control.read() if control else None
+
+    def _memory(self):
+        usage = _parse_int(self._read("memory_usage"))
+        if usage is None:
+            return None
+        limit = _parse_int(self._read("memory_limit"))
+        if limit is None or limit >= V1_UNLIMITED or limit > self.host_memory:
+            limit = None
+        stat = _parse_keyed(self._read("memory_stat"))
+        inactive_file = stat.get("inactive_file" if self.version == 2 else "total_inactive_file", 0)
+        working_set = max(0, usage - inactive_file)
+        total = limit or self.host_memory
+        return {
+            "total": total,
+            "used": working_set,
+            "available": max(0, total - working_set),
+            "percent": round(working_set / total * 100, 1),
+            "usage": usage,
+            "limit": limit
+        }
+
+    def _cpu_limit(self):
+        """配额对应的核数，未设置配额时返回None"""
+        if self.version == 2:
+            # cpu.max 格式为 "配额 周期"，不限制时配额为 max
+            fields = (self._read("cpu_max") or "").split()
+            if len(fields) < 2 or fields[0] == "max":
+                return None
+            return int(fields[0]) / int(fields[1])
+        quota = _parse_int(self._read("cpu_quota"))
+        period = _parse_int(self._read("cpu_period"))
+        if quota is None or quota <= 0 or not period:
+            return None
+        return quota / period
+
+    def _cpu(self):
+        stat = _parse_keyed(self._read("cpu_stat"))
+        if self.version == 2:
+            usage_seconds = stat["usage_usec"] / 1e6 if "usage_usec" in stat else None
+        else:
+            usage = _parse_int(self._read("cpu_usage"))
+            usage_seconds = usage / 1e9 if usage is not None else None
+        if usage_seconds is None:
+            return None
+        limit = self._cpu_limit()
+        cores = min(limit, self.cpu_count) if limit else self.cpu_count
+        now = time.monotonic()
+        periods, throttled = stat.get("nr_periods", 0), stat.get("nr_throttled", 0)
+
+        percent = 0.0
+        throttled_percent = 0.0
+        last = self._last_cpu
+        if last is not None and now > last[0]:
+            percent = max(0.0, usage_seconds - last[1]) / ((now - last[0]) * cores) * 100
+            if periods > last[2]:
+                throttled_percent = (throttled - last[3]) / (periods - last[2]) * 100
+        self._last_cpu = (now, usage_seconds, periods, throttled)
+        return {
+            "percent": round(min(percent, 100.0), 1),
+            "count": cores,
+            "limit_cores": round(limit, 3) if limit else None,
+            "throttled_percent": round(throttled_percent, 1)
+        }
+
+    def _pressure(self):
+        return {
+            resource: parse_pressure(self._read(f"psi_{resource}"))
+            for resource in PSI_RESOURCES
+            if f"psi_{resource}" in self._files
+        }
+
+    def collect(self):
+        """
+        Returns:
+            dict: {"version", "cpu", "memory", "pressure", "psi_scope"}，读取不到的部分为None
+        """
+        return {
+            "version": self.version,
+            "cpu": self._cpu(),
+            "memory": self._memory(),
+            "pressure": self._pressure(),
+            "psi_scope": self.psi_scope
+        }
+
+    def close(self):
+        for control in self._files.values():
+            control.close()
+        self._files = {}
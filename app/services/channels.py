@@ -0,0 +1,304 @@
+import time
+import socket
+import logging
+import importlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.services.templates import message_templates, format_subject
+from app.services.delivery_metrics import delivery_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationChannel:
+    """
+    通知渠道插件接口
+
+    每个渠道有独立的发送线程池（并发数）、超时时间和批量发送约定：
+    - concurrency: 同时进行的发送数量
+    - timeout: 调用方等待单次发送结果的最长时间（秒）
+    - batch_size / batch_wait_ms: 大于1时，在等待时间内到达的通知合并后调用 send_batch 一次发送
+
+    子类实现 send，支持批量接口的渠道再实现 send_batch。
+    """
+
+    default_concurrency = 1
+    default_timeout = 30
+
+    def __init__(self, name, config):
+        self.name = name
+        self.config = config
+        self.concurrency = config.get("concurrency", self.default_concurrency)
+        self.timeout = config.get("timeout", self.default_timeout)
+        self.batch_size = config.get("batch_size", 1)
+        self.batch_wait = config.get("batch_wait_ms", 100) / 1000.0
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix=f"channel-{name}")
+        self._batch = []
+        self._batch_timer = None
+        self._lock = threading.Lock()
+        self.stats = {"sent": 0, "failed": 0, "batches": 0}
+
+    @property
+    def enabled(self):
+        return bool(self.config.get("enabled"))
+
+    def send(self, notification):
+        """
+        发送一条通知
+
+        Args:
+            notification: {"subject", "full_subject", "message", "level", "resource", "timestamp"}
+
+        Returns:
+            bool: 是否发送成功
+        """
+        raise NotImplementedError
+
+    def render_text(self, notification):
+        """
+        生成该渠道使用的主题和内容
+
+        通知带有模板且该渠道定义了专属模板时按专属模板渲染，否则使用通用的主题和内容。
+
+        Returns:
+            (str, str): (带级别前缀的主题, 内容)
+        """
+        template = notification.get("template")
+        if template and message_templates.has_channel_template(template[0], self.name):
+            subject, body = message_templates.render(template[0], template[1], self.name)
+            return format_subject(subject, notification["level"]), body
+        return notification["full_subject"], notification["message"]
+
+    def send_batch(self, notifications):
+        """批量发送通知，返回与输入顺序一致的结果列表；默认逐条发送"""
+        return [self.send(notification) for notification in notifications]
+
+    def submit(self, notification):
+        """
+        提交一条通知，不阻塞调用方
+
+        Returns:
+            Future: 结果为 bool
+        """
+        if self.batch_size <= 1:
+            return self._executor.submit(self._run, [notification])
+
+        future = Future()
+        with self._lock:
+            self._batch.append((notification, future))
+            if len(self._batch) >= self.batch_size:
+                self._flush_batch_locked()
+            elif self._batch_timer is None:
+                self._batch_timer = threading.Timer(self.batch_wait, self.flush)
+                self._batch_timer.daemon = True
+                self._batch_timer.start()
+        return future
+
+    def flush(self):
+        """立即发送当前积攒的批量通知"""
+        with self._lock:
+            self._flush_batch_locked()
+
+    def _flush_batch_locked(self):
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        if not self._batch:
+            return
+        items, self._batch = self._batch, []
+        notifications = [notification for notification, _ in items]
+        futures = [future for _, future in items]
+        self._executor.submit(self._run, notifications).add_done_callback(
+            lambda done: self._resolve(futures, done)
+        )
+
+    @staticmethod
+    def _resolve(futures, done):
+        error = done.exception()
+        for index, future in enumerate(futures):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(done.result()[index])
+
+    def _run(self, notifications):
+        start_time = time.perf_counter()
+        try:
+            if len(notifications) == 1 and self.batch_size <= 1:
+                results = [bool(self.send(notifications[0]))]
+            else:
+                results = [bool(result) for result in self.send_batch(notifications)]
+        except Exception as e:
+            logger.error(f"通知渠道 {self.name} 发送出错: {str(e)}")
+            results = [False] * len(notifications)
+        delivery_metrics.observe("send_seconds", time.perf_counter() - start_time, channel=self.name)
+        with self._lock:
+            self.stats["batches"] += 1
+            self.stats["sent"] += sum(results)
+            self.stats["failed"] += len(results) - sum(results)
+        return results[0] if self.batch_size <= 1 else results
+
+    def close(self):
+        """发送剩余的批量通知并停止发送线程"""
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats.update({
+            "type": type(self).__name__,
+            "enabled": self.enabled,
+            "concurrency": self.concurrency,
+            "timeout": self.timeout,
+            "batch_size": self.batch_size
+        })
+        return stats
+
+
+class EmailChannel(NotificationChannel):
+    """邮件渠道，通过NotificationService的SMTP连接池发送"""
+
+    default_timeout = 120
+
+    def __init__(self, name, config, service):
+        # 默认并发数与SMTP连接池大小一致
+        self.default_concurrency = config.get("pool", {}).get("max_size", 2)
+        super().__init__(name, config)
+        self.service = service
+
+    def send(self, notification):
+        subject, body = self.render_text(notification)
+        template = notification.get("template")
+        subtype = message_templates.get_subtype(template[0], self.name) if template else "plain"
+        return self.service.send_email(subject, body, subtype)
+
+
+class TelegramChannel(NotificationChannel):
+    """Telegram渠道，每条通知内部已并发发送给所有聊天"""
+
+    # 需要覆盖节流排队的最长等待时间
+    default_timeout = 360
+
+    def __init__(self, name, config, service):
+        super().__init__(name, config)
+        self.service = service
+
+    def send(self, notification):
+        return self.service.send_telegram(*self.render_text(notification))
+
+
+class WebhookChannel(NotificationChannel):
+    """
+    通用Webhook渠道
+
+    使用保持连接的HTTP会话，按JSON模板生成请求体；配置 batch_size 后，
+    等待时间内的多条通知合并为一个数组（或 batch_key 指定的字段）一次POST。
+    """
+
+    default_concurrency = 4
+    default_timeout = 10
+
+    DEFAULT_TEMPLATE = {
+        "subject": "{subject}",
+        "message": "{message}",
+        "level": "{level}",
+        "resource": "{resource}",
+        "host": "{host}",
+        "timestamp": "{timestamp}"
+    }
+
+    def __init__(self, name, config):
+        super().__init__(name, config)
+        self.url = config.get("url")
+        self.method = config.get("method", "POST").upper()
+        self.headers = config.get("headers", {})
+        self.template = config.get("template") or self.DEFAULT_TEMPLATE
+        self.batch_key = config.get("batch_key")
+        self.verify_ssl = config.get("verify_ssl", True)
+        self.hostname = socket.gethostname()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def render(self, notification):
+        """按模板生成单条通知的JSON对象，模板中的字符串可以引用通知字段"""
+        values = dict(notification)
+        values["resource"] = values.get("resource") or ""
+        values["host"] = self.hostname
+        values["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(notification["timestamp"]))
+        return self._render_value(self.template, values)
+
+    def _render_value(self, value, values):
+        if isinstance(value, str):
+            return value.format_map(values)
+        if isinstance(value, dict):
+            return {key: self._render_value(item, values) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._render_value(item, values) for item in value]
+        return value
+
+    def _post(self, body, count):
+        if not self.url:
+            logger.error(f"Webhook渠道 {self.name} 未配置URL")
+            return False
+        try:
+            response = self.session.request(
+                self.method, self.url, json=body, headers=self.headers,
+                timeout=self.timeout, verify=self.verify_ssl
+            )
+        except requests.RequestException as e:
+            logger.error(f"Webhook渠道 {self.name} 请求失败: {str(e)}")
+            return False
+        if 200 <= response.status_code < 300:
+            logger.info(f"Webhook渠道 {self.name} 发送成功: {count} 条通知")
+            return True
+        logger.error(f"Webhook渠道 {self.name} 返回错误: HTTP {response.status_code} {response.text[:200]}")
+        return False
+
+    def send(self, notification):
+        return self._post(self.render(notification), 1)
+
+    def send_batch(self, notifications):
+        rendered = [self.render(notification) for notification in notifications]
+        body = {self.batch_key: rendered} if self.batch_key else rendered
+        return [self._post(body, len(rendered))] * len(notifications)
+
+    def close(self):
+        super().close()
+        self.session.close()
+
+
+# 渠道类型注册表，配置中的 type 字段引用这里的名称，或者 "模块路径:类名" 形式的自定义插件
+CHANNEL_TYPES = {
+    "webhook": WebhookChannel
+}
+
+
+def register_channel_type(type_name, channel_class):
+    """注册自定义渠道类型"""
+    CHANNEL_TYPES[type_name] = channel_class
+
+
+def create_channel(name, config):
+    """
+    根据配置创建渠道
+
+    Args:
+        name: 渠道名称
+        config: 渠道配置，type 为已注册的类型名或 "模块路径:类名"
+    """
+    type_name = config.get("type", name)
+    channel_class = CHANNEL_TYPES.get(type_name)
+    if channel_class is None and ":" in type_name:
+        module_name, class_name = type_name.split(":", 1)
+        channel_class = getattr(importlib.import_module(module_name), class_name)
+    if channel_class is None:
+        raise ValueError(f"未知的通知渠道类型: {type_name}")
+    return channel_class(name, config)
@@ -4,7 +4,8 @@ import time
 from datetime import datetime
 
 from app.config.settings import CONFIG
-from app.services.notifier import notifier
+from app.services.notification_queue import notification_queue
+from app.services.templates import message_templates
 
 logger = logging.getLogger(__name__)
 
@@ -15,8 +16,6 @@ class DatabaseMonitor:
         self.db_config = CONFIG["database"]
         self.last_status = None  # 上次检查的状态
         self.last_check_time = None  # 上次检查的时间
-        self.last_notification_time = None  # 上次通知的时间
-        self.notification_cooldown = 1800  # 通知冷却时间（秒），避免频繁发送
     
     def get_db_connection(self):
         """获取数据库连接"""
@@ -75,56 +74,41 @@ class DatabaseMonitor:
             return False, "无法建立数据库连接"
     
     def _send_error_notification(self, error_details):
-        """发送数据库错误通知"""
-        # 检查是否在冷却期内
-        if self.last_notification_time:
-            time_since_last = (datetime.now() - self.last_notification_time).total_seconds()
-            if time_since_last < self.notification_cooldown:
-                logger.info(f"数据库错误通知处于冷却期内，跳过发送 (剩余 {self.notification_cooldown - time_since_last:.0f}秒)")
-                return
+        """发送数据库错误通知，持续异常时由告警去重按重发策略抑制重复通知"""
+        values = self._template_values(details=error_details)
+        subject, message = message_templates.render("database_down", values)
         
-        subject = "数据库连接异常"
-        message = f"""
-数据库连接出现问题，请检查数据库服务是否正常运行。
-
-数据库信息:
-- 主机: {self.db_config['host']}
-- 端口: {self.db_config['port']}
-- 数据库: {self.db_config['dbname']}
-
-错误详情: {error_details}
-
-发生时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-        """
-        
-        success = notifier.send_notification(subject, message, "error")
-        if success:
-            logger.info("数据库错误通知已发送")
-        else:
-            logger.warning("数据库错误通知发送失败")
-        
-        self.last_notification_time = datetime.now()
+        handle = notification_queue.enqueue(subject, message, "error", resource="database",
+                                            source="database", state="down", template=("database_down", values))
+        handle.add_done_callback(lambda h: self._log_delivery(h, "数据库错误通知"))
     
     def _send_recovery_notification(self, response_time):
         """发送数据库恢复通知"""
-        subject = "数据库连接已恢复"
-        message = f"""
-数据库连接已恢复正常。
+        values = self._template_values(response_time=response_time)
+        subject, message = message_templates.render("database_recovered", values)
+        
+        handle = notification_queue.enqueue(subject, message, "info", resource="database",
+                                            source="database", state="up", template=("database_recovered", values))
+        handle.add_done_callback(lambda h: self._log_delivery(h, "数据库恢复通知"))
 
-数据库信息:
-- 主机: {self.db_config['host']}
-- 端口: {self.db_config['port']}
-- 数据库: {self.db_config['dbname']}
+    def _template_values(self, **values):
+        """数据库通知模板的公共字段"""
+        values.update({
+            "host": self.db_config['host'],
+            "port": self.db_config['port'],
+            "dbname": self.db_config['dbname'],
+            "time": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        })
+        return values
 
-响应时间: {response_time:.2f}秒
-恢复时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-        """
-        
-        success = notifier.send_notification(subject, message, "info")
-        if success:
-            logger.info("数据库恢复通知已发送")
+    def _log_delivery(self, handle, name):
+        """记录通知投递结果"""
+        if handle.status == "suppressed":
+            logger.info(f"{name}与之前的告警重复，已抑制")
+        elif handle.result:
+            logger.info(f"{name}已发送")
         else:
-            logger.warning("数据库恢复通知发送失败")
+            logger.warning(f"{name}发送失败")
 
 
 # 创建数据库监控实例
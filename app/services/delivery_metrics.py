@@ -0,0 +1,213 @@
+import logging
+import threading
+
+from prometheus_client import CollectorRegistry, Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+# 延迟直方图的默认分桶上界（秒），覆盖从本地SMTP的毫秒级到Telegram限流排队的分钟级
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# 计数器：名称 -> (说明, 标签)
+COUNTERS = {
+    "deliveries_total": ("各渠道的通知投递结果", ("channel", "result")),
+    "timeouts_total": ("等待渠道结果超时的通知数", ("channel",)),
+    "digested_total": ("进入告警汇总窗口的通知数", ("channel",)),
+    "retries_total": ("发件箱重新投递的次数", ("channel",)),
+    "recipient_deliveries_total": ("各收件人（邮箱或聊天ID）的投递结果", ("channel", "recipient", "result")),
+    "recipient_retries_total": ("各收件人的重试次数", ("channel", "recipient")),
+    "recipient_rate_limited_total": ("各收件人收到429限流的次数", ("channel", "recipient"))
+}
+
+# 耗时直方图：名称 -> (说明, 标签)
+HISTOGRAMS = {
+    "delivery_seconds": ("从通知产生到渠道返回结果的端到端耗时", ("channel",)),
+    "send_seconds": ("渠道单次发送耗时", ("channel",)),
+    "recipient_send_seconds": ("单个收件人的发送耗时（含重试和限流排队）", ("channel", "recipient")),
+    "smtp_connect_seconds": ("SMTP建立连接和登录耗时", ("channel",)),
+    "smtp_send_seconds": ("SMTP发送单封邮件耗时", ("channel",)),
+    "telegram_request_seconds": ("单次Bot API请求耗时", ("channel",))
+}
+
+# 瞬时值：名称 -> 说明，由 set_gauge_provider 注册的函数在每次导出时提供
+GAUGES = {
+    "queue_depth": "通知队列中等待投递的数量",
+    "queue_in_flight": "正在投递的通知数",
+    "queue_oldest_age_seconds": "队列中最早通知的等待时间",
+    "outbox_pending": "发件箱中待投递的通知数",
+    "outbox_dead": "发件箱中放弃重试的通知数",
+    "outbox_oldest_pending_age_seconds": "发件箱中最早待投递通知的等待时间"
+}
+
+
+def _quantile(bounds, cumulative, count, q, maximum):
+    """按累计分桶计数估算分位数，桶内线性插值，+Inf桶以观测到的最大值为上界"""
+    rank = q * count
+    previous = 0
+    for index, total in enumerate(cumulative):
+        bucket_count = total - previous
+        if total >= rank and bucket_count:
+            lower = bounds[index - 1] if index > 0 else 0.0
+            upper = bounds[index] if index < len(bounds) - 1 else maximum
+            return min(lower + (upper - lower) * (rank - previous) / bucket_count, maximum)
+        previous = total
+    return maximum
+
+
+class _GaugeCollector:
+    """导出时才读取的瞬时值，值为None的不导出"""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.provider = None
+
+    def collect(self):
+        values = {}
+        if self.provider is not None:
+            try:
+                values = self.provider() or {}
+            except Exception as e:
+                logger.error(f"读取通知队列指标失败: {str(e)}")
+        for name, value in sorted(values.items()):
+            if value is None:
+                continue
+            gauge = GaugeMetricFamily(f"{self.prefix}{name}", GAUGES.get(name, name))
+            gauge.add_metric([], value)
+            yield gauge
+
+
+class DeliveryMetrics:
+    """
+    通知投递指标
+
+    计数器和直方图使用 prometheus_client，注册在独立的 CollectorRegistry 中，不混入进程默认注册表。
+    标签通常是 channel 和 recipient。通过 get_stats 以JSON形式汇总，/metrics 用 generate_latest(registry) 导出。
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix="monitor_notification_"):
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._gauges = _GaugeCollector(prefix)
+        self._create_metrics()
+
+    def _create_metrics(self):
+        self.registry = CollectorRegistry(auto_describe=True)
+        self._counters = {
+            name: Counter(f"{self.prefix}{name}", help_text, labels, registry=self.registry)
+            for name, (help_text, labels) in COUNTERS.items()
+        }
+        self._histograms = {
+            name: Histogram(f"{self.prefix}{name}", help_text, labels, registry=self.registry, buckets=self.buckets)
+            for name, (help_text, labels) in HISTOGRAMS.items()
+        }
+        self._max = {}  # {(指标名, 标签): 最大耗时}，prometheus直方图不记录最大值
+        self.registry.register(self._gauges)
+
+    def set_gauge_provider(self, provider):
+        """注册导出时调用的函数 provider() -> {瞬时值名称: 值}，如 {"queue_depth": 3}"""
+        self._gauges.provider = provider
+
+    def inc(self, name, value=1, **labels):
+        """计数器加一（或指定值）"""
+        self._counters[name].labels(**labels).inc(value)
+
+    def observe(self, name, seconds, **labels):
+        """记录一次耗时"""
+        self._histograms[name].labels(**labels).observe(seconds)
+        key = (name, tuple(sorted((key, str(value)) for key, value in labels.items())))
+        with self._lock:
+            if seconds > self._max.get(key, 0.0):
+                self._max[key] = seconds
+
+    def record_result(self, channel, ok, recipient=None):
+        """记录一次投递结果"""
+        result = "success" if ok else "failure"
+        if recipient is None:
+            self.inc("deliveries_total", channel=channel, result=result)
+        else:
+            self.inc("recipient_deliveries_total", channel=channel, recipient=recipient, result=result)
+
+    def reset(self):
+        with self._lock:
+            self._create_metrics()
+
+    def _histogram_snapshots(self):
+        """从注册表读取各直方图，返回 {(指标名, 标签): 摘要}"""
+        raw = {}
+        for name, histogram in self._histograms.items():
+            for metric in histogram.collect():
+                for sample in metric.samples:
+                    labels = {key: value for key, value in sample.labels.items() if key != "le"}
+                    entry = raw.setdefault((name, tuple(sorted(labels.items()))), {"buckets": []})
+                    if sample.name.endswith("_bucket"):
+                        entry["buckets"].append((float(sample.labels["le"]), sample.value))
+                    elif sample.name.endswith("_sum"):
+                        entry["sum"] = sample.value
+                    elif sample.name.endswith("_count"):
+                        entry["count"] = sample.value
+
+        with self._lock:
+            maxima = dict(self._max)
+        snapshots = {}
+        for key, entry in raw.items():
+            count = int(entry.get("count", 0))
+            maximum = maxima.get(key, 0.0)
+            buckets = sorted(entry["buckets"])
+            bounds = [bound for bound, _ in buckets]
+            cumulative = [total for _, total in buckets]
+
+            def quantile(q):
+                return round(_quantile(bounds, cumulative, count, q, maximum), 4) if count else None
+
+            snapshots[key] = {
+                "count": count,
+                "avg": round(entry.get("sum", 0.0) / count, 4) if count else None,
+                "p50": quantile(0.5),
+                "p90": quantile(0.9),
+                "p99": quantile(0.99),
+                "max": round(maximum, 4)
+            }
+        return snapshots
+
+    def get_stats(self):
+        """
+        按渠道和收件人汇总指标
+
+        Returns:
+            dict: {"channels": {渠道: {...}}, "recipients": {渠道: {收件人: {...}}}}
+        """
+        channels = {}
+        recipients = {}
+
+        def target(labels):
+            labels = dict(labels)
+            channel = labels.get("channel", "")
+            if "recipient" in labels:
+                return recipients.setdefault(channel, {}).setdefault(labels["recipient"], {})
+            return channels.setdefault(channel, {})
+
+        for name, counter in self._counters.items():
+            for metric in counter.collect():
+                for sample in metric.samples:
+                    if not sample.name.endswith("_total"):
+                        continue  # 跳过 _created
+                    entry = target(sample.labels)
+                    value = int(sample.value)
+                    result = sample.labels.get("result")
+                    if result:
+                        entry[result] = entry.get(result, 0) + value
+                    else:
+                        entry[name.replace("recipient_", "").replace("_total", "")] = value
+        for (name, labels), snapshot in self._histogram_snapshots().items():
+            target(labels)[name.replace("recipient_", "")] = snapshot
+
+        for entry in list(channels.values()) + [item for group in recipients.values() for item in group.values()]:
+            total = entry.get("success", 0) + entry.get("failure", 0)
+            entry["failure_rate"] = round(entry.get("failure", 0) / total, 4) if total else None
+        return {"channels": channels, "recipients": recipients}
+
+
+# 创建投递指标实例
+delivery_metrics = DeliveryMetrics()
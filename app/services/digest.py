@@ -0,0 +1,146 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 通知级别由低到高
+LEVEL_ORDER = ["info", "warning", "error", "critical"]
+
+
+class DigestBuffer:
+    """
+    单个通知渠道的告警汇总缓冲区
+
+    时间窗口内的第一条通知开始计时，窗口结束时把期间收到的通知合并成一条汇总消息发送，
+    共享依赖故障时每次事件只发送一条消息，而不是每个端点各发一条。
+    窗口内只有一条通知时按原样发送。
+    """
+
+    def __init__(self, channel, window_seconds, deliver, max_details=50, on_flushed=None):
+        """
+        Args:
+            channel: 渠道名称 (email, telegram)
+            window_seconds: 汇总窗口长度（秒）
+            deliver: 发送函数 deliver(subject, message, level) -> bool
+            max_details: 汇总消息中最多列出的通知明细条数
+            on_flushed: 汇总发送后的回调 on_flushed(channel, outbox_ids, success)，outbox_ids为窗口内通知的发件箱记录ID
+        """
+        self.channel = channel
+        self.window_seconds = window_seconds
+        self.deliver = deliver
+        self.max_details = max_details
+        self.on_flushed = on_flushed
+        self._items = []
+        self._window_started = None
+        self._timer = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "buffered": 0,
+            "digests_sent": 0,
+            "digests_failed": 0,
+            "messages_saved": 0
+        }
+
+    def add(self, subject, message, level="info", resource=None, outbox_id=None):
+        """将通知加入当前窗口，窗口未开始时启动计时"""
+        with self._lock:
+            self._items.append({
+                "subject": subject,
+                "message": message,
+                "level": level,
+                "resource": resource,
+                "outbox_id": outbox_id,
+                "time": time.time()
+            })
+            self.stats["buffered"] += 1
+            if self._timer is None:
+                self._window_started = time.time()
+                self._timer = threading.Timer(self.window_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """
+        立即发送当前窗口内的通知
+
+        Returns:
+            bool: 发送是否成功；窗口为空时返回True
+        """
+        with self._lock:
+            items, self._items = self._items, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            window_started = self._window_started
+
+        if not items:
+            return True
+        if len(items) == 1:
+            item = items[0]
+            success = self.deliver(item["subject"], item["message"], item["level"])
+            self._flushed(items, success)
+            return success
+
+        subject, message, level = self._build_digest(items, window_started)
+        success = self.deliver(subject, message, level)
+        self._flushed(items, success)
+        with self._lock:
+            self.stats["digests_sent" if success else "digests_failed"] += 1
+            if success:
+                self.stats["messages_saved"] += len(items) - 1
+        if success:
+            logger.info(f"{self.channel}告警汇总已发送，合并 {len(items)} 条通知")
+        else:
+            logger.error(f"{self.channel}告警汇总发送失败，涉及 {len(items)} 条通知")
+        return success
+
+    def _flushed(self, items, success):
+        """通知调用方窗口内各通知的发送结果，由调用方更新发件箱"""
+        outbox_ids = [item["outbox_id"] for item in items if item["outbox_id"] is not None]
+        if self.on_flushed is None or not outbox_ids:
+            return
+        try:
+            self.on_flushed(self.channel, outbox_ids, success)
+        except Exception as e:
+            logger.error(f"{self.channel}告警汇总结果回调执行失败: {str(e)}")
+
+    def _build_digest(self, items, window_started):
+        """生成汇总消息，返回 (主题, 内容, 最高级别)"""
+        counts = {}
+        for item in items:
+            counts[item["level"]] = counts.get(item["level"], 0) + 1
+        # 去重并保持首次出现的顺序
+        resources = list(dict.fromkeys(item["resource"] for item in items if item["resource"]))
+
+        # 按级别从高到低排列，汇总消息使用最高级别
+        levels = sorted(counts, key=lambda name: LEVEL_ORDER.index(name) if name in LEVEL_ORDER else 0, reverse=True)
+        level = levels[0]
+        level_summary = ", ".join(f"{name} {counts[name]}" for name in levels)
+
+        lines = [
+            f"时间窗口: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(window_started))}"
+            f" - {time.strftime('%H:%M:%S')}",
+            f"通知数量: {len(items)} ({level_summary})"
+        ]
+        if resources:
+            lines.append(f"受影响对象 ({len(resources)}): {', '.join(resources)}")
+        lines.append("")
+        lines.append("明细:")
+        for item in items[:self.max_details]:
+            lines.append(f"- [{time.strftime('%H:%M:%S', time.localtime(item['time']))}] [{item['level']}] {item['subject']}")
+        if len(items) > self.max_details:
+            lines.append(f"... 另有 {len(items) - self.max_details} 条通知")
+
+        subject = f"告警汇总: {len(items)} 条通知"
+        if resources:
+            subject += f"，涉及 {len(resources)} 个对象"
+        return subject, "\n".join(lines), level
+
+    def get_stats(self):
+        """获取汇总统计"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["pending"] = len(self._items)
+        stats["window_seconds"] = self.window_seconds
+        return stats
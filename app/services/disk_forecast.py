@@ -0,0 +1,129 @@
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 成对斜率使用numpy一次向量化计算；未安装时退化为逐对计算（O(n²)），并减少参与计算的点数
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+    logger.warning("无法导入numpy模块，磁盘写满预测将逐对计算斜率并减少采样点，精度和性能下降，请安装requirements.txt中的numpy")
+
+# 未安装numpy时最多使用的点数，控制逐对计算的开销（80个点约3000对）
+FALLBACK_MAX_POINTS = 80
+
+
+def _thin(timestamps, values, max_points):
+    """点数超过 max_points 时等间隔抽取，控制成对斜率的计算量（O(n²)）"""
+    count = len(timestamps)
+    if count <= max_points:
+        return list(timestamps), list(values)
+    step = count / max_points
+    indices = [int(index * step) for index in range(max_points - 1)] + [count - 1]
+    return [timestamps[index] for index in indices], [values[index] for index in indices]
+
+
+def _median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def theil_sen(timestamps, values, max_points=240):
+    """
+    Theil-Sen 稳健线性回归
+
+    斜率取所有点对斜率的中位数，截距取 y - 斜率·x 的中位数。少于约29%的异常点（如临时文件的尖峰、
+    日志轮转瞬间的回落）不会明显影响斜率，不像最小二乘会被单个尖峰拉偏。
+
+    Args:
+        timestamps: 时间戳序列（秒）
+        values: 对应的数值
+        max_points: 参与计算的最多点数
+
+    Returns:
+        (float, float): (每秒斜率, 截距)，点数不足2或时间跨度为0时返回None
+    """
+    xs, ys = _thin(timestamps, values, max_points if NUMPY_AVAILABLE else min(max_points, FALLBACK_MAX_POINTS))
+    if len(xs) < 2:
+        return None
+    # 以首个时间戳为原点，避免Unix时间戳与斜率相乘时损失精度
+    origin = xs[0]
+    if NUMPY_AVAILABLE:
+        x = np.asarray(xs, dtype=float) - origin
+        y = np.asarray(ys, dtype=float)
+        upper = np.triu_indices(len(x), k=1)
+        dx = np.subtract.outer(x, x)[upper]
+        dy = np.subtract.outer(y, y)[upper]
+        valid = dx != 0
+        if not valid.any():
+            return None
+        slope = float(np.median(dy[valid] / dx[valid]))
+        intercept = float(np.median(y - slope * x))
+        return slope, intercept
+    x = [value - origin for value in xs]
+    slopes = [
+        (ys[j] - ys[i]) / (x[j] - x[i])
+        for i in range(len(x)) for j in range(i + 1, len(x))
+        if x[j] != x[i]
+    ]
+    if not slopes:
+        return None
+    slope = _median(slopes)
+    return slope, _median([yi - slope * xi for xi, yi in zip(x, ys)])
+
+
+def format_duration(seconds):
+    """把秒数格式化为通知中使用的可读时长"""
+    if seconds < 3600:
+        return f"{max(1, math.ceil(seconds / 60))} 分钟"
+    if seconds < 48 * 3600:
+        return f"{seconds / 3600:.1f} 小时"
+    return f"{seconds / 86400:.1f} 天"
+
+
+class DiskForecaster:
+    """
+    磁盘写满时间预测
+
+    对挂载点最近 window_seconds 内的已用空间历史做稳健回归得到增长速率，
+    用当前剩余空间 / 增长速率 估计写满时间。点数或时间跨度不足时不预测。
+    """
+
+    def __init__(self, window_seconds=6 * 3600, min_points=12, min_span_seconds=1800, max_points=240):
+        self.window_seconds = window_seconds
+        self.min_points = min_points
+        self.min_span_seconds = min_span_seconds
+        self.max_points = max_points
+
+    def forecast(self, timestamps, used_values, free_bytes):
+        """
+        Args:
+            timestamps: 已用空间历史的时间戳
+            used_values: 已用空间（字节）
+            free_bytes: 当前剩余空间（字节）
+
+        Returns:
+            dict: {"fill_rate_bytes_per_hour", "time_to_full_seconds", "points", "span_seconds"}，数据不足时返回None；
+                  空间不增长时 time_to_full_seconds 为None
+        """
+        if len(timestamps) < self.min_points:
+            return None
+        span = timestamps[-1] - timestamps[0]
+        if span < self.min_span_seconds:
+            return None
+        fit = theil_sen(timestamps, used_values, self.max_points)
+        if fit is None:
+            return None
+        slope = fit[0]
+        return {
+            "fill_rate_bytes_per_hour": round(slope * 3600, 1),
+            "time_to_full_seconds": round(free_bytes / slope, 1) if slope > 0 else None,
+            "points": len(timestamps),
+            "span_seconds": round(span, 1)
+        }
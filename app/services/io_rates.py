@@ -0,0 +1,191 @@
+import os
+import time
+import fnmatch
+import logging
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# 默认不监控的设备：loop、内存盘、光驱，以及回环和容器的veth网卡
+DEFAULT_DISK_EXCLUDE = ["loop*", "ram*", "zram*", "sr*", "fd*"]
+DEFAULT_NIC_EXCLUDE = ["lo", "veth*", "ifb*"]
+
+DISK_FIELDS = ("read_count", "write_count", "read_bytes", "write_bytes", "busy_time")
+NIC_FIELDS = ("bytes_sent", "bytes_recv", "packets_sent", "packets_recv", "errin", "errout", "dropin", "dropout")
+
+WRAP_32 = 2 ** 32
+
+SYS_CLASS_BLOCK = "/sys/class/block"
+
+
+def is_partition(name, sys_block=SYS_CLASS_BLOCK):
+    """
+    设备是否为分区（sda1、nvme0n1p1）
+
+    disk_io_counters(perdisk=True) 同时返回整块磁盘和它的分区，分区的I/O已经计入所在磁盘。
+    Linux上分区在sysfs中有 partition 文件；没有sysfs的平台不判断，视为整块磁盘。
+    """
+    # /proc/diskstats 中的 "/"（如 cciss/c0d0）在sysfs中写作 "!"
+    return os.path.exists(os.path.join(sys_block, name.replace("/", "!"), "partition"))
+
+
+def counter_delta(previous, current):
+    """
+    两次读数之间的计数器增量
+
+    计数器减小有两种情况：32位计数器回绕（部分网卡驱动和32位内核），或设备重新加载、热插拔后计数器清零。
+    上次读数在 [2^31, 2^32) 范围内时按32位回绕计算，否则视为清零，增量取当前读数（清零后累计的部分）。
+    """
+    if current >= previous:
+        return current - previous
+    if WRAP_32 // 2 <= previous < WRAP_32:
+        return WRAP_32 - previous + current
+    return current
+
+
+class CounterRates:
+    """
+    按设备把累计计数器换算为每秒速率
+
+    保存每个设备上次的读数和读取时间，每次更新计算增量 / 经过的时间。设备首次出现时只记录读数，
+    下一次更新才有速率；消失的设备从缓存中删除，重新出现时重新开始。
+    """
+
+    def __init__(self, fields, include=None, exclude=None, skip=None):
+        """
+        Args:
+            fields: 计数器字段
+            include: 只统计匹配的设备名（通配符），为空表示不限制
+            exclude: 不统计匹配的设备名
+            skip: 额外的过滤函数 skip(name) -> bool，返回True的设备不统计
+        """
+        self.fields = fields
+        self.include = list(include or [])
+        self.exclude = list(exclude or [])
+        self.skip = skip
+        self._previous = {}  # {设备: (读取时间, 读数元组)}
+        self._keep = {}  # 设备名过滤结果缓存
+
+    def _kept(self, name):
+        keep = self._keep.get(name)
+        if keep is None:
+            keep = (not self.include or any(fnmatch.fnmatchcase(name, pattern) for pattern in self.include)) \
+                and not any(fnmatch.fnmatchcase(name, pattern) for pattern in self.exclude) \
+                and not (self.skip and self.skip(name))
+            self._keep[name] = keep
+        return keep
+
+    def update(self, counters, timestamp=None):
+        """
+        Args:
+            counters: {设备名: psutil计数器namedtuple}
+            timestamp: 读取时间（time.monotonic），默认当前时间
+
+        Returns:
+            dict: {设备名: ({字段: 每秒增量}, 经过的秒数)}，只包含有上次读数的设备
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        previous = self._previous
+        current = {}
+        rates = {}
+        for name, counter in counters.items():
+            if not self._kept(name):
+                continue
+            values = tuple(getattr(counter, field, 0) for field in self.fields)
+            current[name] = (timestamp, values)
+            last = previous.get(name)
+            if last is None:
+                continue
+            elapsed = timestamp - last[0]
+            if elapsed <= 0:
+                continue
+            rates[name] = (
+                {field: counter_delta(old, new) / elapsed for field, old, new in zip(self.fields, last[1], values)},
+                elapsed
+            )
+        self._previous = current
+        return rates
+
+
+class IORateCollector:
+    """
+    磁盘I/O和网卡流量速率采集
+
+    每次采集读取一次 psutil.disk_io_counters(perdisk=True) 和 net_io_counters(pernic=True)，
+    计数器回绕由 counter_delta 处理（关闭psutil自带的nowrap，避免把设备清零误当作回绕累加）。
+    默认只统计整块磁盘，分区的I/O已经包含在所在磁盘中，否则一块繁忙的磁盘会按分区重复告警。
+    网卡带宽使用率按 net_if_stats 报告的链路速率计算，速率未知（虚拟网卡）时不计算。
+    """
+
+    def __init__(self, disk_include=None, disk_exclude=None, nic_include=None, nic_exclude=None,
+                 include_partitions=False):
+        self.disks = CounterRates(
+            DISK_FIELDS, disk_include, DEFAULT_DISK_EXCLUDE if disk_exclude is None else disk_exclude,
+            skip=None if include_partitions else is_partition
+        )
+        self.nics = CounterRates(
+            NIC_FIELDS, nic_include, DEFAULT_NIC_EXCLUDE if nic_exclude is None else nic_exclude
+        )
+        self._nic_speeds = {}  # {网卡: 链路速率(Mbit/s)}，网卡列表变化时刷新
+
+    def _speeds(self, names):
+        if set(names) != set(self._nic_speeds):
+            try:
+                stats = psutil.net_if_stats()
+            except OSError as e:
+                logger.warning(f"获取网卡链路速率失败: {str(e)}")
+                stats = {}
+            self._nic_speeds = {name: stats[name].speed if name in stats else 0 for name in names}
+        return self._nic_speeds
+
+    def collect_disks(self):
+        """
+        Returns:
+            dict: {设备: {"read_bytes_per_sec", "write_bytes_per_sec", "read_iops", "write_iops", "busy_percent"}}
+        """
+        try:
+            counters = psutil.disk_io_counters(perdisk=True, nowrap=False) or {}
+        except (OSError, RuntimeError) as e:
+            logger.warning(f"读取磁盘I/O计数器失败: {str(e)}")
+            return {}
+        result = {}
+        for name, (rates, _) in self.disks.update(counters).items():
+            result[name] = {
+                "read_bytes_per_sec": round(rates["read_bytes"], 1),
+                "write_bytes_per_sec": round(rates["write_bytes"], 1),
+                "read_iops": round(rates["read_count"], 2),
+                "write_iops": round(rates["write_count"], 2),
+                # busy_time 为设备处理I/O的累计毫秒数，每秒增量 / 1000 即设备繁忙时间占比
+                "busy_percent": round(min(rates["busy_time"] / 10.0, 100.0), 1)
+            }
+        return result
+
+    def collect_network(self):
+        """
+        Returns:
+            dict: {网卡: {"sent_bytes_per_sec", "recv_bytes_per_sec", "sent_packets_per_sec", "recv_packets_per_sec",
+                         "errors_per_sec", "drops_per_sec", "util_percent"}}
+        """
+        try:
+            counters = psutil.net_io_counters(pernic=True, nowrap=False) or {}
+        except OSError as e:
+            logger.warning(f"读取网卡计数器失败: {str(e)}")
+            return {}
+        rates_by_nic = self.nics.update(counters)
+        speeds = self._speeds(list(rates_by_nic))
+        result = {}
+        for name, (rates, _) in rates_by_nic.items():
+            speed = speeds.get(name) or 0
+            peak = max(rates["bytes_sent"], rates["bytes_recv"])
+            result[name] = {
+                "sent_bytes_per_sec": round(rates["bytes_sent"], 1),
+                "recv_bytes_per_sec": round(rates["bytes_recv"], 1),
+                "sent_packets_per_sec": round(rates["packets_sent"], 2),
+                "recv_packets_per_sec": round(rates["packets_recv"], 2),
+                "errors_per_sec": round(rates["errin"] + rates["errout"], 3),
+                "drops_per_sec": round(rates["dropin"] + rates["dropout"], 3),
+                # 全双工链路按收发中较大的一个方向计算使用率
+                "util_percent": round(peak * 8 / (speed * 1000000) * 100, 1) if speed > 0 else None
+            }
+        return result
@@ -0,0 +1,228 @@
+import os
+import time
+import select
+import fnmatch
+import logging
+import threading
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+MOUNTINFO_PATH = "/proc/self/mountinfo"
+
+# 默认排除的文件系统类型：内核伪文件系统、内存文件系统、容器层和只读镜像（snap）
+DEFAULT_EXCLUDE_FSTYPES = [
+    "proc", "sysfs", "devtmpfs", "devpts", "tmpfs", "ramfs", "cgroup", "cgroup2", "nsfs", "mqueue",
+    "debugfs", "tracefs", "securityfs", "pstore", "bpf", "autofs", "hugetlbfs", "configfs", "fusectl",
+    "binfmt_misc", "rpc_pipefs", "efivarfs", "selinuxfs", "overlay", "squashfs", "iso9660",
+    "fuse.lxcfs", "fuse.snapfuse", "fuse.gvfsd-fuse", "fuse.portal", "nfsd"
+]
+
+# 默认排除的挂载点：容器运行时和kubelet的大量绑定挂载
+DEFAULT_EXCLUDE_PATHS = [
+    "/proc/*", "/sys/*", "/dev/*", "/run/*", "/snap/*",
+    "/var/lib/docker/*", "/var/lib/containers/*", "/var/lib/kubelet/*", "/run/containerd/*"
+]
+
+
+def _unescape(path):
+    """mountinfo 中空格、制表符等字符以八进制转义（如 \\040）"""
+    if "\\" not in path:
+        return path
+    return path.encode("latin-1").decode("unicode_escape").encode("latin-1").decode("utf-8", "replace")
+
+
+def parse_mountinfo(text):
+    """
+    解析 /proc/self/mountinfo
+
+    Returns:
+        list: [{"device", "mountpoint", "fstype", "dev_id"}]
+    """
+    mounts = []
+    for line in text.splitlines():
+        fields = line.split()
+        try:
+            separator = fields.index("-", 6)
+        except ValueError:
+            continue
+        mounts.append({
+            "device": _unescape(fields[separator + 2]) if len(fields) > separator + 2 else "none",
+            "mountpoint": _unescape(fields[4]),
+            "fstype": fields[separator + 1],
+            "dev_id": fields[2]
+        })
+    return mounts
+
+
+class MountTable:
+    """
+    缓存的磁盘分区列表
+
+    Linux上保持 /proc/self/mountinfo 打开，通过poll检测挂载变化（内核在挂载表变化时置位POLLPRI），
+    只在变化时重新解析；其他平台按 refresh_seconds 定期调用 psutil.disk_partitions 刷新。
+    刷新时按文件系统类型和挂载点过滤，同一设备的多个绑定挂载只保留一个，
+    采集时对保留的挂载点各调用一次statvfs。
+    """
+
+    def __init__(self, include_fstypes=None, exclude_fstypes=None, include_paths=None, exclude_paths=None,
+                 refresh_seconds=60, mountinfo_path=MOUNTINFO_PATH):
+        self.include_fstypes = set(include_fstypes or [])
+        self.exclude_fstypes = set(DEFAULT_EXCLUDE_FSTYPES if exclude_fstypes is None else exclude_fstypes)
+        self.include_paths = list(include_paths or [])
+        self.exclude_paths = list(DEFAULT_EXCLUDE_PATHS if exclude_paths is None else exclude_paths)
+        self.refresh_seconds = refresh_seconds
+        self.mountinfo_path = mountinfo_path
+        self._fd = None
+        self._poller = None
+        self._mounts = None
+        self._refreshed_at = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            "refreshes": 0,
+            "mounts_total": 0,
+            "mounts_monitored": 0,
+            "last_refresh_seconds": None,
+            "last_collect_seconds": None
+        }
+        self._open_mountinfo()
+
+    def _open_mountinfo(self):
+        if not hasattr(select, "poll") or not os.path.exists(self.mountinfo_path):
+            logger.info(f"挂载表变化检测不可用，每 {self.refresh_seconds} 秒刷新一次磁盘分区列表")
+            return
+        try:
+            self._fd = os.open(self.mountinfo_path, os.O_RDONLY)
+            self._poller = select.poll()
+            self._poller.register(self._fd, select.POLLPRI | select.POLLERR)
+        except OSError as e:
+            logger.warning(f"打开 {self.mountinfo_path} 失败: {str(e)}，改为定期刷新磁盘分区列表")
+            self.close()
+
+    def _read_mountinfo(self):
+        chunks = []
+        offset = 0
+        while True:
+            chunk = os.pread(self._fd, 65536, offset)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            offset += len(chunk)
+        return b"".join(chunks).decode("utf-8", "replace")
+
+    def _needs_refresh(self):
+        if self._mounts is None:
+            return True
+        if self._poller is not None:
+            return bool(self._poller.poll(0))
+        return time.time() - self._refreshed_at >= self.refresh_seconds
+
+    def _matches(self, patterns, path):
+        return any(fnmatch.fnmatchcase(path, pattern) or path == pattern.rstrip("/*") for pattern in patterns)
+
+    def _keep(self, mount):
+        fstype, path = mount["fstype"], mount["mountpoint"]
+        if self.include_fstypes and fstype not in self.include_fstypes:
+            return False
+        if fstype in self.exclude_fstypes:
+            return False
+        if self.include_paths and not self._matches(self.include_paths, path):
+            return False
+        # 挂载点本身在排除列表中时只排除其下的子挂载，如 /dev/* 不排除 /dev
+        if any(fnmatch.fnmatchcase(path, pattern) for pattern in self.exclude_paths):
+            return False
+        return True
+
+    def refresh(self):
+        """重新读取挂载表并过滤"""
+        start_time = time.perf_counter()
+        if self._fd is not None:
+            mounts = parse_mountinfo(self._read_mountinfo())
+        else:
+            mounts = [
+                {"device": part.device, "mountpoint": part.mountpoint, "fstype": part.fstype, "dev_id": part.device}
+                for part in psutil.disk_partitions(all=True)
+            ]
+
+        kept = []
+        seen_devices = set()
+        # 按挂载点长度排序，同一设备的多个挂载保留路径最短的一个
+        for mount in sorted(mounts, key=lambda item: len(item["mountpoint"])):
+            if not self._keep(mount) or mount["dev_id"] in seen_devices:
+                continue
+            seen_devices.add(mount["dev_id"])
+            kept.append(mount)
+        kept.sort(key=lambda item: item["mountpoint"])
+
+        self._mounts = kept
+        self._refreshed_at = time.time()
+        elapsed = time.perf_counter() - start_time
+        self.stats.update({
+            "refreshes": self.stats["refreshes"] + 1,
+            "mounts_total": len(mounts),
+            "mounts_monitored": len(kept),
+            "last_refresh_seconds": round(elapsed, 6)
+        })
+        logger.info(f"磁盘分区列表已刷新: 共 {len(mounts)} 个挂载点，监控 {len(kept)} 个")
+        return kept
+
+    def mounts(self):
+        """当前监控的挂载点，挂载表变化时自动刷新"""
+        with self._lock:
+            if self._needs_refresh():
+                self.refresh()
+            return self._mounts
+
+    def collect(self):
+        """
+        采集各挂载点的使用情况，每个挂载点一次statvfs
+
+        Returns:
+            list: [{"device", "mountpoint", "fstype", "total", "used", "free", "percent"}]
+        """
+        start_time = time.perf_counter()
+        disks = []
+        for mount in self.mounts():
+            try:
+                stat = os.statvfs(mount["mountpoint"])
+            except OSError:
+                # 某些分区可能无法访问
+                continue
+            total = stat.f_blocks * stat.f_frsize
+            free = stat.f_bavail * stat.f_frsize
+            used = (stat.f_blocks - stat.f_bfree) * stat.f_frsize
+            # 与psutil.disk_usage一致：使用率按普通用户可用空间计算，不含root保留空间
+            usable = used + free
+            disks.append({
+                "device": mount["device"],
+                "mountpoint": mount["mountpoint"],
+                "fstype": mount["fstype"],
+                "total": total,
+                "used": used,
+                "free": free,
+                "percent": round(used / usable * 100, 1) if usable else 0.0
+            })
+        with self._lock:
+            self.stats["last_collect_seconds"] = round(time.perf_counter() - start_time, 6)
+        return disks
+
+    def close(self):
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+        self._fd = None
+        self._poller = None
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            mounts = list(self._mounts or [])
+        stats.update({
+            "change_detection": "poll" if self._poller is not None else f"每{self.refresh_seconds}秒",
+            "mounts": [{"mountpoint": mount["mountpoint"], "fstype": mount["fstype"], "device": mount["device"]}
+                       for mount in mounts]
+        })
+        return stats
@@ -0,0 +1,390 @@
+import time
+import uuid
+import logging
+import threading
+from collections import deque
+
+from app.config.settings import CONFIG
+from app.services.notifier import notifier
+from app.services.alert_dedup import alert_deduplicator
+from app.services.outbox import NotificationOutbox
+from app.services.delivery_metrics import delivery_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationHandle:
+    """通知句柄，调用方可以通过它查询或等待投递结果"""
+
+    def __init__(self, subject, message, level, resource=None, template=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.subject = subject
+        self.message = message
+        self.level = level
+        self.resource = resource
+        self.template = template
+        self.channels = None  # 只投递到这些渠道，None表示所有启用的渠道
+        self.outbox_id = None  # 持久化发件箱中的记录ID
+        self.enqueued_at = time.time()
+        self.status = "queued"  # queued, sending, sent, failed, dropped, suppressed
+        self.result = None
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def done(self):
+        """是否已完成（成功、失败、被丢弃或被去重抑制）"""
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        """
+        等待投递完成
+
+        Returns:
+            bool: 投递是否成功；超时未完成时返回None
+        """
+        if not self._event.wait(timeout):
+            return None
+        return self.result
+
+    def add_done_callback(self, callback):
+        """添加完成回调，回调参数为句柄本身；已完成时立即调用"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _finish(self, status, result):
+        with self._lock:
+            self.status = status
+            self.result = result
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                logger.error(f"通知完成回调执行失败: {str(e)}")
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "subject": self.subject,
+            "level": self.level,
+            "resource": self.resource,
+            "outbox_id": self.outbox_id,
+            "status": self.status,
+            "enqueued_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.enqueued_at))
+        }
+
+
+class NotificationQueue:
+    """
+    有界的进程内通知队列
+
+    检查任务只负责入队，由专用的投递线程调用NotificationService发送，
+    避免SMTP或Telegram变慢时阻塞调度线程、拖慢其他检查。
+    配置了发件箱时，通知在入队前先持久化，未成功投递的渠道由重试线程按退避时间重新入队。
+    """
+
+    def __init__(self, sender, max_size=1000, workers=2, overflow="drop_oldest", outbox=None, retry_poll_seconds=5):
+        """
+        Args:
+            sender: 发送函数 sender(subject, message, level, resource, channels, template=None, enqueued_at=None,
+                    outbox_id=None)，返回 {channel: bool}，进入汇总窗口的渠道为None
+            outbox: NotificationOutbox实例，None表示不持久化
+            retry_poll_seconds: 检查发件箱中到期重试通知的间隔
+        """
+        self.sender = sender
+        self.max_size = max_size
+        self.workers = workers
+        self.overflow = overflow  # drop_oldest: 丢弃最早的通知; drop_newest: 拒绝新通知
+        self.outbox = outbox
+        self.retry_poll_seconds = retry_poll_seconds
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._threads = []
+        self._running = False
+        self._stop_event = threading.Event()
+        self._in_flight = 0
+        self._outbox_ids = set()  # 在内存队列中、正在投递或等待汇总发送的发件箱记录，重试线程不再取出
+        self._digest_pending = {}  # {发件箱记录ID: 等待汇总发送的渠道}
+        self._digest_flushed = {}  # {发件箱记录ID: 投递线程记录前汇总已发送的渠道}
+        self.stats = {
+            "enqueued": 0,
+            "delivered": 0,
+            "failed": 0,
+            "dropped": 0,
+            "retried": 0
+        }
+        self.last_delivery_latency = None
+
+    def start(self):
+        """启动投递线程"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"notify-dispatcher-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        if self.outbox:
+            self.outbox.open()
+            notifier.add_digest_listener(self._on_digest_flushed)
+            self._stop_event.clear()
+            self._threads.append(threading.Thread(target=self._retry_loop, name="notify-retry", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"通知投递队列已启动: 容量={self.max_size}, 投递线程={self.workers}")
+
+    def enqueue(self, subject, message, level="info", resource=None, source=None, state=None, template=None):
+        """
+        将通知加入队列，立即返回
+
+        指定source时先经过告警去重，以 (source, resource, state) 为指纹，
+        重复的告警直接返回状态为suppressed的句柄，不进入队列。
+
+        Args:
+            subject: 通知主题
+            message: 通知内容
+            level: 通知级别 (info, warning, error, critical)
+            resource: 相关对象（如端点名称），用于告警汇总和去重
+            source: 告警来源 (endpoint, system, database, api)，为None时不去重
+            state: 告警状态，默认使用通知级别
+            template: (模板名称, 字段值)，供定义了专属模板的渠道重新渲染
+
+        Returns:
+            NotificationHandle: 通知句柄
+        """
+        handle = NotificationHandle(subject, message, level, resource, template)
+        if source is not None and not alert_deduplicator.should_send(source, resource or subject, state or level):
+            handle._finish("suppressed", False)
+            return handle
+
+        if not self._running:
+            self.start()
+
+        # 入队前先写入发件箱，进程崩溃或所有渠道失败后仍可重试
+        if self.outbox:
+            channels = notifier.enabled_channels()
+            if channels:
+                try:
+                    handle.outbox_id = self.outbox.append(subject, message, level, resource, channels, template)
+                except Exception as e:
+                    logger.error(f"写入通知发件箱失败，仅在内存中投递: {str(e)}")
+
+        self._put(handle)
+        return handle
+
+    def _put(self, handle):
+        """将句柄放入内存队列，队列满时按溢出策略丢弃"""
+        dropped = None
+        with self._condition:
+            if len(self._queue) >= self.max_size:
+                if self.overflow == "drop_newest":
+                    dropped = handle
+                else:
+                    dropped = self._queue.popleft()
+                self.stats["dropped"] += 1
+            if dropped is not handle:
+                self._queue.append(handle)
+                if handle.outbox_id is not None:
+                    self._outbox_ids.add(handle.outbox_id)
+                self.stats["enqueued"] += 1
+                self._condition.notify()
+            if dropped is not None:
+                self._outbox_ids.discard(dropped.outbox_id)
+
+        if dropped is not None:
+            logger.warning(f"通知队列已满，丢弃通知: {notifier._remove_emojis(dropped.subject)}"
+                           + ("（仍保留在发件箱中，稍后重试）" if dropped.outbox_id is not None else ""))
+            dropped._finish("dropped", False)
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while self._running and not self._queue:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                handle = self._queue.popleft()
+                self._in_flight += 1
+
+            handle.status = "sending"
+            # 租约从开始投递时计算，在内存队列中等待的时间不占用租约
+            if handle.outbox_id is not None:
+                try:
+                    self.outbox.lease(handle.outbox_id)
+                except Exception as e:
+                    logger.error(f"通知发件箱续租失败: {str(e)}")
+            try:
+                results = self.sender(handle.subject, handle.message, handle.level, handle.resource, handle.channels,
+                                      template=handle.template, enqueued_at=handle.enqueued_at,
+                                      outbox_id=handle.outbox_id)
+            except Exception as e:
+                logger.error(f"通知投递出错: {str(e)}")
+                results = None
+            # 进入汇总窗口的渠道结果为None，视为已接受，汇总发送后再记录到发件箱
+            result = bool(results) and any(ok is not False for ok in results.values())
+            digested = [channel for channel, ok in (results or {}).items() if ok is None]
+
+            # 记录各渠道的投递结果，失败的渠道由发件箱安排重试
+            if handle.outbox_id is not None and results is not None:
+                completed = {channel: ok for channel, ok in results.items() if ok is not None}
+                failed = [channel for channel, ok in completed.items() if not ok]
+                try:
+                    if completed or not digested:
+                        self.outbox.mark(handle.outbox_id, completed,
+                                         f"投递失败的渠道: {', '.join(failed)}" if failed else None)
+                except Exception as e:
+                    logger.error(f"记录通知投递结果失败: {str(e)}")
+
+            with self._condition:
+                self._in_flight -= 1
+                waiting = set()
+                if handle.outbox_id is not None and results is not None:
+                    # 汇总可能在这之前已经发送，已报告结果的渠道不再等待
+                    waiting = set(digested) - self._digest_flushed.pop(handle.outbox_id, set())
+                if waiting:
+                    # 等待汇总发送期间重试线程不再取出该记录
+                    self._digest_pending[handle.outbox_id] = waiting
+                else:
+                    self._outbox_ids.discard(handle.outbox_id)
+                self.stats["delivered" if result else "failed"] += 1
+                self.last_delivery_latency = time.time() - handle.enqueued_at
+                self._condition.notify_all()
+            handle._finish("sent" if result else "failed", result)
+
+    def _on_digest_flushed(self, channel, outbox_ids, success):
+        """汇总发送后记录窗口内各通知在该渠道的结果，发送失败时由发件箱安排重试"""
+        for outbox_id in outbox_ids:
+            with self._condition:
+                channels = self._digest_pending.get(outbox_id)
+                if channels is None:
+                    self._digest_flushed.setdefault(outbox_id, set()).add(channel)
+                else:
+                    channels.discard(channel)
+                    if not channels:
+                        del self._digest_pending[outbox_id]
+                        self._outbox_ids.discard(outbox_id)
+            try:
+                self.outbox.mark(outbox_id, {channel: success}, None if success else f"{channel}告警汇总发送失败")
+            except Exception as e:
+                logger.error(f"记录告警汇总投递结果失败: {str(e)}")
+
+    def _retry_loop(self):
+        """定期从发件箱取出到期的通知重新入队，只投递尚未成功的渠道"""
+        while not self._stop_event.wait(self.retry_poll_seconds):
+            # 备用节点不发送通知，取出后也无法投递，只会反复续租；切换为主节点后再继续
+            if not notifier.active:
+                continue
+            with self._condition:
+                in_memory = set(self._outbox_ids)
+            try:
+                due = self.outbox.claim_due(exclude=in_memory)
+            except Exception as e:
+                logger.error(f"读取通知发件箱失败: {str(e)}")
+                continue
+            for item in due:
+                handle = NotificationHandle(item["subject"], item["message"], item["level"], item["resource"],
+                                            item["template"])
+                handle.outbox_id = item["id"]
+                handle.channels = item["channels"]
+                for channel in handle.channels or ():
+                    delivery_metrics.inc("retries_total", channel=channel)
+                self._put(handle)
+            if due:
+                with self._condition:
+                    self.stats["retried"] += len(due)
+                logger.info(f"从通知发件箱重新投递 {len(due)} 条通知")
+
+    def flush(self, timeout):
+        """
+        等待队列中的通知全部投递完成
+
+        Returns:
+            bool: 是否在超时前全部完成
+        """
+        deadline = time.time() + timeout
+        with self._condition:
+            while self._queue or self._in_flight:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    logger.warning(f"等待通知投递超时，队列中仍有 {len(self._queue)} 条，投递中 {self._in_flight} 条")
+                    return False
+                self._condition.wait(min(remaining, 0.5))
+        return True
+
+    def stop(self, timeout=10):
+        """投递完队列中的通知后停止投递线程"""
+        self.flush(timeout)
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=1)
+        if self.outbox:
+            # 先发送汇总窗口中的通知，关闭发件箱前记录它们的投递结果
+            notifier.flush_digests()
+            self.outbox.close()
+
+    def get_stats(self):
+        """获取队列统计：深度、最早通知的等待时间、入队/投递/失败/丢弃数量"""
+        with self._condition:
+            depth = len(self._queue)
+            oldest_age = time.time() - self._queue[0].enqueued_at if self._queue else 0
+            stats = dict(self.stats)
+            in_flight = self._in_flight
+        stats.update({
+            "depth": depth,
+            "capacity": self.max_size,
+            "in_flight": in_flight,
+            "oldest_age_seconds": round(oldest_age, 3),
+            "last_delivery_latency_seconds": round(self.last_delivery_latency, 3)
+            if self.last_delivery_latency is not None else None,
+            "workers": self.workers
+        })
+        if self.outbox and self._running:
+            # 写入线程繁忙或发件箱正在关闭时不等待，发件箱统计为None
+            try:
+                stats["outbox"] = self.outbox.get_stats()
+            except (TimeoutError, RuntimeError) as e:
+                logger.warning(f"获取通知发件箱统计失败: {str(e)}")
+                stats["outbox"] = None
+        return stats
+
+
+def _default_lease_seconds():
+    """一次投递的最长耗时：最慢渠道的超时 + Telegram节流等待 + 余量"""
+    timeouts = [channel.timeout for channel in notifier.channels.values()] or [0]
+    return max(timeouts) + notifier.telegram_max_pacing_wait + 60
+
+
+def _create_notification_queue():
+    queue_config = CONFIG["notifications"].get("queue", {})
+    outbox_config = CONFIG["notifications"].get("outbox", {})
+    outbox = None
+    if outbox_config.get("enabled", True):
+        outbox = NotificationOutbox(
+            outbox_config.get("path", "notification_outbox.db"),
+            retry_base_seconds=outbox_config.get("retry_base_seconds", 30),
+            retry_max_seconds=outbox_config.get("retry_max_seconds", 3600),
+            max_attempts=outbox_config.get("max_attempts", 20),
+            lease_seconds=outbox_config.get("lease_seconds") or _default_lease_seconds(),
+            retention_days=outbox_config.get("retention_days", 7)
+        )
+    return NotificationQueue(
+        notifier.deliver,
+        max_size=queue_config.get("max_size", 1000),
+        workers=queue_config.get("workers", 2),
+        overflow=queue_config.get("overflow", "drop_oldest"),
+        outbox=outbox,
+        retry_poll_seconds=outbox_config.get("poll_interval_seconds", 5)
+    )
+
+
+# 创建通知队列实例
+notification_queue = _create_notification_queue()
@@ -2,21 +2,89 @@ import logging
 import smtplib
 import requests
 import time
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 
 from app.config.settings import CONFIG
+from app.services.smtp_pool import SMTPConnectionPool
+from app.services.rate_limiter import TelegramRateLimiter
+from app.services.digest import DigestBuffer
+from app.services.channels import EmailChannel, TelegramChannel, create_channel
+from app.services.templates import email_builder, format_subject, split_telegram_message
+from app.services.delivery_metrics import delivery_metrics
 
 logger = logging.getLogger(__name__)
 
 class NotificationService:
-    """通知服务，负责发送邮件和Telegram消息"""
+    """通知服务，负责把通知分发到邮件、Telegram和配置的其他渠道"""
     
     def __init__(self):
         self.config = CONFIG["notifications"]
         self.email_config = self.config["email"]
         self.telegram_config = self.config["telegram"]
+        # 是否允许发送通知，主备模式下只有主节点发送
+        self.active = True
+
+        # Telegram并发发送：所有聊天共享一个保持连接的HTTPS会话
+        fanout_workers = self.telegram_config.get("fanout_workers", 8)
+        self.telegram_session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=fanout_workers)
+        self.telegram_session.mount("https://", adapter)
+        self.telegram_session.mount("http://", adapter)
+        self._telegram_executor = ThreadPoolExecutor(max_workers=fanout_workers, thread_name_prefix="telegram-fanout")
+        self.last_telegram_results = {}
+
+        # Telegram发送节流，遵守Bot API的全局、单聊天和群组限额
+        rate_config = self.telegram_config.get("rate_limit", {})
+        self.telegram_rate_limiter = TelegramRateLimiter(
+            global_per_second=rate_config.get("global_per_second", 30),
+            chat_per_second=rate_config.get("chat_per_second", 1),
+            group_per_minute=rate_config.get("group_per_minute", 20),
+            chat_burst=rate_config.get("chat_burst", 1)
+        )
+        self.telegram_max_pacing_wait = rate_config.get("max_wait_seconds", 300)
+
+        # SMTP连接池，在多封邮件之间复用已认证的连接
+        pool_config = self.email_config.get("pool", {})
+        self.smtp_pool = SMTPConnectionPool(
+            self.email_config,
+            max_size=pool_config.get("max_size", 2),
+            idle_timeout=pool_config.get("idle_timeout", 60),
+            noop_interval=pool_config.get("noop_interval", 10),
+            enabled=pool_config.get("enabled", True)
+        )
         
+        # 通知渠道插件：内置邮件和Telegram，其他渠道（如webhook）在 notifications.channels 中配置
+        self.channels = {
+            "email": EmailChannel("email", self.email_config, self),
+            "telegram": TelegramChannel("telegram", self.telegram_config, self)
+        }
+        for name, channel_config in self.config.get("channels", {}).items():
+            try:
+                self.channels[name] = create_channel(name, channel_config)
+                logger.info(f"已加载通知渠道: {name} ({type(self.channels[name]).__name__}), "
+                            f"{'启用' if self.channels[name].enabled else '禁用'}")
+            except Exception as e:
+                logger.error(f"加载通知渠道 {name} 失败: {str(e)}")
+
+        # 告警汇总：每个渠道可配置汇总窗口，窗口内的非紧急通知合并为一条发送
+        self.digests = {}
+        self.digest_bypass_levels = {}
+        self._digest_listeners = []
+        digest_config = self.config.get("digest", {})
+        for channel in self.channels:
+            channel_config = digest_config.get(channel, {})
+            window = channel_config.get("window_seconds", 0)
+            if window > 0:
+                self.digests[channel] = DigestBuffer(
+                    channel, window,
+                    lambda subject, message, level, channel=channel: self._send_via_channel(channel, subject, message, level),
+                    max_details=channel_config.get("max_details", 50),
+                    on_flushed=self._digest_flushed
+                )
+                self.digest_bypass_levels[channel] = set(channel_config.get("bypass_levels", ["critical"]))
+                logger.info(f"{channel}告警汇总已启用: 窗口={window}秒, 紧急级别={sorted(self.digest_bypass_levels[channel])}")
+
         # 记录通知配置
         logger.info(f"初始化通知服务: 邮件通知={'启用' if self.email_config['enabled'] else '禁用'}, "
                    f"Telegram通知={'启用' if self.telegram_config['enabled'] else '禁用'}")
@@ -33,51 +101,159 @@ class NotificationService:
             logger.info(f"正在初始化Telegram配置，Token: {self.telegram_config['token'][:10]}..., "
                       f"聊天ID: {self.telegram_config['chat_ids']}")
     
-    def send_notification(self, subject, message, level="info"):
+    def send_notification(self, subject, message, level="info", resource=None, template=None):
         """
         发送通知
         
         Args:
             subject: 通知主题
             message: 通知内容
-            level: 通知级别 (info, warning, error)
+            level: 通知级别 (info, warning, error, critical)
+            resource: 相关对象（如端点名称），用于告警汇总中列出受影响对象
+            template: (模板名称, 字段值)，渠道有专属模板时按模板重新渲染
         """
-        email_success = False
-        telegram_success = False
-        
-        # 根据通知级别设置前缀
-        prefix = {
-            "info": "📢 信息",
-            "warning": "⚠️ 警告",
-            "error": "🚨 错误"
-        }.get(level, "📢 信息")
+        results = self.deliver(subject, message, level, resource, template=template)
+        # 进入汇总窗口的渠道结果为None，视为已接受
+        return bool(results) and any(ok is not False for ok in results.values())
+
+    def enabled_channels(self):
+        """获取当前启用的通知渠道"""
+        return [name for name, channel in self.channels.items() if channel.enabled]
+
+    def _build_notification(self, subject, message, level, resource=None, template=None):
+        return {
+            "subject": subject,
+            "full_subject": self._format_subject(subject, level),
+            "message": message,
+            "level": level,
+            "resource": resource,
+            "template": template,  # (模板名称, 字段值)，渠道有专属模板时重新渲染
+            "timestamp": time.time()
+        }
+
+    def _send_via_channel(self, name, subject, message, level, resource=None):
+        """通过指定渠道发送一条通知并等待结果"""
+        channel = self.channels[name]
+        future = channel.submit(self._build_notification(subject, message, level, resource))
+        future.add_done_callback(lambda done, started_at=time.time(): self._record_delivery(name, done, started_at))
+        try:
+            return bool(future.result(channel.timeout))
+        except Exception as e:
+            logger.error(f"通知渠道 {name} 发送失败或超时: {str(e)}")
+            return False
+
+    def deliver(self, subject, message, level="info", resource=None, channels=None, template=None, enqueued_at=None,
+                outbox_id=None):
+        """
+        向各渠道并发发送通知，返回每个渠道的结果
         
-        full_subject = f"{prefix}: {subject}"
+        各渠道在自己的线程池中发送，总耗时取决于最慢的渠道而不是各渠道之和。
         
-        # 尝试发送邮件
-        if self.email_config["enabled"]:
-            email_success = self.send_email(full_subject, message)
-            # 记录日志时移除可能的表情符号
-            safe_subject = self._remove_emojis(subject)
-            logger.info(f"邮件通知发送{'成功' if email_success else '失败'}: {safe_subject}")
+        Args:
+            channels: 只发送到这些渠道，None表示所有启用的渠道
+            enqueued_at: 通知入队时间，用于统计端到端投递耗时，None表示从调用时开始计算
+            outbox_id: 发件箱记录ID，进入汇总窗口的通知在汇总发送后通过 add_digest_listener 注册的回调报告结果
+            
+        Returns:
+            dict: {channel: bool}，进入汇总窗口尚未发送的渠道为None；备用节点不发送时返回None
+        """
+        if not self.active:
+            logger.info(f"当前实例为备用节点，跳过发送通知: {self._remove_emojis(subject)}")
+            return None
+
+        results = {}
+        futures = {}
+        notification = self._build_notification(subject, message, level, resource, template)
+        started_at = enqueued_at or notification["timestamp"]
+        # 记录日志时移除可能的表情符号
+        safe_subject = self._remove_emojis(subject)
         
-        # 尝试发送Telegram消息
-        if self.telegram_config["enabled"]:
-            telegram_success = self.send_telegram(full_subject, message)
-            # 记录日志时移除可能的表情符号
-            safe_subject = self._remove_emojis(subject)
-            logger.info(f"Telegram通知发送{'成功' if telegram_success else '失败'}: {safe_subject}")
+        for name in self.enabled_channels():
+            if channels is not None and name not in channels:
+                continue
+            if self._should_digest(name, level):
+                self.digests[name].add(subject, message, level, resource, outbox_id)
+                delivery_metrics.inc("digested_total", channel=name)
+                results[name] = None
+            else:
+                futures[name] = self.channels[name].submit(notification)
+                futures[name].add_done_callback(
+                    lambda done, name=name: self._record_delivery(name, done, started_at)
+                )
+
+        for name, future in futures.items():
+            try:
+                results[name] = bool(future.result(self.channels[name].timeout))
+            except Exception as e:
+                logger.error(f"通知渠道 {name} 发送失败或超时: {str(e)}")
+                if not future.done():
+                    delivery_metrics.inc("timeouts_total", channel=name)
+                results[name] = False
+            logger.info(f"{name}通知发送{'成功' if results[name] else '失败'}: {safe_subject}")
         
-        # 如果两个渠道都失败，记录错误
-        if not email_success and not telegram_success:
-            # 记录日志时移除可能的表情符号
-            safe_subject = self._remove_emojis(subject)
+        # 如果所有渠道都失败，记录错误
+        if all(ok is False for ok in results.values()):
             logger.error(f"所有通知渠道都失败: {safe_subject}")
             
-        return email_success or telegram_success
+        return results
+
+    @staticmethod
+    def _record_delivery(name, future, started_at):
+        """渠道返回结果时记录投递结果和端到端耗时（超时的通知在实际完成时记录）"""
+        ok = not future.cancelled() and future.exception() is None and bool(future.result())
+        delivery_metrics.record_result(name, ok)
+        delivery_metrics.observe("delivery_seconds", max(0.0, time.time() - started_at), channel=name)
+
+    def get_delivery_metrics(self):
+        """获取各渠道和各收件人的投递计数、失败率和耗时分布"""
+        return delivery_metrics.get_stats()
+
+    def close_channels(self):
+        """发送各渠道剩余的批量通知并停止渠道线程"""
+        for channel in self.channels.values():
+            channel.close()
+
+    def get_channel_stats(self):
+        """获取各通知渠道的发送统计"""
+        return {name: channel.get_stats() for name, channel in self.channels.items()}
     
-    def send_email(self, subject, message):
-        """发送邮件通知"""
+    def _format_subject(self, subject, level):
+        """根据通知级别添加前缀"""
+        return format_subject(subject, level)
+
+    def _should_digest(self, channel, level):
+        """该渠道是否启用了汇总，且通知级别不属于需要立即发送的紧急级别"""
+        return channel in self.digests and level not in self.digest_bypass_levels[channel]
+
+    def add_digest_listener(self, callback):
+        """注册汇总发送结果回调 callback(channel, outbox_ids, success)"""
+        self._digest_listeners.append(callback)
+
+    def _digest_flushed(self, channel, outbox_ids, success):
+        for callback in list(self._digest_listeners):
+            callback(channel, outbox_ids, success)
+
+    def flush_digests(self):
+        """立即发送所有渠道汇总窗口中的通知，停止服务前调用"""
+        for digest in self.digests.values():
+            digest.flush()
+
+    def get_digest_stats(self):
+        """获取各渠道的告警汇总统计"""
+        return {channel: digest.get_stats() for channel, digest in self.digests.items()}
+
+    def set_active(self, active):
+        """设置是否允许发送通知"""
+        self.active = active
+        logger.info(f"通知发送已{'启用' if active else '暂停'}")
+    
+    def send_email(self, subject, message, subtype="plain"):
+        """
+        发送邮件通知
+        
+        Args:
+            subtype: 正文类型，plain 或 html
+        """
         if not self.email_config["enabled"]:
             logger.warning("邮件通知未启用")
             return False
@@ -94,43 +270,27 @@ class NotificationService:
         safe_subject = self._remove_emojis(subject)
         logger.info(f"尝试发送邮件: 主题='{safe_subject}', 收件人={self.email_config['recipients']}")
         
+        recipients = list(self.email_config["recipients"])
+        # 发送成功前视为全部收件人失败，成功后只有被服务器拒绝的收件人算失败
+        refused = dict.fromkeys(recipients)
         try:
-            # 创建MIMEText对象
-            msg = MIMEMultipart()
-            msg['Subject'] = subject
-            msg['From'] = self.email_config["sender"]
-            msg['To'] = ", ".join(self.email_config["recipients"])
-            
-            # 添加消息正文
-            msg.attach(MIMEText(message, 'plain', 'utf-8'))
-            
-            # 记录SMTP连接信息
-            logger.info(f"连接SMTP服务器: {self.email_config['smtp_server']}:{self.email_config['smtp_port']}")
-            
-            # 连接SMTP服务器
-            if self.email_config["smtp_port"] == 465:
-                logger.info("使用SSL安全连接")
-                server = smtplib.SMTP_SSL(self.email_config["smtp_server"], self.email_config["smtp_port"], timeout=30)
-            else:
-                logger.info("使用普通连接并启用TLS")
-                server = smtplib.SMTP(self.email_config["smtp_server"], self.email_config["smtp_port"], timeout=30)
-                server.starttls()  # 启用TLS
-            
-            # 登录
-            if self.email_config["username"] and self.email_config["password"]:
-                logger.info(f"使用用户名 {self.email_config['username']} 登录SMTP服务器")
-                server.login(self.email_config["username"], self.email_config["password"])
-            else:
-                logger.info("未配置SMTP用户名或密码，使用匿名登录")
-            
-            # 发送邮件
-            logger.info(f"开始发送邮件: 从 {self.email_config['sender']} 到 {self.email_config['recipients']}")
-            server.sendmail(
+            # 生成邮件报文，相同发件人、收件人和内容类型的邮件共用预先编码的头部
+            msg = email_builder.build(
+                subject, message,
                 self.email_config["sender"],
                 self.email_config["recipients"],
-                msg.as_string()
+                subtype
             )
-            server.quit()
+            
+            # 通过连接池发送，复用已登录的SMTP会话
+            logger.info(f"开始发送邮件: 从 {self.email_config['sender']} 到 {self.email_config['recipients']}")
+            refused = self.smtp_pool.sendmail(
+                self.email_config["sender"],
+                recipients,
+                msg
+            ) or {}
+            if refused:
+                logger.warning(f"部分收件人被SMTP服务器拒绝: {list(refused)}")
             
             # 记录日志时移除可能的表情符号
             logger.info(f"邮件发送成功: {safe_subject}")
@@ -151,86 +311,182 @@ class NotificationService:
             # 记录日志时移除可能的表情符号
             logger.error(f"邮件发送失败: {str(e)}")
             return False
+        finally:
+            for recipient in recipients:
+                delivery_metrics.record_result("email", recipient not in refused, recipient)
 
     def send_telegram(self, subject, message):
         """
         使用直接HTTP请求发送Telegram通知，避免异步问题
+        
+        所有聊天ID并发发送，各自独立重试，至少成功发送给一个聊天即视为成功
+        """
+        results = self.send_telegram_detailed(subject, message)
+        if not results:
+            return False
+        
+        # 如果至少成功发送给一个接收者，就算成功
+        if any(result["ok"] for result in results.values()):
+            # 防止Windows控制台编码问题，从日志中移除可能的表情符号
+            safe_subject = self._remove_emojis(subject)
+            failed = [chat_id for chat_id, result in results.items() if not result["ok"]]
+            if failed:
+                logger.warning(f"Telegram消息部分发送失败: {safe_subject}, 失败的聊天ID: {failed}")
+            else:
+                logger.info(f"Telegram消息发送成功: {safe_subject}")
+            return True
+        else:
+            logger.error(f"Telegram消息发送失败，未能发送给任何接收者")
+            return False
+
+    def send_telegram_detailed(self, subject, message):
+        """
+        并发向所有聊天ID发送Telegram消息
+        
+        Returns:
+            dict: 每个聊天ID的发送结果 {chat_id: {"ok", "attempts", "message_id", "error", "elapsed"}}，
+                  配置不完整时返回空字典
         """
         if not self.telegram_config["enabled"]:
             logger.warning("Telegram通知未启用")
-            return False
+            return {}
             
         if not self.telegram_config["token"]:
             logger.error("Telegram Bot Token未配置")
-            return False
+            return {}
             
         if not self.telegram_config["chat_ids"]:
             logger.error("Telegram聊天ID未配置")
-            return False
+            return {}
         
         # 移除Markdown格式，避免格式错误导致发送失败
         full_message = f"{subject}\n\n{message}"
+        # 超过4096字符的消息拆分成多条发送，过长时截断
+        parts = split_telegram_message(full_message, max_parts=self.telegram_config.get("max_parts", 3))
         
+        chat_ids = list(self.telegram_config["chat_ids"])
+        futures = {
+            chat_id: self._telegram_executor.submit(self._send_telegram_parts, chat_id, parts)
+            for chat_id in chat_ids
+        }
+        results = {chat_id: future.result() for chat_id, future in futures.items()}
+        self.last_telegram_results = results
+        return results
+
+    def _send_telegram_parts(self, chat_id, parts):
+        """按顺序向单个聊天发送拆分后的各条消息，任意一条失败即停止"""
+        if len(parts) == 1:
+            return self._send_telegram_to_chat(chat_id, parts[0])
+        combined = {
+            "ok": True, "attempts": 0, "message_id": None, "error": None,
+            "paced_seconds": 0.0, "rate_limited": 0, "elapsed": 0.0, "parts": len(parts)
+        }
+        for part in parts:
+            result = self._send_telegram_to_chat(chat_id, part)
+            combined["attempts"] += result["attempts"]
+            combined["rate_limited"] += result["rate_limited"]
+            combined["paced_seconds"] = round(combined["paced_seconds"] + result["paced_seconds"], 3)
+            combined["elapsed"] = round(combined["elapsed"] + result["elapsed"], 3)
+            combined["message_id"] = result["message_id"]
+            if not result["ok"]:
+                combined.update({"ok": False, "error": result["error"]})
+                break
+        return combined
+
+    def _send_telegram_to_chat(self, chat_id, full_message):
+        """向单个聊天ID发送消息，失败时独立重试，不影响其他聊天"""
         # 设置重试参数
         max_retries = 3
         retry_delay = 2
         
-        # 尝试向所有聊天ID发送消息
-        sent_to_any = False
-        
-        for chat_id in self.telegram_config["chat_ids"]:
-            logger.info(f"尝试向Telegram聊天ID {chat_id} 发送消息")
-            
-            for attempt in range(max_retries):
+        api_url = f"{self.telegram_config.get('api_base', 'https://api.telegram.org')}/bot{self.telegram_config['token']}/sendMessage"
+        result = {"ok": False, "attempts": 0, "message_id": None, "error": None, "paced_seconds": 0.0, "rate_limited": 0}
+        start_time = time.time()
+        logger.info(f"尝试向Telegram聊天ID {chat_id} 发送消息")
+
+        attempt = 0
+        while attempt < max_retries:
+            result["attempts"] += 1
+            # 超出限额时在此排队等待，而不是直接失败
+            result["paced_seconds"] += self.telegram_rate_limiter.acquire(chat_id)
+            try:
+                # 使用HTTP请求直接调用Telegram API，复用保持连接的会话
+                data = {
+                    "chat_id": chat_id,
+                    "text": full_message,
+                    "disable_web_page_preview": True
+                }
+                
+                request_start = time.perf_counter()
+                response = self.telegram_session.post(api_url, json=data, timeout=30)
+                delivery_metrics.observe("telegram_request_seconds", time.perf_counter() - request_start, channel="telegram")
                 try:
-                    # 使用HTTP请求直接调用Telegram API
-                    api_url = f"https://api.telegram.org/bot{self.telegram_config['token']}/sendMessage"
-                    data = {
-                        "chat_id": chat_id,
-                        "text": full_message,
-                        "disable_web_page_preview": True
-                    }
-                    
-                    response = requests.post(api_url, json=data, timeout=30)
                     response_data = response.json()
+                except ValueError:
+                    response_data = {"description": f"HTTP {response.status_code}"}
+                
+                if response.status_code == 200 and response_data.get("ok"):
+                    message_id = response_data.get("result", {}).get("message_id", "unknown")
+                    logger.info(f"Telegram消息发送成功，聊天ID: {chat_id}, 消息ID: {message_id}")
+                    result.update({"ok": True, "message_id": message_id, "error": None})
+                    break
+                elif response.status_code == 429:
+                    # 被限流：按服务端给出的retry_after暂停该聊天后重新排队，不占用重试次数
+                    retry_after = max(1, response_data.get("parameters", {}).get("retry_after", retry_delay))
+                    result["error"] = response_data.get("description", "Too Many Requests")
+                    result["rate_limited"] += 1
+                    if result["paced_seconds"] + retry_after > self.telegram_max_pacing_wait:
+                        logger.error(f"Telegram限流等待超过 {self.telegram_max_pacing_wait} 秒 (聊天ID {chat_id})，放弃发送")
+                        break
+                    self.telegram_rate_limiter.penalize(chat_id, retry_after)
+                    continue
+                else:
+                    error_description = response_data.get("description", "未知错误")
+                    result["error"] = error_description
+                    logger.error(f"Telegram API错误 (聊天ID {chat_id}): {error_description}")
                     
-                    if response.status_code == 200 and response_data.get("ok"):
-                        message_id = response_data.get("result", {}).get("message_id", "unknown")
-                        logger.info(f"Telegram消息发送成功，消息ID: {message_id}")
-                        sent_to_any = True
+                    # 检查是否是已知错误
+                    if "chat not found" in error_description.lower():
+                        logger.error(f"Telegram聊天ID {chat_id} 不存在，跳过此ID")
+                        break
+                    elif "unauthorized" in error_description.lower():
+                        logger.error("Telegram Bot Token无效，请检查配置")
+                        break
+                    elif response.status_code == 400:
+                        # 请求本身有问题（如消息过长），重试也不会成功
+                        logger.error(f"Telegram拒绝了消息 (聊天ID {chat_id})，不再重试")
                         break
-                    else:
-                        error_description = response_data.get("description", "未知错误")
-                        logger.error(f"Telegram API错误: {error_description}")
-                        
-                        # 检查是否是已知错误
-                        if "chat not found" in error_description.lower():
-                            logger.error(f"Telegram聊天ID {chat_id} 不存在，跳过此ID")
-                            break
-                        elif "unauthorized" in error_description.lower():
-                            logger.error("Telegram Bot Token无效，请检查配置")
-                            return False
-                            
-                        # 其他错误，尝试重试
-                        logger.warning(f"Telegram消息发送失败，正在重试 ({attempt+1}/{max_retries})...")
-                        time.sleep(retry_delay)
-                        retry_delay *= 2
                         
-                except requests.RequestException as e:
-                    logger.error(f"Telegram HTTP请求错误: {str(e)}")
-                    logger.warning(f"Telegram消息发送失败，正在重试 ({attempt+1}/{max_retries})...")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2
+            except requests.RequestException as e:
+                result["error"] = str(e)
+                logger.error(f"Telegram HTTP请求错误 (聊天ID {chat_id}): {str(e)}")
+
+            # 其他错误，尝试重试
+            attempt += 1
+            if attempt < max_retries:
+                logger.warning(f"Telegram消息发送失败 (聊天ID {chat_id})，正在重试 ({attempt}/{max_retries})...")
+                time.sleep(retry_delay)
+                retry_delay *= 2
         
-        # 如果至少成功发送给一个接收者，就算成功
-        if sent_to_any:
-            # 防止Windows控制台编码问题，从日志中移除可能的表情符号
-            safe_subject = self._remove_emojis(subject)
-            logger.info(f"Telegram消息发送成功: {safe_subject}")
-            return True
-        else:
-            logger.error(f"Telegram消息发送失败，未能发送给任何接收者")
-            return False
+        result["elapsed"] = round(time.time() - start_time, 3)
+        result["paced_seconds"] = round(result["paced_seconds"], 3)
+
+        # 按聊天记录投递结果、重试次数（不含限流重排）和耗时
+        delivery_metrics.record_result("telegram", result["ok"], chat_id)
+        delivery_metrics.observe("recipient_send_seconds", result["elapsed"], channel="telegram", recipient=chat_id)
+        retries = result["attempts"] - 1 - result["rate_limited"]
+        if retries > 0:
+            delivery_metrics.inc("recipient_retries_total", retries, channel="telegram", recipient=chat_id)
+        if result["rate_limited"]:
+            delivery_metrics.inc("recipient_rate_limited_total", result["rate_limited"], channel="telegram", recipient=chat_id)
+        return result
+
+    def get_telegram_stats(self):
+        """获取Telegram节流统计和最近一次发送的各聊天结果"""
+        return {
+            "pacing": self.telegram_rate_limiter.get_stats(),
+            "last_results": {str(chat_id): result for chat_id, result in self.last_telegram_results.items()}
+        }
     
     def _remove_emojis(self, text):
         """移除文本中的表情符号，防止日志记录时出现编码问题"""
@@ -238,7 +494,7 @@ class NotificationService:
             return ""
         
         # 尝试移除常见的表情符号前缀
-        emoji_prefixes = ['📢', '⚠️', '🚨', '✅', '❌']
+        emoji_prefixes = ['📢', '⚠️', '🚨', '🔥', '✅', '❌']
         result = text
         for prefix in emoji_prefixes:
             if prefix in result:
@@ -0,0 +1,313 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class _Operation:
+    """提交给写入线程的数据库操作"""
+
+    def __init__(self, kind, args):
+        self.kind = kind
+        self.args = args
+        self.result = None
+        self.error = None
+        self.event = threading.Event()
+
+    def wait(self, timeout=None):
+        if not self.event.wait(timeout):
+            raise TimeoutError(f"通知发件箱操作超时: {self.kind}")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class NotificationOutbox:
+    """
+    持久化的通知发件箱（SQLite WAL）
+
+    通知在投递前先写入发件箱，按渠道记录投递结果，未成功的渠道按指数退避重试，
+    进程崩溃或重启后继续投递。所有数据库操作由单个写入线程执行，
+    同一时间到达的写入合并到一个事务中提交（组提交），告警风暴时不会每条消息一次fsync。
+    """
+
+    def __init__(self, path, retry_base_seconds=30, retry_max_seconds=3600, max_attempts=20,
+                 lease_seconds=120, retention_days=7, max_batch=500):
+        """
+        Args:
+            path: SQLite数据库文件路径
+            retry_base_seconds: 首次重试的等待时间，之后每次翻倍
+            retry_max_seconds: 重试等待时间上限
+            max_attempts: 最大投递次数，超过后标记为dead不再重试
+            lease_seconds: 通知开始投递后，在此时间内不会被重试线程取出，应大于一次投递的最长耗时
+            retention_days: 已投递和dead记录的保留天数
+            max_batch: 单个事务最多包含的操作数
+        """
+        self.path = path
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retention_days = retention_days
+        self.max_batch = max_batch
+        self._conn = None
+        self._operations = []
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self.stats = {"commits": 0, "operations": 0, "appended": 0}
+
+    def open(self):
+        """打开数据库并启动写入线程"""
+        with self._condition:
+            if self._running:
+                return
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=FULL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created_at REAL NOT NULL,
+                    subject TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    level TEXT NOT NULL,
+                    resource TEXT,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    last_error TEXT,
+                    template TEXT
+                );
+                CREATE TABLE IF NOT EXISTS outbox_deliveries (
+                    outbox_id INTEGER NOT NULL,
+                    channel TEXT NOT NULL,
+                    delivered_at REAL,
+                    PRIMARY KEY (outbox_id, channel)
+                );
+                CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at);
+            """)
+            # 旧版本创建的发件箱没有template列
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+            if "template" not in columns:
+                self._conn.execute("ALTER TABLE outbox ADD COLUMN template TEXT")
+            # 上次运行时写入但还没来得及投递的通知，启动后立即投递
+            recovered = self._conn.execute(
+                "UPDATE outbox SET next_attempt_at = ? WHERE status = 'pending' AND attempts = 0",
+                (time.time(),)
+            ).rowcount
+            self._running = True
+            self._thread = threading.Thread(target=self._writer, name="notification-outbox", daemon=True)
+            self._thread.start()
+        logger.info(f"通知发件箱已打开: {self.path}" + (f"，恢复 {recovered} 条未投递的通知" if recovered else ""))
+
+    def close(self, timeout=10):
+        """提交剩余操作后关闭数据库"""
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        self._conn.close()
+        logger.info("通知发件箱已关闭")
+
+    def _submit(self, kind, *args):
+        operation = _Operation(kind, args)
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("通知发件箱未打开")
+            self._operations.append(operation)
+            self._condition.notify()
+        return operation
+
+    def _writer(self):
+        while True:
+            with self._condition:
+                while self._running and not self._operations:
+                    self._condition.wait()
+                if not self._operations:
+                    return
+                batch = self._operations[:self.max_batch]
+                del self._operations[:self.max_batch]
+
+            # 一批操作在同一个事务中执行，只提交一次
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                for operation in batch:
+                    try:
+                        operation.result = getattr(self, f"_do_{operation.kind}")(*operation.args)
+                    except sqlite3.Error as e:
+                        operation.error = e
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                logger.error(f"通知发件箱提交失败: {str(e)}")
+                try:
+                    self._conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+                for operation in batch:
+                    operation.error = operation.error or e
+            self.stats["commits"] += 1
+            self.stats["operations"] += len(batch)
+            for operation in batch:
+                operation.event.set()
+
+    def append(self, subject, message, level, resource, channels, template=None, timeout=10):
+        """
+        写入一条通知，提交到磁盘后返回
+
+        Args:
+            template: (模板名称, 字段值)，以JSON保存，重试时供渠道按专属模板重新渲染
+
+        Returns:
+            int: 发件箱记录ID
+        """
+        template_json = json.dumps(list(template), ensure_ascii=False, default=str) if template else None
+        return self._submit("append", subject, message, level, resource, list(channels), template_json).wait(timeout)
+
+    def mark(self, outbox_id, results, error=None):
+        """
+        记录一次投递的各渠道结果，不等待提交
+
+        Args:
+            outbox_id: 发件箱记录ID
+            results: 各渠道的投递结果 {channel: bool}
+            error: 失败原因
+        """
+        self._submit("mark", outbox_id, dict(results), error)
+
+    def lease(self, outbox_id):
+        """通知开始投递时续租，租约时间内不会被重试线程取出，不等待提交"""
+        self._submit("lease", outbox_id)
+
+    def claim_due(self, limit=100, exclude=()):
+        """
+        取出到期需要重试的通知，并在租约时间内不再被取出
+
+        Args:
+            limit: 最多取出的数量
+            exclude: 跳过的记录ID（仍在内存队列中或正在投递的通知）
+
+        Returns:
+            list: [{"id", "subject", "message", "level", "resource", "channels", "template"}]
+        """
+        return self._submit("claim", limit, frozenset(exclude)).wait()
+
+    def get_stats(self, timeout=1):
+        """
+        获取发件箱统计：各状态的记录数量和组提交情况
+
+        Args:
+            timeout: 等待写入线程执行查询的最长时间，写入线程忙于大批量提交时抛出TimeoutError
+        """
+        counts = self._submit("count").wait(timeout)
+        stats = dict(self.stats)
+        stats["avg_operations_per_commit"] = round(stats["operations"] / stats["commits"], 1) if stats["commits"] else 0
+        stats.update(counts)
+        return stats
+
+    def _do_append(self, subject, message, level, resource, channels, template):
+        now = time.time()
+        # 由内存队列投递，开始投递时再续租；进程崩溃后未标记的记录由重试线程接管
+        cursor = self._conn.execute(
+            "INSERT INTO outbox (created_at, subject, message, level, resource, next_attempt_at, template) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (now, subject, message, level, resource, now + self.lease_seconds, template)
+        )
+        outbox_id = cursor.lastrowid
+        self._conn.executemany(
+            "INSERT INTO outbox_deliveries (outbox_id, channel) VALUES (?, ?)",
+            [(outbox_id, channel) for channel in channels]
+        )
+        self.stats["appended"] += 1
+        return outbox_id
+
+    def _do_mark(self, outbox_id, results, error):
+        now = time.time()
+        delivered = [channel for channel, ok in results.items() if ok]
+        self._conn.executemany(
+            "UPDATE outbox_deliveries SET delivered_at = ? WHERE outbox_id = ? AND channel = ? AND delivered_at IS NULL",
+            [(now, outbox_id, channel) for channel in delivered]
+        )
+        remaining = self._conn.execute(
+            "SELECT COUNT(*) FROM outbox_deliveries WHERE outbox_id = ? AND delivered_at IS NULL", (outbox_id,)
+        ).fetchone()[0]
+        row = self._conn.execute("SELECT attempts FROM outbox WHERE id = ?", (outbox_id,)).fetchone()
+        if row is None:
+            return
+        attempts = row[0] + 1
+
+        if remaining == 0:
+            status, next_attempt_at = "delivered", now
+        elif attempts >= self.max_attempts:
+            status, next_attempt_at = "dead", now
+            logger.error(f"通知投递失败次数达到上限 ({attempts} 次)，放弃投递: 发件箱ID {outbox_id}")
+        else:
+            status = "pending"
+            next_attempt_at = now + min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempts - 1))
+        self._conn.execute(
+            "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+            (status, attempts, next_attempt_at, error, outbox_id)
+        )
+
+    def _do_lease(self, outbox_id):
+        self._conn.execute(
+            "UPDATE outbox SET next_attempt_at = ? WHERE id = ? AND status = 'pending'",
+            (time.time() + self.lease_seconds, outbox_id)
+        )
+
+    def _do_claim(self, limit, exclude):
+        now = time.time()
+        rows = self._conn.execute(
+            "SELECT id, subject, message, level, resource, template FROM outbox "
+            "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+            (now, limit + len(exclude))
+        ).fetchall()
+        claimed = []
+        for outbox_id, subject, message, level, resource, template in rows:
+            if outbox_id in exclude or len(claimed) >= limit:
+                continue
+            channels = [channel for (channel,) in self._conn.execute(
+                "SELECT channel FROM outbox_deliveries WHERE outbox_id = ? AND delivered_at IS NULL", (outbox_id,)
+            )]
+            self._conn.execute("UPDATE outbox SET next_attempt_at = ? WHERE id = ?", (now + self.lease_seconds, outbox_id))
+            claimed.append({
+                "id": outbox_id, "subject": subject, "message": message,
+                "level": level, "resource": resource, "channels": channels,
+                "template": self._load_template(outbox_id, template)
+            })
+
+        # 顺带清理过期的已完成记录
+        cutoff = now - self.retention_days * 86400
+        self._conn.execute(
+            "DELETE FROM outbox_deliveries WHERE outbox_id IN "
+            "(SELECT id FROM outbox WHERE status != 'pending' AND created_at < ?)", (cutoff,)
+        )
+        self._conn.execute("DELETE FROM outbox WHERE status != 'pending' AND created_at < ?", (cutoff,))
+        return claimed
+
+    @staticmethod
+    def _load_template(outbox_id, template):
+        if not template:
+            return None
+        try:
+            name, values = json.loads(template)
+            return name, values
+        except (ValueError, TypeError) as e:
+            logger.warning(f"发件箱记录 {outbox_id} 的模板数据无效，按原始内容重试: {str(e)}")
+            return None
+
+    def _do_count(self):
+        counts = {"pending": 0, "delivered": 0, "dead": 0}
+        for status, count in self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status"):
+            counts[status] = count
+        oldest = self._conn.execute("SELECT MIN(created_at) FROM outbox WHERE status = 'pending'").fetchone()[0]
+        counts["oldest_pending_age_seconds"] = round(time.time() - oldest, 3) if oldest else 0
+        return counts
@@ -0,0 +1,177 @@
+import os
+import logging
+from array import array
+
+logger = logging.getLogger(__name__)
+
+# /proc/stat 第一行各列：user nice system idle iowait irq softirq steal（guest已包含在user中，不重复计算）
+CPU_FIELDS = 8
+
+# values 数组中各项的位置
+CPU_PERCENT, MEM_TOTAL, MEM_AVAILABLE, MEM_USED, MEM_PERCENT, LOAD_1, LOAD_5, LOAD_15 = range(8)
+
+MEM_TOTAL_LABEL = b"MemTotal:"
+MEM_AVAILABLE_LABEL = b"MemAvailable:"
+
+# 字符 '0'、'9'、'.' 的字节值
+_ZERO, _NINE, _DOT = 48, 57, 46
+
+
+def _scan_uints(buffer, position, end, target, first, count):
+    """
+    从 position 开始跳过非数字字符，依次解析 count 个十进制整数写入 target[first:first + count]
+
+    直接在缓冲区上逐字节扫描，不创建 bytes、列表或切片。
+
+    Returns:
+        int: 解析结束的位置
+    """
+    index = first
+    last = first + count
+    while index < last:
+        while position < end and not _ZERO <= buffer[position] <= _NINE:
+            position += 1
+        value = 0
+        while position < end and _ZERO <= buffer[position] <= _NINE:
+            value = value * 10 + buffer[position] - _ZERO
+            position += 1
+        target[index] = value
+        index += 1
+    return position
+
+
+def _scan_decimals(buffer, position, end, target, first, count):
+    """与 _scan_uints 相同，解析 "0.52" 这样的小数，用于 /proc/loadavg"""
+    index = first
+    last = first + count
+    while index < last:
+        while position < end and not _ZERO <= buffer[position] <= _NINE:
+            position += 1
+        value = 0
+        scale = 1
+        fraction = False
+        while position < end:
+            char = buffer[position]
+            if _ZERO <= char <= _NINE:
+                value = value * 10 + char - _ZERO
+                if fraction:
+                    scale *= 10
+            elif char == _DOT and not fraction:
+                fraction = True
+            else:
+                break
+            position += 1
+        target[index] = value / scale
+        index += 1
+    return position
+
+
+class ProcCollector:
+    """
+    直接读取 /proc 的低开销采集器（仅Linux）
+
+    /proc/stat、/proc/meminfo、/proc/loadavg 在初始化时打开并保持打开，每次采集用 preadv 从偏移0
+    读入预先分配的缓冲区，只读取需要的开头部分（/proc/stat 只需第一行汇总，不读取每核和中断统计）。
+    数字直接从缓冲区逐字节扫描到预先分配的 array 中，不经过 bytes、split 和 int() 转换；
+    MemTotal、MemAvailable 的位置在初始化时查找一次，之后只校验标签是否仍在原位置。
+    CPU累计时间在两个数组之间交替保存，计算增量时不创建新的容器对象。
+
+    计算方式与psutil一致：CPU使用率 = (总时间增量 - idle - iowait增量) / 总时间增量，
+    内存已用 = MemTotal - MemAvailable。
+    """
+
+    def __init__(self, proc_root="/proc"):
+        self._stat_fd = os.open(os.path.join(proc_root, "stat"), os.O_RDONLY)
+        self._meminfo_fd = os.open(os.path.join(proc_root, "meminfo"), os.O_RDONLY)
+        self._loadavg_fd = os.open(os.path.join(proc_root, "loadavg"), os.O_RDONLY)
+        self._stat_buffer = bytearray(512)
+        self._meminfo_buffer = bytearray(512)
+        self._loadavg_buffer = bytearray(128)
+        self._stat_buffers = [self._stat_buffer]
+        self._meminfo_buffers = [self._meminfo_buffer]
+        self._loadavg_buffers = [self._loadavg_buffer]
+        self._previous = array("Q", bytes(8 * CPU_FIELDS))
+        self._current = array("Q", bytes(8 * CPU_FIELDS))
+        self._memory = array("Q", bytes(8 * 2))  # MemTotal, MemAvailable (kB)
+        self.values = array("d", bytes(8 * 8))
+        self._read = self._preadv if hasattr(os, "preadv") else self._pread
+
+        # MemAvailable 需要Linux 3.14及以上，老内核上无法与psutil的计算方式保持一致
+        length = self._read(self._meminfo_fd, self._meminfo_buffer, self._meminfo_buffers)
+        self._mem_total_at = self._meminfo_buffer.find(MEM_TOTAL_LABEL, 0, length)
+        self._mem_available_at = self._meminfo_buffer.find(MEM_AVAILABLE_LABEL, 0, length)
+        if self._mem_total_at < 0 or self._mem_available_at < 0:
+            self.close()
+            raise RuntimeError("/proc/meminfo 中没有 MemAvailable")
+        self._read_cpu(self._previous)
+
+    @staticmethod
+    def _preadv(fd, buffer, buffers):
+        return os.preadv(fd, buffers, 0)
+
+    @staticmethod
+    def _pread(fd, buffer, buffers):
+        data = os.pread(fd, len(buffer), 0)
+        buffer[:len(data)] = data
+        return len(data)
+
+    def _read_cpu(self, target):
+        # 第一行: "cpu  user nice system idle iowait irq softirq steal guest guest_nice"
+        length = self._read(self._stat_fd, self._stat_buffer, self._stat_buffers)
+        _scan_uints(self._stat_buffer, 3, length, target, 0, CPU_FIELDS)
+
+    def _locate(self, buffer, length, label, offset):
+        """标签仍在上次的位置时直接返回，否则（数值位数变化导致行长度变化）重新查找"""
+        if offset >= 0 and buffer.startswith(label, offset):
+            return offset
+        return buffer.find(label, 0, length)
+
+    def _read_meminfo(self):
+        buffer = self._meminfo_buffer
+        length = self._read(self._meminfo_fd, buffer, self._meminfo_buffers)
+        self._mem_total_at = self._locate(buffer, length, MEM_TOTAL_LABEL, self._mem_total_at)
+        self._mem_available_at = self._locate(buffer, length, MEM_AVAILABLE_LABEL, self._mem_available_at)
+        if self._mem_total_at < 0 or self._mem_available_at < 0:
+            return  # 读取不完整，保留上次的数值
+        _scan_uints(buffer, self._mem_total_at + len(MEM_TOTAL_LABEL), length, self._memory, 0, 1)
+        _scan_uints(buffer, self._mem_available_at + len(MEM_AVAILABLE_LABEL), length, self._memory, 1, 1)
+
+    def collect(self):
+        """
+        采集一次，结果写入 self.values 并返回该数组
+
+        Returns:
+            array: 按 CPU_PERCENT、MEM_TOTAL 等常量索引的数值；CPU使用率为距上次采集的平均值
+        """
+        values = self.values
+        current, previous = self._current, self._previous
+        self._read_cpu(current)
+        total_delta = 0
+        idle_delta = 0
+        for index in range(CPU_FIELDS):
+            delta = current[index] - previous[index] if current[index] >= previous[index] else 0
+            total_delta += delta
+            if index == 3 or index == 4:
+                idle_delta += delta
+        values[CPU_PERCENT] = round((total_delta - idle_delta) / total_delta * 100, 1) if total_delta else 0.0
+        # 交替使用两个数组，下次采集覆盖本次之前的读数
+        self._current, self._previous = previous, current
+
+        self._read_meminfo()
+        total = self._memory[0] * 1024
+        available = self._memory[1] * 1024
+        values[MEM_TOTAL] = total
+        values[MEM_AVAILABLE] = available
+        values[MEM_USED] = total - available
+        values[MEM_PERCENT] = round((total - available) / total * 100, 1) if total else 0.0
+
+        length = self._read(self._loadavg_fd, self._loadavg_buffer, self._loadavg_buffers)
+        _scan_decimals(self._loadavg_buffer, 0, length, values, LOAD_1, 3)
+        return values
+
+    def close(self):
+        for fd in (self._stat_fd, self._meminfo_fd, self._loadavg_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
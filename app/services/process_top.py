@@ -0,0 +1,131 @@
+import time
+import heapq
+import logging
+import threading
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# 每次扫描只读取会变化的字段，进程名和用户在进程首次出现时读取一次
+SCAN_ATTRS = ["cpu_times", "memory_info"]
+
+
+class ProcessTop:
+    """
+    进程资源占用排行
+
+    每次扫描用 psutil.process_iter(attrs=...) 遍历进程（内部以oneshot批量读取），按PID缓存上次扫描的CPU时间，
+    CPU使用率为两次扫描之间的CPU时间增量 / 经过的时间（单核满载为100%，多线程进程可以超过100%）。
+    PID被复用时按进程创建时间区分，已退出进程的缓存在扫描后清理。
+    """
+
+    def __init__(self, top_n=5):
+        self.top_n = top_n
+        self.memory_total = psutil.virtual_memory().total
+        self._cache = {}  # {pid: (创建时间, 进程名, 用户, 累计CPU时间)}
+        self._last_scan = None
+        self._processes = []  # 最近一次扫描的 [(pid, 进程名, 用户, CPU%, 常驻内存)]
+        self._lock = threading.Lock()
+        self.stats = {"scans": 0, "processes": 0, "last_scan_seconds": None}
+
+    def scan(self):
+        """扫描一次全部进程，更新CPU时间缓存和排行数据"""
+        start_time = time.perf_counter()
+        now = time.monotonic()
+        elapsed = now - self._last_scan if self._last_scan is not None else None
+        cache = self._cache
+        new_cache = {}
+        processes = []
+        for proc in psutil.process_iter(attrs=SCAN_ATTRS, ad_value=None):
+            info = proc.info
+            cpu_times, memory_info = info["cpu_times"], info["memory_info"]
+            if cpu_times is None or memory_info is None:
+                # 无权限读取或扫描中途退出的进程
+                continue
+            pid = proc.pid
+            cpu_total = cpu_times.user + cpu_times.system
+            try:
+                create_time = proc.create_time()
+                cached = cache.get(pid)
+                if cached is None or cached[0] != create_time:
+                    cached = (create_time, proc.name(), self._username(proc), None)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            previous_total = cached[3]
+            cpu_percent = 0.0
+            if elapsed and previous_total is not None:
+                cpu_percent = max(0.0, cpu_total - previous_total) / elapsed * 100
+            new_cache[pid] = (cached[0], cached[1], cached[2], cpu_total)
+            processes.append((pid, cached[1], cached[2], cpu_percent, memory_info.rss))
+
+        scan_seconds = time.perf_counter() - start_time
+        with self._lock:
+            self._cache = new_cache
+            self._last_scan = now
+            self._processes = processes
+            self.stats.update({
+                "scans": self.stats["scans"] + 1,
+                "processes": len(processes),
+                "last_scan_seconds": round(scan_seconds, 4)
+            })
+        return processes
+
+    @staticmethod
+    def _username(proc):
+        try:
+            return proc.username()
+        except (psutil.AccessDenied, KeyError):
+            # 容器中的UID可能没有对应的用户名
+            return None
+
+    def top(self, resource="cpu", n=None):
+        """
+        最近一次扫描中占用最高的进程
+
+        Args:
+            resource: "cpu" 或 "memory"
+            n: 返回的进程数，默认 top_n
+
+        Returns:
+            list: [{"pid", "name", "user", "cpu_percent", "memory_rss", "memory_percent"}]
+        """
+        with self._lock:
+            processes = self._processes
+        if resource == "cpu":
+            # 空闲进程不参与CPU排行
+            processes = [item for item in processes if item[3] > 0]
+            key = lambda item: item[3]
+        else:
+            key = lambda item: item[4]
+        return [
+            {
+                "pid": pid,
+                "name": name,
+                "user": user,
+                "cpu_percent": round(cpu_percent, 1),
+                "memory_rss": rss,
+                "memory_percent": round(rss / self.memory_total * 100, 1)
+            }
+            for pid, name, user, cpu_percent, rss in heapq.nlargest(n or self.top_n, processes, key=key)
+        ]
+
+    def format_top(self, resource="cpu", n=None):
+        """通知中使用的进程排行文本，没有扫描数据时返回空字符串"""
+        entries = self.top(resource, n)
+        if not entries:
+            return ""
+        title = "CPU" if resource == "cpu" else "内存"
+        lines = [f"\n\n{title}占用最高的进程:"]
+        for entry in entries:
+            lines.append(
+                f"- PID {entry['pid']} {entry['name']} ({entry['user'] or '-'}): "
+                f"CPU {entry['cpu_percent']:.1f}%, 内存 {entry['memory_rss'] / (1024 * 1024):.1f} MB ({entry['memory_percent']:.1f}%)"
+            )
+        return "\n".join(lines)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats["top_n"] = self.top_n
+        return stats
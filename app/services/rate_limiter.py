@@ -0,0 +1,157 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    采用预约方式：取令牌时直接扣减，令牌不足时返回需要等待的时间，
+    多个调用方按调用顺序依次排队，不需要轮询。
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate  # 每秒补充的令牌数
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()  # 被服务端限流时推迟到限流结束的时间，之前不补充令牌
+
+    def reserve(self, now):
+        """预约一个令牌，返回需要等待的秒数"""
+        if now > self.updated_at:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+        self.tokens -= 1
+        available_at = self.updated_at + (-self.tokens / self.rate if self.tokens < 0 else 0)
+        return max(0.0, available_at - now)
+
+    def block_until(self, until):
+        """
+        服务端要求等待时，暂停发放令牌直到指定时间
+
+        整个发放计划推迟到 until：之后的预约从 until 开始按 rate 依次排开，
+        而不是在限流结束时同时发送再次触发429。
+        """
+        if until > self.updated_at:
+            self.updated_at = until
+            # 限流结束时只有一个令牌可用，已排队的预约仍占用各自的位置
+            self.tokens = min(self.tokens, 0) + 1
+
+
+class SendSchedule:
+    """
+    按秒分槽的发送计划
+
+    每个整秒最多安排 per_second 次发送。预约时给出期望的发送时间，该秒已满时顺延到下一个未满的秒，
+    因此限制的是实际发送时间，而不是预约时间：被单个聊天节流推迟的消息在它真正发送的那一秒占用名额。
+    """
+
+    def __init__(self, per_second):
+        self.per_second = per_second
+        self._slots = {}  # {整秒: 已安排的发送数}
+
+    def reserve(self, at, now):
+        """
+        预约一次在 at 或之后的发送
+
+        Returns:
+            float: 安排的发送时间
+        """
+        # 清理已经过去的秒
+        current = int(now)
+        for slot in [slot for slot in self._slots if slot < current]:
+            del self._slots[slot]
+        slot = int(at)
+        while self._slots.get(slot, 0) >= self.per_second:
+            slot += 1
+        self._slots[slot] = self._slots.get(slot, 0) + 1
+        return at if slot == int(at) else float(slot)
+
+
+class TelegramRateLimiter:
+    """
+    Telegram Bot API发送节流
+
+    全局约30条/秒，单个聊天约1条/秒，群组约20条/分钟；收到429时按retry_after暂停该聊天。
+    超出限额的消息在发送线程中排队等待，而不是直接失败。
+    """
+
+    def __init__(self, global_per_second=30, chat_per_second=1, group_per_minute=20, chat_burst=1):
+        self.global_schedule = SendSchedule(global_per_second)
+        self.chat_per_second = chat_per_second
+        self.group_per_minute = group_per_minute
+        self.chat_burst = chat_burst
+        self._chat_buckets = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "acquired": 0,
+            "paced": 0,  # 需要等待的消息数
+            "rate_limited": 0,  # 收到429的次数
+            "waiting": 0,  # 当前正在等待的消息数
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "last_wait_seconds": 0.0
+        }
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            # 群组和频道的chat_id为负数（配置中可能是字符串），限额更严格
+            if str(chat_id).startswith("-"):
+                bucket = TokenBucket(self.group_per_minute / 60.0, self.chat_burst)
+            else:
+                bucket = TokenBucket(self.chat_per_second, self.chat_burst)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    def reserve(self, chat_id):
+        """为一条消息预约发送时间，返回需要等待的秒数"""
+        now = time.monotonic()
+        with self._lock:
+            # 全局名额按单个聊天节流后的实际发送时间预约
+            chat_wait = self._chat_bucket(chat_id).reserve(now)
+            wait = self.global_schedule.reserve(now + chat_wait, now) - now
+            self.stats["acquired"] += 1
+            if wait > 0:
+                self.stats["paced"] += 1
+                self.stats["waiting"] += 1
+        return wait
+
+    def acquire(self, chat_id):
+        """
+        等待直到可以向指定聊天发送一条消息
+
+        Returns:
+            float: 实际等待的秒数
+        """
+        wait = self.reserve(chat_id)
+        if wait <= 0:
+            return 0.0
+        logger.info(f"Telegram发送节流: 聊天ID {chat_id} 等待 {wait:.2f} 秒")
+        time.sleep(wait)
+        with self._lock:
+            self.stats["waiting"] -= 1
+            self.stats["total_wait_seconds"] += wait
+            self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], wait)
+            self.stats["last_wait_seconds"] = wait
+        return wait
+
+    def penalize(self, chat_id, retry_after):
+        """收到429时，在retry_after秒内暂停向该聊天发送"""
+        with self._lock:
+            self._chat_bucket(chat_id).block_until(time.monotonic() + retry_after)
+            self.stats["rate_limited"] += 1
+        logger.warning(f"Telegram限流: 聊天ID {chat_id} 需等待 {retry_after} 秒")
+
+    def get_stats(self):
+        """获取节流统计，包括消息在节流队列中的等待时间"""
+        with self._lock:
+            stats = dict(self.stats)
+        paced = stats["paced"]
+        stats["avg_wait_seconds"] = round(stats["total_wait_seconds"] / paced, 3) if paced else 0.0
+        for key in ("total_wait_seconds", "max_wait_seconds", "last_wait_seconds"):
+            stats[key] = round(stats[key], 3)
+        return stats
@@ -2,10 +2,13 @@ import logging
 import requests
 import time
 import json
+import threading
 from datetime import datetime
 
 from app.config.settings import CONFIG
 from app.services.notifier import notifier
+from app.services.notification_queue import notification_queue
+from app.services.templates import message_templates
 
 logger = logging.getLogger(__name__)
 
@@ -18,17 +21,17 @@ class ServiceChecker:
         self.timeout = 10
         self.status_history = {}
         self.default_interval = self.config.get("interval_minutes", 5)
+        # 规范化配置文件中的端点，便于后续比较配置变化
+        for endpoint in self.endpoints:
+            endpoint.update(self._build_endpoint_from_dict(endpoint))
+        # 端点名称索引，避免按名称查找时遍历整个列表
+        self._endpoint_index = {endpoint["name"]: endpoint for endpoint in self.endpoints}
+        self._lock = threading.Lock()
         
-    def add_endpoint(self, name, url, expected_status=200, expected_content=None, headers=None, 
-                     method="GET", body=None, interval_minutes=None, json_check=None):
-        """添加服务检查端点"""
-        # 检查是否已存在同名端点
-        for existing_endpoint in self.endpoints:
-            if existing_endpoint["name"] == name:
-                logger.info(f"端点已存在，跳过添加: {name}")
-                return
-                
-        endpoint = {
+    def _build_endpoint(self, name, url, expected_status=200, expected_content=None, headers=None,
+                        method="GET", body=None, interval_minutes=None, json_check=None):
+        """构建规范化的端点配置"""
+        return {
             "name": name,
             "url": url,
             "expected_status": expected_status,
@@ -39,9 +42,144 @@ class ServiceChecker:
             "interval_minutes": interval_minutes or self.default_interval,
             "json_check": json_check
         }
-        self.endpoints.append(endpoint)
+
+    def _build_endpoint_from_dict(self, data):
+        """从配置字典构建规范化的端点配置"""
+        return self._build_endpoint(
+            name=data["name"],
+            url=data["url"],
+            expected_status=data.get("expected_status", 200),
+            expected_content=data.get("expected_content"),
+            headers=data.get("headers"),
+            method=data.get("method", "GET"),
+            body=data.get("body"),
+            interval_minutes=data.get("interval_minutes"),
+            json_check=data.get("json_check")
+        )
+
+    def add_endpoint(self, name, url, expected_status=200, expected_content=None, headers=None, 
+                     method="GET", body=None, interval_minutes=None, json_check=None):
+        """添加服务检查端点"""
+        with self._lock:
+            # 检查是否已存在同名端点
+            if name in self._endpoint_index:
+                logger.info(f"端点已存在，跳过添加: {name}")
+                return
+
+            endpoint = self._build_endpoint(name, url, expected_status, expected_content, headers,
+                                            method, body, interval_minutes, json_check)
+            self.endpoints.append(endpoint)
+            self._endpoint_index[name] = endpoint
         logger.info(f"添加服务检查端点: {name} - {url} ({method}), 检查间隔: {endpoint['interval_minutes']}分钟")
 
+    def validate_endpoint_config(self, data):
+        """
+        校验端点配置
+        
+        Args:
+            data: 端点配置字典
+            
+        Returns:
+            list: 错误信息列表，为空表示校验通过
+        """
+        if not isinstance(data, dict):
+            return ["端点配置必须是JSON对象"]
+
+        errors = []
+        missing_fields = [field for field in ("name", "url") if not data.get(field)]
+        if missing_fields:
+            errors.append(f"缺少必要字段: {', '.join(missing_fields)}")
+        if "name" in data and not isinstance(data["name"], str):
+            errors.append("name必须是字符串")
+        url = data.get("url")
+        if url and (not isinstance(url, str) or not url.startswith(("http://", "https://"))):
+            errors.append("url必须以http://或https://开头")
+        if str(data.get("method", "GET")).upper() not in ("GET", "POST"):
+            errors.append(f"不支持的请求方法: {data.get('method')}")
+        if not isinstance(data.get("expected_status", 200), int):
+            errors.append("expected_status必须是整数")
+        interval = data.get("interval_minutes")
+        if interval is not None and (not isinstance(interval, (int, float)) or interval <= 0):
+            errors.append("interval_minutes必须是大于0的数字")
+        if data.get("headers") is not None and not isinstance(data["headers"], dict):
+            errors.append("headers必须是JSON对象")
+        json_check = data.get("json_check")
+        if json_check is not None and (not isinstance(json_check, dict)
+                                       or "path" not in json_check or "expected_value" not in json_check):
+            errors.append("json_check必须包含path和expected_value")
+        return errors
+
+    def bulk_upsert_endpoints(self, items):
+        """
+        批量添加或更新端点，先校验全部条目，全部通过后才统一应用
+        
+        Args:
+            items: 端点配置列表
+            
+        Returns:
+            (bool, list, dict): (是否已应用, 每个条目的结果, 变更摘要)
+                变更摘要格式: {"created": [端点], "updated": [端点], "interval_changed": [端点]}
+        """
+        results = []
+        seen_names = set()
+        valid = True
+        for index, item in enumerate(items):
+            errors = self.validate_endpoint_config(item)
+            name = item.get("name") if isinstance(item, dict) else None
+            if isinstance(name, str):
+                if name in seen_names:
+                    errors.append(f"批量请求中存在重复的端点名称: {name}")
+                seen_names.add(name)
+            if errors:
+                valid = False
+            results.append({"index": index, "name": name, "status": "invalid" if errors else "valid", "errors": errors})
+
+        changes = {"created": [], "updated": [], "interval_changed": []}
+        if not valid:
+            return False, results, changes
+
+        with self._lock:
+            for result, item in zip(results, items):
+                endpoint = self._build_endpoint_from_dict(item)
+                existing = self._endpoint_index.get(endpoint["name"])
+                if existing is None:
+                    self.endpoints.append(endpoint)
+                    self._endpoint_index[endpoint["name"]] = endpoint
+                    changes["created"].append(endpoint)
+                    result["status"] = "created"
+                elif all(existing.get(key) == value for key, value in endpoint.items()):
+                    result["status"] = "unchanged"
+                else:
+                    interval_changed = self.get_endpoint_interval(existing) != endpoint["interval_minutes"]
+                    # 原地更新，正在运行的检查任务会读取到新配置
+                    existing.update(endpoint)
+                    changes["updated"].append(existing)
+                    if interval_changed:
+                        changes["interval_changed"].append(existing)
+                    result["status"] = "updated"
+
+        logger.info(f"批量更新端点完成: 新增 {len(changes['created'])} 个, 更新 {len(changes['updated'])} 个")
+        return True, results, changes
+
+    def remove_endpoint(self, name):
+        """
+        移除服务检查端点
+        
+        Args:
+            name: 端点名称
+            
+        Returns:
+            bool: 是否移除成功
+        """
+        with self._lock:
+            endpoint = self._endpoint_index.pop(name, None)
+            if endpoint is None:
+                return False
+            self.endpoints.remove(endpoint)
+            self.status_history.pop(name, None)
+        logger.info(f"已移除服务检查端点: {name}")
+        return True
+
     def get_endpoint_interval(self, endpoint):
         """
         获取端点的检查间隔时间
@@ -56,9 +194,9 @@ class ServiceChecker:
             return endpoint.get("interval_minutes", self.default_interval)
         elif isinstance(endpoint, str):
             # 通过名称查找端点
-            for ep in self.endpoints:
-                if ep["name"] == endpoint:
-                    return ep.get("interval_minutes", self.default_interval)
+            ep = self._endpoint_index.get(endpoint)
+            if ep:
+                return ep.get("interval_minutes", self.default_interval)
         return self.default_interval
 
     def _check_json_path(self, json_data, path, expected_value):
@@ -173,6 +311,26 @@ class ServiceChecker:
         except requests.RequestException as e:
             return False, f"服务请求异常: {str(e)}"
     
+    def get_endpoint(self, name):
+        """
+        通过名称获取端点配置
+        
+        Args:
+            name: 端点名称
+            
+        Returns:
+            dict: 端点配置，不存在时返回None
+        """
+        return self._endpoint_index.get(name)
+
+    def record_status(self, name, is_ok, details):
+        """记录端点的最新检查结果"""
+        self.status_history[name] = {
+            "is_ok": is_ok,
+            "details": details,
+            "last_check": datetime.now()
+        }
+
     def check_endpoint_by_name(self, name):
         """
         通过名称检查指定的端点
@@ -183,9 +341,9 @@ class ServiceChecker:
         Returns:
             (bool, str): (是否正常, 详细信息) 或 (False, "端点不存在")
         """
-        for endpoint in self.endpoints:
-            if endpoint["name"] == name:
-                return self.check_service(endpoint)
+        endpoint = self.get_endpoint(name)
+        if endpoint:
+            return self.check_service(endpoint)
         return False, "端点不存在"
 
     def run_checks(self):
@@ -219,19 +377,24 @@ class ServiceChecker:
                     status_change = "恢复正常" if is_ok else "变为异常"
                     logger.info(f"检测到服务 {name} 状态变化: {status_change}")
                     
-                    # 构建通知消息
-                    message = f"服务 {name} ({method} {url}) {status_change}\n详情: {details}"
-                    subject = f"服务{'已恢复' if is_ok else '异常'}: {name}"
+                    # 按模板构建通知消息
+                    template_name = "endpoint_recovered" if is_ok else "endpoint_down"
+                    values = {"name": name, "target": f"{name} ({method} {url})", "details": details}
+                    subject, message = message_templates.render(template_name, values)
                     level = "info" if is_ok else "error"
                     
                     # 发送通知
-                    notifier.send_notification(subject, message, level)
+                    notification_queue.enqueue(subject, message, level, resource=name,
+                                               source="endpoint", state="up" if is_ok else "down",
+                                               template=(template_name, values))
             elif not is_ok:
                 # 首次检查就发现异常，也发送通知
                 logger.info(f"首次检查发现服务 {name} 异常")
-                message = f"服务 {name} ({method} {url}) 异常\n详情: {details}"
-                subject = f"服务异常: {name}"
-                notifier.send_notification(subject, message, "error")
+                values = {"name": name, "target": f"{name} ({method} {url})", "details": details}
+                subject, message = message_templates.render("endpoint_down", values)
+                notification_queue.enqueue(subject, message, "error", resource=name,
+                                           source="endpoint", state="down",
+                                           template=("endpoint_down", values))
             
             # 更新状态历史
             self.status_history[name] = {
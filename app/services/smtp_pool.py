@@ -0,0 +1,183 @@
+import time
+import smtplib
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from app.services.delivery_metrics import delivery_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PooledSMTPConnection:
+    """连接池中的一个已认证SMTP会话"""
+
+    def __init__(self, server):
+        self.server = server
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.messages_sent = 0
+
+    def idle_seconds(self):
+        return time.time() - self.last_used
+
+    def is_alive(self):
+        """通过NOOP检查连接是否仍然可用"""
+        try:
+            code, _ = self.server.noop()
+            return code == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def close(self):
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            try:
+                self.server.close()
+            except Exception:
+                pass
+
+
+class SMTPConnectionPool:
+    """
+    可复用的SMTP连接池
+
+    每个连接只在创建时完成一次连接、STARTTLS和登录，之后在多封邮件之间复用。
+    空闲超过noop_interval的连接在使用前先发送NOOP检查存活，空闲超过idle_timeout的连接会被关闭；
+    发送时遇到SMTPServerDisconnected会丢弃该连接并重连一次。
+    """
+
+    def __init__(self, email_config, max_size=2, idle_timeout=60, noop_interval=10, timeout=30, enabled=True):
+        self.email_config = email_config
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.noop_interval = noop_interval
+        self.timeout = timeout
+        self.enabled = enabled
+        self._idle = deque()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self.stats = {
+            "connections_opened": 0,
+            "connections_reused": 0,
+            "reconnects": 0,
+            "stale_discarded": 0
+        }
+
+    def _connect(self):
+        """建立新的SMTP连接并登录"""
+        config = self.email_config
+        start_time = time.perf_counter()
+        logger.info(f"连接SMTP服务器: {config['smtp_server']}:{config['smtp_port']}")
+        if config["smtp_port"] == 465:
+            logger.info("使用SSL安全连接")
+            server = smtplib.SMTP_SSL(config["smtp_server"], config["smtp_port"], timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(config["smtp_server"], config["smtp_port"], timeout=self.timeout)
+            if config.get("use_tls", True):
+                logger.info("使用普通连接并启用TLS")
+                server.starttls()  # 启用TLS
+            else:
+                logger.info("使用普通连接，未启用TLS")
+
+        try:
+            if config["username"] and config["password"]:
+                logger.info(f"使用用户名 {config['username']} 登录SMTP服务器")
+                server.login(config["username"], config["password"])
+            else:
+                logger.info("未配置SMTP用户名或密码，使用匿名登录")
+        except Exception:
+            server.close()
+            raise
+
+        self.stats["connections_opened"] += 1
+        delivery_metrics.observe("smtp_connect_seconds", time.perf_counter() - start_time, channel="email")
+        return PooledSMTPConnection(server)
+
+    def _acquire(self):
+        """获取一个可用连接，优先复用空闲连接"""
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    return self._connect()
+                idle = conn.idle_seconds()
+                if idle >= self.idle_timeout:
+                    conn.close()
+                    self.stats["stale_discarded"] += 1
+                    continue
+                if idle >= self.noop_interval and not conn.is_alive():
+                    conn.close()
+                    self.stats["stale_discarded"] += 1
+                    continue
+                self.stats["connections_reused"] += 1
+                return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, conn, reusable):
+        try:
+            if reusable and self.enabled:
+                conn.last_used = time.time()
+                with self._lock:
+                    self._idle.append(conn)
+            else:
+                conn.close()
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """借出一个已认证的连接，出错时不放回连接池"""
+        conn = self._acquire()
+        reusable = False
+        try:
+            yield conn
+            reusable = True
+        finally:
+            self._release(conn, reusable)
+
+    def sendmail(self, sender, recipients, message):
+        """
+        通过连接池发送邮件，连接被服务器断开时重连并重试一次
+
+        Args:
+            sender: 发件人
+            recipients: 收件人列表
+            message: 邮件内容字符串
+
+        Returns:
+            dict: 被服务器拒绝的收件人 {收件人: (错误码, 错误信息)}，全部接收时为空
+        """
+        for attempt in range(2):
+            try:
+                with self.connection() as conn:
+                    start_time = time.perf_counter()
+                    refused = conn.server.sendmail(sender, recipients, message)
+                    delivery_metrics.observe("smtp_send_seconds", time.perf_counter() - start_time, channel="email")
+                    conn.messages_sent += 1
+                return refused
+            except smtplib.SMTPServerDisconnected:
+                if attempt == 1:
+                    raise
+                self.stats["reconnects"] += 1
+                logger.warning("SMTP连接已被服务器断开，正在重新连接")
+
+    def close_all(self):
+        """关闭所有空闲连接"""
+        with self._lock:
+            conns, self._idle = list(self._idle), deque()
+        for conn in conns:
+            conn.close()
+
+    def get_stats(self):
+        with self._lock:
+            idle = len(self._idle)
+        stats = dict(self.stats)
+        stats.update({"idle": idle, "max_size": self.max_size, "enabled": self.enabled})
+        return stats
@@ -2,21 +2,164 @@ import logging
 import psutil
 import platform
 import os
+import time
 from datetime import datetime
 
 from app.config.settings import CONFIG
 from app.services.notifier import notifier
+from app.services.notification_queue import notification_queue
+from app.services.alert_dedup import alert_deduplicator
+from app.services.templates import message_templates
+from app.services.system_sampler import SystemSampler
+from app.services.timeseries import TimeSeriesStore, DEFAULT_TIERS
+from app.services.threshold_rules import RuleEngine
+from app.services.mount_table import MountTable
+from app.services.process_top import ProcessTop
+from app.services.io_rates import IORateCollector
+from app.services.disk_forecast import DiskForecaster, format_duration
+from app.services.cgroup_monitor import CgroupCollector
+from app.services import proc_collector
 
 logger = logging.getLogger(__name__)
 
+MB = 1024 * 1024
+
 class SystemMonitor:
     """系统资源监控器，监控CPU、内存和磁盘使用情况"""
     
     def __init__(self):
         self.config = CONFIG["system_monitoring"]
         self.thresholds = self.config["thresholds"]
-        self.last_notification_time = {}  # 上次通知时间记录
-        self.notification_cooldown = 1800  # 通知冷却时间（秒）
+        self.cpu_count = psutil.cpu_count()
+
+        # 资源来源：host 使用psutil的整机数据；cgroup 读取容器所在cgroup的内存、CPU配额和PSI
+        self.cgroup = None
+        source = self.config.get("source", "host")
+        if source == "auto":
+            source = "cgroup" if self._in_container() else "host"
+        if source == "cgroup":
+            try:
+                self.cgroup = CgroupCollector()
+            except RuntimeError as e:
+                logger.warning(f"{str(e)}，改为使用整机数据")
+
+        # 整机数据的采集方式：psutil，或保持/proc文件打开直接解析的低开销采集器（适合秒级采样）
+        self.proc_collector = None
+        if self.config.get("collector", "psutil") == "proc":
+            try:
+                self.proc_collector = proc_collector.ProcCollector()
+            except (OSError, RuntimeError) as e:
+                logger.warning(f"无法使用/proc采集器: {str(e)}，改为使用psutil")
+
+        # 磁盘分区列表缓存：挂载表变化时才重新枚举，并按文件系统类型和挂载点过滤
+        disk_config = self.config.get("disks", {})
+        self.mount_table = MountTable(
+            include_fstypes=disk_config.get("include_fstypes"),
+            exclude_fstypes=disk_config.get("exclude_fstypes"),
+            include_paths=disk_config.get("include_paths"),
+            exclude_paths=disk_config.get("exclude_paths"),
+            refresh_seconds=disk_config.get("refresh_seconds", 60)
+        )
+
+        # 磁盘I/O和网卡速率：按设备缓存上次的累计计数器，每次采样计算增量
+        io_config = self.config.get("io", {})
+        self.io_rates = None
+        if io_config.get("enabled", True):
+            self.io_rates = IORateCollector(
+                disk_include=io_config.get("disk_include"),
+                disk_exclude=io_config.get("disk_exclude"),
+                nic_include=io_config.get("nic_include"),
+                nic_exclude=io_config.get("nic_exclude"),
+                include_partitions=io_config.get("include_partitions", False)
+            )
+
+        # 后台采样：阈值检查和状态接口读取最近的快照，不在调用方线程中阻塞采样
+        sampler_config = self.config.get("sampler", {})
+        self.sampler = SystemSampler(self.collect_sample, sampler_config.get("interval_seconds", 10))
+        # 非阻塞的cpu_percent返回距上次调用的平均值，先调用一次作为起点
+        psutil.cpu_percent(interval=None)
+
+        # 采样历史：每份快照写入多分辨率时间序列，用于趋势查询
+        history_config = self.config.get("history", {})
+        self.history = None
+        if history_config.get("enabled", True):
+            self.history = TimeSeriesStore(
+                tiers=history_config.get("tiers", DEFAULT_TIERS),
+                max_series=history_config.get("max_series", 500)
+            )
+            self.sampler.add_listener(self._record_history)
+
+        # 进程排行：每次采样扫描一次进程，CPU或内存超标告警中附带占用最高的进程，须在规则判定之前更新
+        process_config = self.config.get("processes", {})
+        self.process_top = None
+        if process_config.get("enabled", True):
+            self.process_top = ProcessTop(top_n=process_config.get("top_n", 5))
+            self.sampler.add_listener(self._scan_processes)
+
+        # 磁盘写满预测：按已用空间历史的增长速率估计写满时间，在预计写满前告警
+        self.forecast_config = self.config.get("forecast", {})
+        self.forecaster = None
+        self._forecasts = {}
+        self._forecast_at = 0
+        if self.forecast_config.get("enabled", True) and self.history is not None:
+            self.forecaster = DiskForecaster(
+                window_seconds=self.forecast_config.get("window_hours", 6) * 3600,
+                min_points=self.forecast_config.get("min_points", 12),
+                min_span_seconds=self.forecast_config.get("min_span_minutes", 30) * 60
+            )
+            self.sampler.add_listener(self._update_forecasts)
+
+        # 持续超标规则：每次采样增量更新，超标状态持续满足规则时才告警
+        self.rule_engine = RuleEngine(self.config.get("rules") or self._default_rules())
+        self.sampler.add_listener(self._evaluate_rules)
+
+    @staticmethod
+    def _in_container():
+        """是否运行在容器中（Docker、Podman或Kubernetes）"""
+        return (os.path.exists("/.dockerenv") or os.path.exists("/run/.containerenv")
+                or "KUBERNETES_SERVICE_HOST" in os.environ)
+
+    def _default_rules(self):
+        """
+        未配置 rules 时，按 thresholds 生成默认规则：最近6次采样（默认1分钟）的平均值超过阈值
+
+        磁盘I/O和网卡的阈值未配置（None）时不生成对应规则；
+        forecast.replace_percent_threshold 为true时磁盘只按写满预测告警，不生成使用率规则。
+        """
+        rules = {
+            "cpu": {"metric": "cpu.percent", "threshold": self.thresholds["cpu_percent"], "resource": "CPU"},
+            "memory": {"metric": "memory.percent", "threshold": self.thresholds["memory_percent"], "resource": "内存"},
+            "disk": {
+                "metric": "disk.percent:*",
+                "threshold": self.thresholds["disk_percent"],
+                "resource": "磁盘 ({instance})",
+                "window": 3
+            }
+        }
+        rate_rules = (
+            # (规则名, thresholds中的键, 指标, 资源名, 标签, 单位)
+            ("disk_busy", "disk_busy_percent", "disk.busy_percent:*", "磁盘I/O ({instance})", "繁忙度", "%"),
+            ("disk_iops", "disk_iops", "disk.iops:*", "磁盘IOPS ({instance})", "", " 次/秒"),
+            ("disk_throughput", "disk_mb_per_sec", "disk.mb_per_sec:*", "磁盘吞吐 ({instance})", "", " MB/s"),
+            ("net_util", "net_util_percent", "net.util_percent:*", "网卡带宽 ({instance})", "使用率", "%"),
+            ("net_throughput", "net_mb_per_sec", "net.mb_per_sec:*", "网卡流量 ({instance})", "", " MB/s"),
+            ("net_errors", "net_errors_per_sec", "net.errors_per_sec:*", "网卡错误包 ({instance})", "", " 个/秒"),
+            ("net_drops", "net_drops_per_sec", "net.drops_per_sec:*", "网卡丢包 ({instance})", "", " 个/秒"),
+            # 以下指标只在按cgroup采集时存在
+            ("cpu_throttled", "cpu_throttled_percent", "cgroup.cpu_throttled_percent", "CPU配额", "限流比例", "%"),
+            ("psi_cpu", "psi_cpu_some_avg10", "psi.cpu.some_avg10", "CPU压力", "(PSI some)", "%"),
+            ("psi_memory", "psi_memory_full_avg10", "psi.memory.full_avg10", "内存压力", "(PSI full)", "%"),
+            ("psi_io", "psi_io_full_avg10", "psi.io.full_avg10", "I/O压力", "(PSI full)", "%")
+        )
+        for name, key, metric, resource, label, unit in rate_rules:
+            threshold = self.thresholds.get(key)
+            if threshold is not None:
+                rules[name] = {
+                    "metric": metric, "threshold": threshold, "resource": resource, "label": label, "unit": unit
+                }
+        if self.forecast_config.get("enabled", True) and self.forecast_config.get("replace_percent_threshold", False):
+            del rules["disk"]
+        return rules
     
     def get_system_info(self):
         """获取系统基本信息"""
@@ -28,48 +171,259 @@ class SystemMonitor:
             "python_version": platform.python_version()
         }
     
-    def get_cpu_usage(self):
+    def collect_sample(self):
+        """
+        采集一次CPU、内存和磁盘使用情况，由后台采样线程调用
+
+        CPU使用率为距上次采样的平均值，不需要阻塞等待。
+        """
+        cgroup = self.cgroup.collect() if self.cgroup else None
+        proc = self.proc_collector.collect() if self.proc_collector else None
+        if cgroup and cgroup["memory"]:
+            memory = cgroup["memory"]
+        elif proc:
+            memory = {
+                "total": int(proc[proc_collector.MEM_TOTAL]),
+                "available": int(proc[proc_collector.MEM_AVAILABLE]),
+                "percent": proc[proc_collector.MEM_PERCENT],
+                "used": int(proc[proc_collector.MEM_USED])
+            }
+        else:
+            virtual_memory = psutil.virtual_memory()
+            memory = {
+                "total": virtual_memory.total,
+                "available": virtual_memory.available,
+                "percent": virtual_memory.percent,
+                "used": virtual_memory.used
+            }
+        if cgroup and cgroup["cpu"]:
+            cpu = {"percent": cgroup["cpu"]["percent"], "count": cgroup["cpu"]["count"]}
+        elif proc:
+            cpu = {"percent": proc[proc_collector.CPU_PERCENT], "count": self.cpu_count}
+        else:
+            cpu = {"percent": psutil.cpu_percent(interval=None), "count": self.cpu_count}
+        disk_start = time.perf_counter()
+        disks = self.mount_table.collect()
+        disk_seconds = time.perf_counter() - disk_start
+        disk_io = self.io_rates.collect_disks() if self.io_rates else {}
+        network = self.io_rates.collect_network() if self.io_rates else {}
+        return {
+            "timestamp": time.time(),
+            "source": f"cgroup v{cgroup['version']}" if cgroup else "host",
+            "cpu": cpu,
+            "memory": memory,
+            "load": [proc[proc_collector.LOAD_1], proc[proc_collector.LOAD_5], proc[proc_collector.LOAD_15]]
+            if proc else list(psutil.getloadavg()),
+            "disks": disks,
+            "disk_collect_seconds": round(disk_seconds, 4),
+            "disk_io": disk_io,
+            "network": network,
+            "cgroup": {
+                "cpu_limit_cores": cgroup["cpu"]["limit_cores"] if cgroup["cpu"] else None,
+                "cpu_throttled_percent": cgroup["cpu"]["throttled_percent"] if cgroup["cpu"] else None,
+                "memory_limit": cgroup["memory"]["limit"] if cgroup["memory"] else None,
+                "pressure": cgroup["pressure"],
+                "psi_scope": cgroup["psi_scope"]
+            } if cgroup else None
+        }
+
+    @staticmethod
+    def _snapshot_values(snapshot):
+        """快照中的指标，指标名与历史记录和规则中使用的一致"""
+        values = {
+            "cpu.percent": snapshot["cpu"]["percent"],
+            "memory.percent": snapshot["memory"]["percent"]
+        }
+        for partition in snapshot["disks"]:
+            values[f"disk.percent:{partition['mountpoint']}"] = partition["percent"]
+            values[f"disk.used_bytes:{partition['mountpoint']}"] = partition["used"]
+        for device, rates in snapshot.get("disk_io", {}).items():
+            values[f"disk.busy_percent:{device}"] = rates["busy_percent"]
+            values[f"disk.iops:{device}"] = rates["read_iops"] + rates["write_iops"]
+            values[f"disk.mb_per_sec:{device}"] = (rates["read_bytes_per_sec"] + rates["write_bytes_per_sec"]) / MB
+        for nic, rates in snapshot.get("network", {}).items():
+            if rates["util_percent"] is not None:
+                values[f"net.util_percent:{nic}"] = rates["util_percent"]
+            values[f"net.mb_per_sec:{nic}"] = max(rates["sent_bytes_per_sec"], rates["recv_bytes_per_sec"]) / MB
+            values[f"net.errors_per_sec:{nic}"] = rates["errors_per_sec"]
+            values[f"net.drops_per_sec:{nic}"] = rates["drops_per_sec"]
+        cgroup = snapshot.get("cgroup")
+        if cgroup:
+            if cgroup["cpu_throttled_percent"] is not None:
+                values["cgroup.cpu_throttled_percent"] = cgroup["cpu_throttled_percent"]
+            for resource, pressure in cgroup["pressure"].items():
+                for kind, averages in pressure.items():
+                    values[f"psi.{resource}.{kind}_avg10"] = averages["avg10"]
+        return values
+
+    def _record_history(self, snapshot):
+        """把快照中的指标写入时间序列"""
+        self.history.record(snapshot["timestamp"], self._snapshot_values(snapshot))
+
+    def _scan_processes(self, snapshot):
+        """扫描进程，更新CPU时间增量和排行"""
+        self.process_top.scan()
+
+    def _top_processes_text(self, metric):
+        """CPU和内存告警附带的进程排行，其他指标返回空字符串"""
+        if self.process_top is None:
+            return ""
+        if metric == "cpu.percent":
+            return self.process_top.format_top("cpu")
+        if metric == "memory.percent":
+            return self.process_top.format_top("memory")
+        return ""
+
+    def get_top_processes(self, resource="cpu", n=None):
+        """获取最近一次扫描中CPU或内存占用最高的进程，未启用进程排行时返回None"""
+        if self.process_top is None:
+            return None
+        return {
+            "resource": resource,
+            "processes": self.process_top.top(resource, n),
+            "stats": self.process_top.get_stats()
+        }
+
+    def _evaluate_rules(self, snapshot):
+        """用新快照更新阈值规则，进入超标时立即告警，恢复后清除告警记录以便再次超标时立即通知"""
+        events = self.rule_engine.evaluate(self._snapshot_values(snapshot))
+        if not events:
+            return
+        now = datetime.fromtimestamp(snapshot["timestamp"])
+        for rule, event in events:
+            if event == "clear":
+                logger.info(f"{rule.resource}{rule.label}已恢复: {rule.current:.1f}{rule.unit} ({rule.describe()})")
+                alert_deduplicator.forget("system", rule.resource)
+            elif self.config["enabled"] and notifier.active:
+                # 备用节点只更新规则状态，不发送通知
+                self._notify_overload(rule.resource, rule.current, rule.threshold, now, rule.describe(), rule.metric,
+                                      rule.label, rule.unit)
+
+    def get_mount_status(self):
+        """获取磁盘分区列表缓存的状态和当前监控的挂载点"""
+        return self.mount_table.get_stats()
+
+    def _update_forecasts(self, snapshot):
+        """按 forecast.interval_seconds 的间隔重新估计各挂载点的写满时间，预计写满时间在 alert_hours 内时告警"""
+        timestamp = snapshot["timestamp"]
+        if timestamp - self._forecast_at < self.forecast_config.get("interval_seconds", 300):
+            return
+        self._forecast_at = timestamp
+        start = timestamp - self.forecaster.window_seconds
+        alert_seconds = self.forecast_config.get("alert_hours", 24) * 3600
+        forecasts = {}
+        for partition in snapshot["disks"]:
+            mountpoint = partition["mountpoint"]
+            series = self.history.query(f"disk.used_bytes:{mountpoint}", start=start)
+            if series is None:
+                continue
+            result = self.forecaster.forecast(series["timestamps"], series["avg"], partition["free"])
+            if result is None:
+                continue
+            result.update({"mountpoint": mountpoint, "percent": partition["percent"], "free": partition["free"]})
+            forecasts[mountpoint] = result
+
+            resource = f"磁盘写满预测 ({mountpoint})"
+            time_to_full = result["time_to_full_seconds"]
+            if time_to_full is None or time_to_full > alert_seconds:
+                # 不再预计在告警时间内写满，清除告警记录以便再次预警时立即通知
+                alert_deduplicator.forget("system", resource)
+            elif self.config["enabled"] and notifier.active:
+                self._notify_forecast(resource, result, datetime.fromtimestamp(timestamp))
+        self._forecasts = forecasts
+
+    def _notify_forecast(self, resource, forecast, now):
+        """发送磁盘写满预警"""
+        if not alert_deduplicator.should_send("system", resource, "forecast"):
+            return
+        hostname = self.get_system_info()["hostname"]
+        time_to_full = forecast["time_to_full_seconds"]
+        values = {
+            "hostname": hostname,
+            "mountpoint": forecast["mountpoint"],
+            "percent": forecast["percent"],
+            "free": self.format_bytes(forecast["free"]),
+            "fill_rate": self.format_bytes(forecast["fill_rate_bytes_per_hour"]),
+            "eta": format_duration(time_to_full),
+            "full_time": datetime.fromtimestamp(now.timestamp() + time_to_full).strftime('%Y-%m-%d %H:%M'),
+            "span": format_duration(forecast["span_seconds"]),
+            "points": forecast["points"],
+            "time": now.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        subject, message = message_templates.render("disk_full_forecast", values)
+        notification_queue.enqueue(subject, message, "warning", resource=f"{hostname}:{resource}",
+                                   template=("disk_full_forecast", values))
+        logger.warning(f"{forecast['mountpoint']} 预计 {values['eta']}后写满 (增长 {values['fill_rate']}/小时)")
+
+    def get_disk_forecasts(self):
+        """获取各挂载点最近一次的写满预测"""
+        return [
+            dict(
+                forecast,
+                fill_rate_per_hour=self.format_bytes(max(forecast["fill_rate_bytes_per_hour"], 0)),
+                time_to_full=format_duration(forecast["time_to_full_seconds"])
+                if forecast["time_to_full_seconds"] is not None else None
+            )
+            for forecast in self._forecasts.values()
+        ]
+
+    def get_io_rates(self):
+        """获取最近一次采样的磁盘I/O和网卡速率，未启用时返回None"""
+        if self.io_rates is None:
+            return None
+        snapshot = self.get_snapshot()
+        return {
+            "timestamp": snapshot["timestamp"],
+            "disk_io": snapshot.get("disk_io", {}),
+            "network": snapshot.get("network", {})
+        }
+
+    def get_rule_status(self):
+        """获取各阈值规则的当前聚合值和超标状态"""
+        return self.rule_engine.get_status()
+
+    def get_history(self, name=None, start=None, end=None, resolution=None):
+        """
+        查询系统指标历史
+
+        Args:
+            name: 指标名，如 cpu.percent、memory.percent、disk.percent:/；None时返回指标列表和存储统计
+            start, end: 时间范围（Unix时间戳）
+            resolution: 期望的分辨率（秒），None表示按时间范围自动选择
+        """
+        if self.history is None:
+            return None
+        if name is None:
+            return {"metrics": self.history.names(), "stats": self.history.get_stats()}
+        return self.history.query(name, start, end, resolution)
+
+    def get_snapshot(self):
+        """获取最近的采样快照，采样线程未运行且尚无快照时立即采集一次"""
+        snapshot = self.sampler.get_snapshot()
+        if snapshot is None:
+            snapshot = self.sampler.sample_once()
+        return snapshot
+
+    def get_cpu_usage(self, snapshot=None):
         """获取CPU使用率"""
-        cpu_percent = psutil.cpu_percent(interval=1)
-        is_overload = cpu_percent >= self.thresholds["cpu_percent"]
+        cpu = (snapshot or self.get_snapshot())["cpu"]
         return {
-            "percent": cpu_percent,
-            "count": psutil.cpu_count(),
-            "is_overload": is_overload
+            "percent": cpu["percent"],
+            "count": cpu["count"],
+            "is_overload": cpu["percent"] >= self.thresholds["cpu_percent"]
         }
     
-    def get_memory_usage(self):
+    def get_memory_usage(self, snapshot=None):
         """获取内存使用情况"""
-        memory = psutil.virtual_memory()
-        is_overload = memory.percent >= self.thresholds["memory_percent"]
-        return {
-            "total": memory.total,
-            "available": memory.available,
-            "percent": memory.percent,
-            "used": memory.used,
-            "is_overload": is_overload
-        }
+        memory = (snapshot or self.get_snapshot())["memory"]
+        return dict(memory, is_overload=memory["percent"] >= self.thresholds["memory_percent"])
     
-    def get_disk_usage(self):
+    def get_disk_usage(self, snapshot=None):
         """获取磁盘使用情况"""
-        partitions = []
-        for partition in psutil.disk_partitions():
-            try:
-                usage = psutil.disk_usage(partition.mountpoint)
-                is_overload = usage.percent >= self.thresholds["disk_percent"]
-                partitions.append({
-                    "device": partition.device,
-                    "mountpoint": partition.mountpoint,
-                    "total": usage.total,
-                    "used": usage.used,
-                    "free": usage.free,
-                    "percent": usage.percent,
-                    "is_overload": is_overload
-                })
-            except PermissionError:
-                # 某些分区可能无法访问
-                continue
-        return partitions
+        return [
+            dict(partition, is_overload=partition["percent"] >= self.thresholds["disk_percent"])
+            for partition in (snapshot or self.get_snapshot())["disks"]
+        ]
     
     def format_bytes(self, bytes_value):
         """将字节数格式化为可读形式"""
@@ -87,41 +441,19 @@ class SystemMonitor:
         
         logger.info("开始检查系统资源使用情况...")
         now = datetime.now()
+        # 采样线程未运行时先采集一次，规则在每次采样时增量更新
+        if not self.sampler.running:
+            self.sampler.sample_once()
         
-        # 检查CPU使用率
-        cpu_info = self.get_cpu_usage()
-        if cpu_info["is_overload"]:
-            self._notify_overload(
-                "CPU", 
-                cpu_info["percent"], 
-                self.thresholds["cpu_percent"],
-                now
-            )
-        
-        # 检查内存使用率
-        memory_info = self.get_memory_usage()
-        if memory_info["is_overload"]:
-            self._notify_overload(
-                "内存", 
-                memory_info["percent"], 
-                self.thresholds["memory_percent"],
-                now
-            )
-        
-        # 检查磁盘使用率
-        disk_info = self.get_disk_usage()
-        for partition in disk_info:
-            if partition["is_overload"]:
-                self._notify_overload(
-                    f"磁盘 ({partition['mountpoint']})", 
-                    partition["percent"], 
-                    self.thresholds["disk_percent"],
-                    now
-                )
+        # 仍处于超标状态的规则按告警去重的重发间隔再次通知
+        for rule in self.rule_engine.breached():
+            self._notify_overload(rule.resource, rule.current, rule.threshold, now, rule.describe(), rule.metric,
+                                  rule.label, rule.unit)
         
         logger.info("系统资源检查完成")
     
-    def _notify_overload(self, resource_type, current_value, threshold, now):
+    def _notify_overload(self, resource_type, current_value, threshold, now, rule="单次采样", metric=None,
+                         label="使用率", unit="%"):
         """
         发送资源超载通知
         
@@ -130,51 +462,69 @@ class SystemMonitor:
             current_value: 当前值
             threshold: 阈值
             now: 当前时间
+            rule: 判定规则说明
+            metric: 指标名，CPU和内存告警附带占用最高的进程
+            label: 指标说明，如 使用率、繁忙度
+            unit: 数值单位
         """
-        # 检查通知冷却时间
-        last_time = self.last_notification_time.get(resource_type)
-        if last_time and (now - last_time).total_seconds() < self.notification_cooldown:
-            logger.info(f"{resource_type}使用率超标，但在冷却期内，不发送通知")
+        # 由告警去重按重发策略决定是否发送，持续超标时不重复通知
+        if not alert_deduplicator.should_send("system", resource_type, "overload"):
+            logger.info(f"{resource_type}{label}超标，但已通知过，不重复发送")
             return
         
-        # 更新最后通知时间
-        self.last_notification_time[resource_type] = now
-        
         # 获取系统信息
         sys_info = self.get_system_info()
         hostname = sys_info["hostname"]
         
-        # 构建通知消息
-        subject = f"系统资源警告: {resource_type}使用率超标"
-        message = (
-            f"主机: {hostname}\n"
-            f"资源: {resource_type}\n"
-            f"当前值: {current_value:.1f}%\n"
-            f"阈值: {threshold:.1f}%\n"
-            f"时间: {now.strftime('%Y-%m-%d %H:%M:%S')}"
-        )
+        # 按模板构建通知消息
+        values = {
+            "hostname": hostname,
+            "resource": resource_type,
+            "current": current_value,
+            "threshold": threshold,
+            "label": label,
+            "unit": unit,
+            "rule": rule,
+            "time": now.strftime('%Y-%m-%d %H:%M:%S'),
+            "processes": self._top_processes_text(metric)
+        }
+        subject, message = message_templates.render("system_overload", values)
         
         # 发送通知
-        notifier.send_notification(subject, message, "warning")
-        logger.warning(f"{resource_type}使用率超标: {current_value:.1f}% (阈值: {threshold:.1f}%)")
+        notification_queue.enqueue(subject, message, "warning", resource=f"{hostname}:{resource_type}",
+                                   template=("system_overload", values))
+        logger.warning(f"{resource_type}{label}超标: {current_value:.1f}{unit} (阈值: {threshold:.1f}{unit}, {rule})")
     
     def get_system_status(self):
-        """获取系统资源状态摘要"""
+        """获取系统资源状态摘要，直接读取最近的采样快照"""
         try:
-            cpu_percent = psutil.cpu_percent(interval=0.5)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
+            snapshot = self.get_snapshot()
+            memory = snapshot["memory"]
+            # 优先使用根分区，没有时使用第一个分区
+            disk = next((partition for partition in snapshot["disks"] if partition["mountpoint"] == "/"),
+                        snapshot["disks"][0] if snapshot["disks"] else None)
             
             status = {
-                "cpu_percent": f"{cpu_percent:.1f}%",
-                "memory_percent": f"{memory.percent:.1f}%",
-                "memory_used": f"{memory.used / (1024 * 1024 * 1024):.2f} GB",
-                "memory_total": f"{memory.total / (1024 * 1024 * 1024):.2f} GB",
-                "disk_percent": f"{disk.percent:.1f}%",
-                "disk_used": f"{disk.used / (1024 * 1024 * 1024):.2f} GB",
-                "disk_total": f"{disk.total / (1024 * 1024 * 1024):.2f} GB",
-                "last_update": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                "cpu_percent": f"{snapshot['cpu']['percent']:.1f}%",
+                "memory_percent": f"{memory['percent']:.1f}%",
+                "memory_used": f"{memory['used'] / (1024 * 1024 * 1024):.2f} GB",
+                "memory_total": f"{memory['total'] / (1024 * 1024 * 1024):.2f} GB",
+                "source": snapshot.get("source", "host"),
+                "last_update": datetime.fromtimestamp(snapshot["timestamp"]).strftime("%Y-%m-%d %H:%M:%S"),
+                "sample_age_seconds": round(time.time() - snapshot["timestamp"], 3),
+                "collect_seconds": snapshot.get("collect_seconds"),
+                "disk_collect_seconds": snapshot.get("disk_collect_seconds")
             }
+            if disk:
+                status.update({
+                    "disk_percent": f"{disk['percent']:.1f}%",
+                    "disk_used": f"{disk['used'] / (1024 * 1024 * 1024):.2f} GB",
+                    "disk_total": f"{disk['total'] / (1024 * 1024 * 1024):.2f} GB"
+                })
+            if snapshot.get("cgroup"):
+                status["cgroup"] = snapshot["cgroup"]
+            if self.forecaster is not None:
+                status["disk_forecasts"] = self.get_disk_forecasts()
             return status
         except Exception as e:
             logger.error(f"获取系统状态失败: {str(e)}")
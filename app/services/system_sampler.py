@@ -0,0 +1,98 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class SystemSampler:
+    """
+    后台系统资源采样器
+
+    在独立线程中按固定间隔调用采集函数，每次生成一份新的快照后整体替换引用。
+    读取方直接拿到当前快照，不阻塞也不需要加锁；快照生成后不再修改，读取方也不应修改它。
+    """
+
+    def __init__(self, collect, interval_seconds=10):
+        """
+        Args:
+            collect: 采集函数，返回快照字典
+            interval_seconds: 采样间隔（秒）
+        """
+        self.collect = collect
+        self.interval = interval_seconds
+        self._snapshot = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self.stats = {"samples": 0, "errors": 0, "last_collect_seconds": None, "max_collect_seconds": 0.0}
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def add_listener(self, callback):
+        """注册回调，每次生成新快照后在采样线程中调用 callback(snapshot)"""
+        self._listeners.append(callback)
+
+    def sample_once(self):
+        """立即采集一次并替换当前快照"""
+        start_time = time.perf_counter()
+        snapshot = self.collect()
+        elapsed = time.perf_counter() - start_time
+        snapshot["collect_seconds"] = round(elapsed, 4)
+        # 引用赋值是原子的，读取方要么拿到旧快照，要么拿到完整的新快照
+        self._snapshot = snapshot
+        with self._lock:
+            self.stats["samples"] += 1
+            self.stats["last_collect_seconds"] = round(elapsed, 4)
+            self.stats["max_collect_seconds"] = round(max(self.stats["max_collect_seconds"], elapsed), 4)
+        for callback in self._listeners:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logger.error(f"处理系统资源快照失败: {str(e)}")
+        return snapshot
+
+    def get_snapshot(self):
+        """获取最近一次采样的快照，尚未采样时返回None"""
+        return self._snapshot
+
+    def start(self):
+        """启动采样线程，启动后立即采集第一份快照"""
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="system-sampler", daemon=True)
+        self._thread.start()
+        logger.info(f"系统资源采样已启动，间隔: {self.interval}秒")
+
+    def _run(self):
+        while True:
+            try:
+                self.sample_once()
+            except Exception as e:
+                with self._lock:
+                    self.stats["errors"] += 1
+                logger.error(f"系统资源采样失败: {str(e)}")
+            if self._stop_event.wait(self.interval):
+                return
+
+    def stop(self, timeout=5):
+        """停止采样线程"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        snapshot = self._snapshot
+        stats.update({
+            "running": self.running,
+            "interval_seconds": self.interval,
+            "snapshot_age_seconds": round(time.time() - snapshot["timestamp"], 3) if snapshot else None
+        })
+        return stats
@@ -0,0 +1,329 @@
+import base64
+import logging
+import threading
+from string import Formatter
+from email.header import Header
+from email.utils import formataddr, formatdate, getaddresses, make_msgid
+
+from app.config.settings import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Telegram单条消息的长度上限（按UTF-16编码单元计算）
+TELEGRAM_MAX_LENGTH = 4096
+
+# 内置通知模板。可在 notifications.templates 中覆盖，或为某个渠道单独定义，如:
+#   endpoint_down:
+#     subject: "服务异常: {name}"
+#     telegram:
+#       body: "{name} 异常: {details}"
+DEFAULT_TEMPLATES = {
+    "endpoint_down": {
+        "subject": "服务异常: {name}",
+        "body": "服务 {target} 变为异常\n详情: {details}"
+    },
+    "endpoint_still_down": {
+        "subject": "服务持续异常: {name}",
+        "body": "服务 {target} 持续异常\n详情: {details}"
+    },
+    "endpoint_recovered": {
+        "subject": "服务已恢复: {name}",
+        "body": "服务 {target} 已恢复正常\n详情: {details}"
+    },
+    "system_overload": {
+        "subject": "系统资源警告: {resource}{label}超标",
+        "body": "主机: {hostname}\n资源: {resource}\n当前值: {current:.1f}{unit}\n阈值: {threshold:.1f}{unit}\n判定: {rule}\n时间: {time}{processes}"
+    },
+    "disk_full_forecast": {
+        "subject": "磁盘空间预警: {mountpoint} 预计{eta}后写满",
+        "body": (
+            "主机: {hostname}\n挂载点: {mountpoint}\n当前使用率: {percent:.1f}%\n剩余空间: {free}\n"
+            "增长速率: {fill_rate}/小时\n预计写满: {eta}后 ({full_time})\n依据: 最近{span}内的{points}个采样\n时间: {time}"
+        )
+    },
+    "database_down": {
+        "subject": "数据库连接异常",
+        "body": (
+            "数据库连接出现问题，请检查数据库服务是否正常运行。\n\n"
+            "数据库信息:\n- 主机: {host}\n- 端口: {port}\n- 数据库: {dbname}\n\n"
+            "错误详情: {details}\n\n发生时间: {time}"
+        )
+    },
+    "database_recovered": {
+        "subject": "数据库连接已恢复",
+        "body": (
+            "数据库连接已恢复正常。\n\n"
+            "数据库信息:\n- 主机: {host}\n- 端口: {port}\n- 数据库: {dbname}\n\n"
+            "响应时间: {response_time:.2f}秒\n恢复时间: {time}"
+        )
+    }
+}
+
+# 各内置模板调用方提供的字段，覆盖模板中引用了其他字段时启动即报错，而不是在告警时渲染出空值
+TEMPLATE_FIELDS = {
+    "endpoint_down": {"name", "target", "details"},
+    "endpoint_still_down": {"name", "target", "details"},
+    "endpoint_recovered": {"name", "target", "details"},
+    "system_overload": {"hostname", "resource", "current", "threshold", "label", "unit", "rule", "time", "processes"},
+    "disk_full_forecast": {
+        "hostname", "mountpoint", "percent", "free", "fill_rate", "eta", "full_time", "span", "points", "time"
+    },
+    "database_down": {"host", "port", "dbname", "details", "time"},
+    "database_recovered": {"host", "port", "dbname", "response_time", "time"}
+}
+
+_MISSING = object()
+
+
+class CompiledTemplate:
+    """
+    预编译的文本模板
+
+    创建时用 string.Formatter 把模板解析成 (常量文本, 字段, 格式, 转换) 片段，
+    渲染时只做字段取值和拼接，不再重复解析模板字符串。
+    模板语法错误、位置参数或属性/下标访问、无效的格式说明在创建时抛出ValueError。
+    渲染时缺少的字段输出为空，值与格式说明不匹配时按 str(value) 输出，不会中断告警发送。
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self._parts = []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if literal:
+                self._parts.append((literal, None, None, None))
+            if field is not None:
+                if not field.isidentifier():
+                    raise ValueError(f"模板字段必须是名称: {{{field}}}")
+                if conversion not in (None, "r", "s", "a"):
+                    raise ValueError(f"模板字段 {field} 的转换标志无效: !{conversion}")
+                if spec and not self._valid_spec(spec):
+                    raise ValueError(f"模板字段 {field} 的格式说明无效: {spec}")
+                self._parts.append((None, field, spec or "", conversion))
+        self.fields = {field for _, field, _, _ in self._parts if field}
+
+    @staticmethod
+    def _valid_spec(spec):
+        """格式说明至少对数字或字符串之一有效"""
+        for sample in (0, 0.0, ""):
+            try:
+                format(sample, spec)
+                return True
+            except ValueError:
+                continue
+        return False
+
+    def render(self, values):
+        pieces = []
+        for literal, field, spec, conversion in self._parts:
+            if field is None:
+                pieces.append(literal)
+                continue
+            value = values.get(field, _MISSING)
+            if value is _MISSING:
+                continue
+            if conversion == "r":
+                value = repr(value)
+            elif conversion == "s":
+                value = str(value)
+            elif conversion == "a":
+                value = ascii(value)
+            if spec:
+                try:
+                    pieces.append(format(value, spec))
+                    continue
+                except (ValueError, TypeError):
+                    pass
+            pieces.append(str(value))
+        return "".join(pieces)
+
+
+class TemplateRegistry:
+    """
+    通知模板注册表
+
+    启动时编译并校验全部模板，内置模板只能引用调用方提供的字段（TEMPLATE_FIELDS），
+    配置错误在启动时抛出ValueError；渲染时优先使用渠道专属的模板，没有时使用通用模板。
+    """
+
+    def __init__(self, overrides=None):
+        self._templates = {}
+        templates = {name: dict(definition) for name, definition in DEFAULT_TEMPLATES.items()}
+        for name, definition in (overrides or {}).items():
+            templates.setdefault(name, {}).update(definition)
+        for name, definition in templates.items():
+            try:
+                self._templates[name] = self._compile(definition)
+            except ValueError as e:
+                raise ValueError(f"通知模板 {name} 无效: {str(e)}") from e
+            self._check_fields(name, self._templates[name])
+        logger.info(f"已编译 {len(self._templates)} 个通知模板")
+
+    @staticmethod
+    def _check_fields(name, compiled):
+        allowed = TEMPLATE_FIELDS.get(name)
+        if allowed is None:
+            return
+        for channel, variant in compiled.items():
+            unknown = (variant["subject"].fields | variant["body"].fields) - allowed
+            if unknown:
+                raise ValueError(
+                    f"通知模板 {name}{f'（{channel}）' if channel else ''} 引用了不存在的字段: {', '.join(sorted(unknown))}，"
+                    f"可用字段: {', '.join(sorted(allowed))}"
+                )
+
+    def _compile(self, definition):
+        compiled = {
+            None: {
+                "subject": CompiledTemplate(definition.get("subject", "")),
+                "body": CompiledTemplate(definition.get("body", ""))
+            }
+        }
+        for key, value in definition.items():
+            if isinstance(value, dict):
+                # 渠道专属模板，未定义的部分沿用通用模板
+                compiled[key] = {
+                    "subject": CompiledTemplate(value["subject"]) if "subject" in value else compiled[None]["subject"],
+                    "body": CompiledTemplate(value["body"]) if "body" in value else compiled[None]["body"],
+                    "subtype": value.get("subtype", "plain")
+                }
+        return compiled
+
+    def has_channel_template(self, name, channel):
+        return name in self._templates and channel in self._templates[name]
+
+    def render(self, name, values, channel=None):
+        """
+        渲染模板
+
+        Args:
+            name: 模板名称
+            values: 模板字段值
+            channel: 渠道名称，有渠道专属模板时使用
+
+        Returns:
+            (str, str): (主题, 内容)
+        """
+        template = self._templates[name]
+        variant = template.get(channel) or template[None]
+        return variant["subject"].render(values), variant["body"].render(values)
+
+    def get_subtype(self, name, channel):
+        """获取渠道专属模板的内容类型（如邮件的 plain 或 html）"""
+        variant = self._templates.get(name, {}).get(channel)
+        return variant.get("subtype", "plain") if variant else "plain"
+
+
+class EmailMessageBuilder:
+    """
+    邮件报文生成
+
+    发件人、收件人和内容类型相同的邮件共用一份预先编码好的头部（按模板缓存），
+    每封邮件只需要编码主题和正文，比每次构造MIMEMultipart对象再序列化快得多。
+    """
+
+    def __init__(self):
+        self._header_cache = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _encode_addresses(addresses):
+        """
+        按RFC 5322生成地址列表，非ASCII的显示名按RFC 2047编码（与主题相同使用utf-8的Header编码）
+
+        Args:
+            addresses: 地址列表，元素可以是 "邮箱" 或 "显示名 <邮箱>"
+        """
+        return ",\r\n ".join(
+            formataddr((name, address), "utf-8") for name, address in getaddresses(list(addresses))
+        )
+
+    def _static_headers(self, sender, recipients, subtype):
+        key = (sender, tuple(recipients), subtype)
+        headers = self._header_cache.get(key)
+        if headers is None:
+            headers = (
+                f"From: {self._encode_addresses([sender])}\r\n"
+                f"To: {self._encode_addresses(recipients)}\r\n"
+                "MIME-Version: 1.0\r\n"
+                f'Content-Type: text/{subtype}; charset="utf-8"\r\n'
+                "Content-Transfer-Encoding: base64\r\n"
+            )
+            with self._lock:
+                self._header_cache[key] = headers
+        return headers
+
+    def build(self, subject, body, sender, recipients, subtype="plain"):
+        """生成可直接交给SMTP发送的邮件报文"""
+        encoded_subject = Header(subject, "utf-8").encode(linesep="\r\n")
+        encoded_body = base64.encodebytes(body.encode("utf-8")).decode("ascii").replace("\n", "\r\n")
+        return (
+            f"Subject: {encoded_subject}\r\n"
+            f"Date: {formatdate(localtime=True)}\r\n"
+            f"Message-ID: {make_msgid()}\r\n"
+            + self._static_headers(sender, recipients, subtype)
+            + "\r\n"
+            + encoded_body
+        )
+
+
+def format_subject(subject, level):
+    """根据通知级别为主题添加前缀"""
+    prefix = {
+        "info": "📢 信息",
+        "warning": "⚠️ 警告",
+        "error": "🚨 错误",
+        "critical": "🔥 紧急"
+    }.get(level, "📢 信息")
+    return f"{prefix}: {subject}"
+
+
+def _utf16_length(text):
+    return len(text.encode("utf-16-le")) // 2
+
+
+def split_telegram_message(text, limit=TELEGRAM_MAX_LENGTH, max_parts=3):
+    """
+    按Telegram的长度上限拆分消息
+
+    优先在换行处拆分，其次在空格处，最后按长度硬拆分；拆分后的每条消息带 (序号/总数) 前缀。
+    超过 max_parts 条时截断，最后一条末尾注明截断。
+
+    Returns:
+        list: 拆分后的消息
+    """
+    if _utf16_length(text) <= limit:
+        return [text]
+
+    # 预留序号前缀和截断提示的长度
+    budget = limit - 40
+    parts = []
+    remaining = text
+    while remaining:
+        if _utf16_length(remaining) <= budget:
+            parts.append(remaining)
+            break
+        # 先按字符数粗略截取，再按UTF-16长度收缩，避免表情等字符超出上限
+        cut = budget
+        while _utf16_length(remaining[:cut]) > budget:
+            cut -= max(1, (_utf16_length(remaining[:cut]) - budget) // 2)
+        window = remaining[:cut]
+        split_at = window.rfind("\n")
+        if split_at < cut // 2:
+            split_at = window.rfind(" ")
+        if split_at < cut // 2:
+            split_at = cut
+        parts.append(remaining[:split_at].rstrip())
+        remaining = remaining[split_at:].lstrip("\n ")
+
+    truncated = len(parts) > max_parts
+    if truncated:
+        omitted = sum(len(part) for part in parts[max_parts:])
+        parts = parts[:max_parts]
+        parts[-1] += f"\n…（消息过长，已截断 {omitted} 个字符）"
+    total = len(parts)
+    return [f"({index}/{total}) {part}" for index, part in enumerate(parts, 1)]
+
+
+# 创建模板注册表和邮件报文生成器实例
+message_templates = TemplateRegistry(CONFIG["notifications"].get("templates"))
+email_builder = EmailMessageBuilder()
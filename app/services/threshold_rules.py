@@ -0,0 +1,245 @@
+import fnmatch
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+RULE_MODES = ("avg", "max", "min", "ewma", "n_of_m")
+
+
+class _MonotonicWindow:
+    """
+    滑动窗口最大值/最小值
+
+    单调队列保存可能成为极值的 (序号, 数值)，每个样本最多入队出队各一次，均摊O(1)。
+    """
+
+    __slots__ = ("size", "is_max", "items", "seq")
+
+    def __init__(self, size, is_max=True):
+        self.size = size
+        self.is_max = is_max
+        self.items = deque()
+        self.seq = 0
+
+    def push(self, value):
+        items = self.items
+        if self.is_max:
+            while items and items[-1][1] <= value:
+                items.pop()
+        else:
+            while items and items[-1][1] >= value:
+                items.pop()
+        items.append((self.seq, value))
+        if items[0][0] <= self.seq - self.size:
+            items.popleft()
+        self.seq += 1
+        return items[0][1]
+
+
+class ThresholdRule:
+    """
+    持续超标判定规则
+
+    每个样本O(1)增量更新窗口聚合值，按聚合值判断是否超标：
+    - avg: 最近 window 个样本的平均值
+    - max / min: 最近 window 个样本的最大值 / 最小值（min超标表示窗口内每个样本都超标）
+    - ewma: 指数加权移动平均，half_life 为权重减半所需的样本数
+    - n_of_m: 最近 window 个样本中至少 n 个超标
+
+    聚合值达到 threshold 时进入超标状态，低于 clear_threshold（默认等于threshold）时恢复，避免在阈值附近反复切换。
+    除 n_of_m 外，至少有 window 个样本后才判定超标。
+    """
+
+    __slots__ = (
+        "name", "metric", "resource", "label", "unit", "threshold", "clear_threshold", "mode", "window", "n", "alpha",
+        "value", "last_sample", "breached", "samples", "_ring", "_index", "_sum", "_above", "_extreme"
+    )
+
+    def __init__(self, name, metric, threshold, mode="avg", window=6, n=None, half_life=None,
+                 clear_threshold=None, resource=None, label="使用率", unit="%"):
+        if mode not in RULE_MODES:
+            raise ValueError(f"未知的规则类型: {mode}")
+        self.name = name
+        self.metric = metric
+        self.resource = resource or metric
+        self.label = label
+        self.unit = unit
+        self.threshold = float(threshold)
+        self.clear_threshold = float(clear_threshold) if clear_threshold is not None else self.threshold
+        self.mode = mode
+        self.window = max(1, int(window))
+        self.n = int(n) if n is not None else self.window
+        self.alpha = 1 - 0.5 ** (1.0 / half_life) if half_life else 2.0 / (self.window + 1)
+        self.value = None
+        self.last_sample = None
+        self.breached = False
+        self.samples = 0
+        self._ring = [0.0] * self.window if mode in ("avg", "n_of_m") else None
+        self._index = 0
+        self._sum = 0.0
+        self._above = 0
+        self._extreme = _MonotonicWindow(self.window, mode == "max") if mode in ("max", "min") else None
+
+    def update(self, sample):
+        """
+        加入一个样本
+
+        Returns:
+            str: 进入超标返回 "breach"，恢复返回 "clear"，状态不变返回None
+        """
+        self.last_sample = sample
+        self.samples += 1
+        mode = self.mode
+        if mode == "avg":
+            self._sum += sample - self._ring[self._index]
+            self._ring[self._index] = sample
+            self._index = (self._index + 1) % self.window
+            self.value = self._sum / min(self.samples, self.window)
+        elif mode == "n_of_m":
+            above = 1.0 if sample >= self.threshold else 0.0
+            self._above += above - self._ring[self._index]
+            self._ring[self._index] = above
+            self._index = (self._index + 1) % self.window
+            self.value = self._above
+        elif mode == "ewma":
+            self.value = sample if self.value is None else self.value + self.alpha * (sample - self.value)
+        else:
+            self.value = self._extreme.push(sample)
+
+        if mode == "n_of_m":
+            over = self.value >= self.n
+            under = not over
+        elif self.samples < self.window:
+            over = False
+            under = self.value < self.clear_threshold
+        else:
+            over = self.value >= self.threshold
+            under = self.value < self.clear_threshold
+
+        if not self.breached and over:
+            self.breached = True
+            return "breach"
+        if self.breached and under:
+            self.breached = False
+            return "clear"
+        return None
+
+    @property
+    def current(self):
+        """用于通知的当前值：n_of_m 为最近一个样本，其他为窗口聚合值"""
+        return self.last_sample if self.mode == "n_of_m" else self.value
+
+    def describe(self):
+        """规则的文字说明"""
+        if self.mode == "avg":
+            return f"最近{self.window}次采样平均值"
+        if self.mode == "max":
+            return f"最近{self.window}次采样最大值"
+        if self.mode == "min":
+            return f"最近{self.window}次采样均超过阈值"
+        if self.mode == "ewma":
+            return "指数加权移动平均"
+        return f"最近{self.window}次采样中{int(self.value or 0)}次超过阈值（判定条件{self.n}次）"
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "metric": self.metric,
+            "resource": self.resource,
+            "unit": self.unit,
+            "mode": self.mode,
+            "window": self.window,
+            "threshold": self.threshold,
+            "value": round(self.value, 3) if self.value is not None else None,
+            "last_sample": self.last_sample,
+            "breached": self.breached,
+            "samples": self.samples
+        }
+
+
+class RuleEngine:
+    """
+    阈值规则引擎
+
+    规则按指标名建立索引，每个样本只更新订阅该指标的规则。指标名可以使用通配符（如 disk.percent:*），
+    首次出现的具体指标按匹配的规则模板创建独立的规则实例，资源名中的 {instance} 替换为 ":" 后的部分。
+    """
+
+    def __init__(self, rule_configs):
+        """
+        Args:
+            rule_configs: {规则名: {"metric", "threshold", "mode", "window", "n", "half_life", "clear_threshold",
+                                   "resource", "label", "unit"}}
+        """
+        self._exact = {}
+        self._patterns = []
+        self._rules = {}  # {指标名: [规则]}，未匹配任何规则的指标缓存为空列表
+        self._lock = threading.Lock()
+        for name, config in rule_configs.items():
+            config = dict(config)
+            metric = config.pop("metric")
+            if any(char in metric for char in "*?["):
+                self._patterns.append((name, metric, config))
+            else:
+                self._exact.setdefault(metric, []).append(self._create(name, metric, config))
+
+    @staticmethod
+    def _create(name, metric, config):
+        instance = metric.split(":", 1)[1] if ":" in metric else metric
+        resource = config.get("resource")
+        return ThresholdRule(
+            name, metric, config["threshold"],
+            mode=config.get("mode", "avg"),
+            window=config.get("window", 6),
+            n=config.get("n"),
+            half_life=config.get("half_life"),
+            clear_threshold=config.get("clear_threshold"),
+            resource=resource.format(instance=instance) if resource else None,
+            label=config.get("label", "使用率"),
+            unit=config.get("unit", "%")
+        )
+
+    def _rules_for(self, metric):
+        rules = self._rules.get(metric)
+        if rules is None:
+            rules = list(self._exact.get(metric, ()))
+            for name, pattern, config in self._patterns:
+                if fnmatch.fnmatchcase(metric, pattern):
+                    rules.append(self._create(name, metric, config))
+            self._rules[metric] = rules
+        return rules
+
+    def evaluate(self, values):
+        """
+        用一次采样的各指标值更新规则
+
+        Args:
+            values: {指标名: 数值}
+
+        Returns:
+            list: 状态发生变化的 [(规则, "breach"/"clear")]
+        """
+        events = []
+        with self._lock:
+            for metric, value in values.items():
+                for rule in self._rules_for(metric):
+                    event = rule.update(value)
+                    if event:
+                        events.append((rule, event))
+        return events
+
+    def breached(self):
+        """当前处于超标状态的规则"""
+        with self._lock:
+            return [rule for rules in self._rules.values() for rule in rules if rule.breached]
+
+    def get_status(self):
+        with self._lock:
+            rules = [rule.to_dict() for rules in self._rules.values() for rule in rules]
+        return {
+            "rules": rules,
+            "breached": sum(1 for rule in rules if rule["breached"]),
+            "metrics": len(self._rules)
+        }
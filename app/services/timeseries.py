@@ -0,0 +1,239 @@
+import logging
+import threading
+from array import array
+
+logger = logging.getLogger(__name__)
+
+# 汇总和查询使用numpy向量化计算；未安装时退化为标准库array逐点计算，查询长时间范围时明显变慢
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+    logger.warning("无法导入numpy模块，时间序列汇总和查询将逐点计算，性能下降，请安装requirements.txt中的numpy")
+
+# 默认的分辨率层级：原始样本 → 1分钟汇总 → 1小时汇总，每层容量固定
+DEFAULT_TIERS = (
+    {"resolution_seconds": 0, "capacity": 2160},   # 原始样本，按10秒采样约6小时
+    {"resolution_seconds": 60, "capacity": 1440},  # 1分钟汇总，24小时
+    {"resolution_seconds": 3600, "capacity": 720}  # 1小时汇总，30天
+)
+
+
+class _Ring:
+    """
+    固定容量的环形数组
+
+    每个点保存 时间戳、平均值、最小值、最大值、样本数 五列，写满后覆盖最早的点。
+    """
+
+    COLUMNS = 5
+
+    def __init__(self, capacity, use_numpy=NUMPY_AVAILABLE):
+        self.capacity = capacity
+        self.use_numpy = use_numpy
+        if use_numpy:
+            self.data = np.zeros((self.COLUMNS, capacity))
+        else:
+            self.data = [array("d", bytes(8 * capacity)) for _ in range(self.COLUMNS)]
+        self.head = 0  # 下一个写入位置
+        self.size = 0
+
+    def append(self, timestamp, avg, minimum, maximum, count):
+        index = self.head
+        if self.use_numpy:
+            self.data[:, index] = (timestamp, avg, minimum, maximum, count)
+        else:
+            for column, value in zip(self.data, (timestamp, avg, minimum, maximum, count)):
+                column[index] = value
+        self.head = (index + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def _indices(self, count):
+        """最近 count 个点的位置，按时间顺序"""
+        start = (self.head - count) % self.capacity
+        if self.use_numpy:
+            return (start + np.arange(count)) % self.capacity
+        return [(start + offset) % self.capacity for offset in range(count)]
+
+    def tail(self, count):
+        """最近 count 个点的各列"""
+        indices = self._indices(min(count, self.size))
+        if self.use_numpy:
+            return self.data[:, indices]
+        return [[column[index] for index in indices] for column in self.data]
+
+    def aggregate_tail(self, count):
+        """把最近 count 个点合并为一个汇总点 (平均值, 最小值, 最大值, 样本数)"""
+        _, avgs, minimums, maximums, counts = self.tail(count)
+        if self.use_numpy:
+            total = counts.sum()
+            return float((avgs * counts).sum() / total), float(minimums.min()), float(maximums.max()), float(total)
+        total = sum(counts)
+        return sum(a * c for a, c in zip(avgs, counts)) / total, min(minimums), max(maximums), total
+
+    def oldest_timestamp(self):
+        if not self.size:
+            return None
+        return float(self.data[0][(self.head - self.size) % self.capacity])
+
+    def select(self, start=None, end=None):
+        """时间范围内的点，返回 (时间戳, 平均值, 最小值, 最大值) 四个列表"""
+        columns = self.tail(self.size)
+        if self.use_numpy:
+            mask = np.ones(columns.shape[1], dtype=bool)
+            if start is not None:
+                mask &= columns[0] >= start
+            if end is not None:
+                mask &= columns[0] <= end
+            return [columns[row][mask].tolist() for row in range(4)]
+        keep = [
+            index for index, timestamp in enumerate(columns[0])
+            if (start is None or timestamp >= start) and (end is None or timestamp <= end)
+        ]
+        return [[columns[row][index] for index in keep] for row in range(4)]
+
+
+class TimeSeries:
+    """
+    单个指标的多分辨率时间序列（类似RRD）
+
+    原始样本写入第一层；每当时间跨过上一层的汇总边界（如整分钟），就把刚结束的区间内的点
+    一次性汇总为一个点写入上一层，并以同样方式逐层向上汇总。
+    """
+
+    def __init__(self, tiers=DEFAULT_TIERS, use_numpy=NUMPY_AVAILABLE):
+        self.resolutions = [tier["resolution_seconds"] for tier in tiers]
+        self.rings = [_Ring(tier["capacity"], use_numpy) for tier in tiers]
+        self._open_bucket = [None] * len(tiers)  # 每层当前未结束的汇总区间
+        self._pending = [0] * len(tiers)  # 下一层中属于该区间的点数
+
+    def append(self, timestamp, value):
+        self._add(0, timestamp, value, value, value, 1)
+
+    def _add(self, level, timestamp, avg, minimum, maximum, count):
+        upper = level + 1
+        if upper < len(self.rings):
+            bucket = int(timestamp // self.resolutions[upper])
+            if self._open_bucket[upper] is None:
+                self._open_bucket[upper] = bucket
+            elif bucket != self._open_bucket[upper]:
+                self._rollup(upper)
+                self._open_bucket[upper] = bucket
+        self.rings[level].append(timestamp, avg, minimum, maximum, count)
+        if upper < len(self.rings):
+            self._pending[upper] += 1
+
+    def _rollup(self, level):
+        """把下一层中属于已结束区间的点汇总为该层的一个点"""
+        count = min(self._pending[level], self.rings[level - 1].size)
+        self._pending[level] = 0
+        if count:
+            bucket_start = self._open_bucket[level] * self.resolutions[level]
+            self._add(level, bucket_start, *self.rings[level - 1].aggregate_tail(count))
+
+    def choose_level(self, start=None, resolution=None):
+        """
+        选择查询使用的层级
+
+        指定分辨率时使用不低于该分辨率的最细层级；否则使用能覆盖起始时间的最细层级。
+        """
+        if resolution is not None:
+            for level, tier_resolution in enumerate(self.resolutions):
+                if tier_resolution >= resolution:
+                    return level
+            return len(self.rings) - 1
+        if start is None:
+            return 0
+        for level, ring in enumerate(self.rings):
+            oldest = ring.oldest_timestamp()
+            if oldest is not None and oldest <= start:
+                return level
+        # 没有层级完整覆盖时使用数据最早的层级
+        return min(
+            range(len(self.rings)),
+            key=lambda level: self.rings[level].oldest_timestamp() or float("inf")
+        )
+
+    def query(self, start=None, end=None, resolution=None):
+        level = self.choose_level(start, resolution)
+        timestamps, avgs, minimums, maximums = self.rings[level].select(start, end)
+        return {
+            "resolution_seconds": self.resolutions[level],
+            "timestamps": timestamps,
+            "avg": avgs,
+            "min": minimums,
+            "max": maximums
+        }
+
+
+class TimeSeriesStore:
+    """
+    内存中的系统指标时间序列存储
+
+    每个指标一组固定容量的环形数组，内存占用上限为 指标数上限 × 各层容量之和 × 5 × 8 字节。
+    """
+
+    def __init__(self, tiers=DEFAULT_TIERS, max_series=500):
+        self.tiers = [dict(tier) for tier in tiers]
+        self.max_series = max_series
+        self._series = {}
+        self._lock = threading.Lock()
+        self.stats = {"samples": 0, "rejected_series": 0}
+
+    def record(self, timestamp, values):
+        """
+        记录一次采样
+
+        Args:
+            timestamp: 采样时间（Unix时间戳）
+            values: {指标名: 数值}
+        """
+        with self._lock:
+            for name, value in values.items():
+                series = self._series.get(name)
+                if series is None:
+                    if len(self._series) >= self.max_series:
+                        self.stats["rejected_series"] += 1
+                        continue
+                    series = self._series[name] = TimeSeries(self.tiers)
+                series.append(timestamp, value)
+            self.stats["samples"] += 1
+
+    def query(self, name, start=None, end=None, resolution=None):
+        """
+        查询指标在时间范围内的数据
+
+        Args:
+            name: 指标名
+            start, end: 时间范围（Unix时间戳），None表示不限
+            resolution: 期望的分辨率（秒），None表示自动选择
+
+        Returns:
+            dict: {"resolution_seconds", "timestamps", "avg", "min", "max"}，指标不存在时返回None
+        """
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                return None
+            return series.query(start, end, resolution)
+
+    def names(self):
+        with self._lock:
+            return sorted(self._series)
+
+    def get_stats(self):
+        with self._lock:
+            series_count = len(self._series)
+            stats = dict(self.stats)
+        points_per_series = sum(tier["capacity"] for tier in self.tiers)
+        stats.update({
+            "series": series_count,
+            "max_series": self.max_series,
+            "tiers": self.tiers,
+            "numpy": NUMPY_AVAILABLE,
+            "memory_bytes": series_count * points_per_series * _Ring.COLUMNS * 8
+        })
+        return stats
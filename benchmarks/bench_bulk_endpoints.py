@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+批量端点导入基准测试
+
+对比逐个调用 POST /api/endpoints 与一次调用 POST /api/endpoints/bulk
+（JSON数组和NDJSON两种格式）导入大量端点的耗时。
+
+用法:
+    python -m benchmarks.bench_bulk_endpoints --count 10000
+"""
+
+import json
+import time
+import logging
+import argparse
+
+
+def make_endpoints(count, prefix):
+    """生成测试端点配置"""
+    return [
+        {
+            "name": f"{prefix}-{i}",
+            "url": f"http://127.0.0.1:9/{prefix}/{i}",
+            "expected_status": 200,
+            "interval_minutes": 60
+        }
+        for i in range(count)
+    ]
+
+
+def reset_endpoints(service_checker, task_scheduler):
+    """清空端点和调度任务，保证每轮测试从相同状态开始"""
+    for job_id in list(task_scheduler.endpoint_jobs):
+        task_scheduler.scheduler.remove_job(job_id)
+    task_scheduler.endpoint_jobs.clear()
+    task_scheduler.jobs.clear()
+    service_checker.endpoints.clear()
+    service_checker._endpoint_index.clear()
+
+
+def report(label, count, elapsed):
+    print(f"{label:<28} {count:>6} 个端点  耗时 {elapsed:8.3f}s  吞吐 {count / elapsed:10.1f} 个/秒")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量端点导入基准测试')
+    parser.add_argument('--count', type=int, default=10000, help='批量导入的端点数量')
+    parser.add_argument('--single-count', type=int, default=1000, help='逐个导入的端点数量')
+    args = parser.parse_args()
+
+    # 基准测试时屏蔽逐条日志输出
+    logging.disable(logging.INFO)
+
+    from app.main import app
+    from app.core.scheduler import task_scheduler
+    from app.services.service_check import service_checker
+
+    client = app.test_client()
+    task_scheduler.scheduler.start()
+    try:
+        # 逐个导入
+        reset_endpoints(service_checker, task_scheduler)
+        endpoints = make_endpoints(args.single_count, "single")
+        start = time.perf_counter()
+        for endpoint in endpoints:
+            client.post('/api/endpoints', json=endpoint)
+        report("POST /api/endpoints 逐个", args.single_count, time.perf_counter() - start)
+
+        # JSON数组批量导入
+        reset_endpoints(service_checker, task_scheduler)
+        endpoints = make_endpoints(args.count, "bulk")
+        start = time.perf_counter()
+        response = client.post('/api/endpoints/bulk', json=endpoints)
+        report("POST /bulk JSON数组", args.count, time.perf_counter() - start)
+        assert response.status_code == 200, response.get_json()
+
+        # 再次提交相同内容（全部unchanged）
+        start = time.perf_counter()
+        response = client.post('/api/endpoints/bulk', json=endpoints)
+        report("POST /bulk 重复提交", args.count, time.perf_counter() - start)
+
+        # NDJSON批量导入
+        reset_endpoints(service_checker, task_scheduler)
+        body = "\n".join(json.dumps(endpoint) for endpoint in make_endpoints(args.count, "ndjson"))
+        start = time.perf_counter()
+        response = client.post('/api/endpoints/bulk', data=body, content_type='application/x-ndjson')
+        report("POST /bulk NDJSON", args.count, time.perf_counter() - start)
+        assert response.status_code == 200, response.get_json()
+    finally:
+        task_scheduler.scheduler.shutdown(wait=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+通知服务吞吐量基准测试
+
+启动本地SMTP接收端和Bot API替身，按指定速率调用 NotificationService.send_notification，
+报告吞吐量、延迟分位数（p50/p90/p99）和丢失率。不需要真实的SMTP账号或Bot Token。
+
+- 按固定速率发起调用（开环），延迟从计划发起时间开始计算，发送线程不够用时排队的时间也计入延迟
+- 丢失：send_notification 返回失败的通知，以及替身没有收到的邮件/消息
+- 可以为替身注入延迟、429限流和错误，观察重试和节流对延迟和丢失的影响
+
+用法:
+    python -m benchmarks.bench_notifier --rate 50 --notifications 500
+    python -m benchmarks.bench_notifier --rate 20 --telegram-error-rate 0.05 --telegram-throttle-rate 0.02
+    python -m benchmarks.bench_notifier --channels email --smtp-reject-rate 0.1
+    python -m benchmarks.bench_notifier --rate 100 --channel-concurrency 8
+"""
+
+import math
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.smtp_sink import SMTPSink
+from benchmarks.fake_telegram import FakeTelegramServer
+
+
+def percentile(sorted_values, q):
+    """已排序列表的分位数（最近秩）"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def configure(notifier, args):
+    """让通知服务只使用本地替身，返回 (smtp_sink, telegram_server)"""
+    from app.services.rate_limiter import TelegramRateLimiter
+    from app.services.channels import EmailChannel, TelegramChannel
+
+    channels = set(args.channels.split(","))
+    sink = server = None
+    for channel in notifier.channels.values():
+        channel.config["enabled"] = False
+
+    if "email" in channels:
+        sink = SMTPSink(latency_ms=args.smtp_latency_ms, reject_rate=args.smtp_reject_rate, seed=1).start()
+        notifier.email_config.update({
+            "enabled": True,
+            "smtp_server": "127.0.0.1",
+            "smtp_port": sink.port,
+            "use_tls": False,
+            "username": "bench",
+            "password": "bench",
+            "sender": "bench@localhost",
+            "recipients": ["ops@localhost"]
+        })
+
+    if "telegram" in channels:
+        server = FakeTelegramServer(
+            latency_ms=args.telegram_latency_ms,
+            error_rate=args.telegram_error_rate,
+            throttle_rate=args.telegram_throttle_rate,
+            seed=2
+        ).start()
+        notifier.telegram_config.update({
+            "enabled": True,
+            "token": "bench-token",
+            "chat_ids": list(range(1, args.chats + 1)),
+            "api_base": server.api_base
+        })
+        # 替身不限制发送频率，节流参数按命令行设置，默认放宽以测量通知服务本身的吞吐
+        notifier.telegram_rate_limiter = TelegramRateLimiter(
+            global_per_second=args.telegram_global_per_second,
+            chat_per_second=args.telegram_chat_per_second,
+            chat_burst=max(1, int(args.telegram_chat_per_second))
+        )
+
+    # 按命令行重新创建内置渠道，以调整每个渠道同时进行的发送数量
+    if args.channel_concurrency:
+        for name, channel_class, config in (("email", EmailChannel, notifier.email_config),
+                                             ("telegram", TelegramChannel, notifier.telegram_config)):
+            notifier.channels[name].close()
+            config["concurrency"] = args.channel_concurrency
+            notifier.channels[name] = channel_class(name, config, notifier)
+    return sink, server
+
+
+def run(notifier, args):
+    """按速率发起调用，返回每条通知的 (是否成功, 延迟) 和总耗时"""
+    results = [None] * args.notifications
+    interval = 1.0 / args.rate if args.rate > 0 else 0
+
+    def send(index, scheduled_at):
+        ok = notifier.send_notification(
+            f"基准测试 {index}", f"通知服务基准测试消息 {index}", args.level, resource=f"bench-{index}"
+        )
+        results[index] = (bool(ok), time.perf_counter() - scheduled_at)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.senders) as executor:
+        for index in range(args.notifications):
+            scheduled_at = start + index * interval
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, index, scheduled_at if interval else time.perf_counter())
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='通知服务吞吐量基准测试')
+    parser.add_argument('--rate', type=float, default=50, help='每秒发起的通知数，0表示不限速')
+    parser.add_argument('--notifications', type=int, default=500, help='发送的通知数量')
+    parser.add_argument('--senders', type=int, default=32, help='并发调用send_notification的线程数')
+    parser.add_argument('--channels', default='email,telegram', help='启用的渠道，逗号分隔')
+    parser.add_argument('--level', default='error', help='通知级别')
+    parser.add_argument('--chats', type=int, default=3, help='Telegram聊天ID数量')
+    parser.add_argument('--smtp-latency-ms', type=float, default=2, help='SMTP接收端每个响应的延迟（毫秒）')
+    parser.add_argument('--smtp-reject-rate', type=float, default=0, help='SMTP接收端随机拒绝邮件的比例')
+    parser.add_argument('--telegram-latency-ms', type=float, default=20, help='Bot API替身每个请求的延迟（毫秒）')
+    parser.add_argument('--telegram-error-rate', type=float, default=0, help='Bot API替身随机返回500的比例')
+    parser.add_argument('--telegram-throttle-rate', type=float, default=0, help='Bot API替身随机返回429的比例')
+    parser.add_argument('--telegram-chat-per-second', type=float, default=1000, help='通知服务的单聊天节流速率')
+    parser.add_argument('--telegram-global-per-second', type=float, default=1000, help='通知服务的全局节流速率')
+    parser.add_argument('--channel-concurrency', type=int, default=0, help='邮件和Telegram渠道的发送并发数，0表示使用配置')
+    args = parser.parse_args()
+
+    # 注入的故障会产生大量错误日志，只输出统计结果
+    logging.disable(logging.CRITICAL)
+
+    from app.services.notifier import notifier
+    from app.services.delivery_metrics import delivery_metrics
+
+    sink, server = configure(notifier, args)
+    delivery_metrics.reset()
+    print(f"渠道 {args.channels}, {args.notifications} 条通知, 速率 {args.rate or '不限'}/秒, {args.senders} 个发送线程")
+
+    results, elapsed = run(notifier, args)
+    notifier.close_channels()
+
+    latencies = sorted(latency for _, latency in results)
+    failed = sum(1 for ok, _ in results if not ok)
+    print(f"耗时 {elapsed:6.2f}s  吞吐 {args.notifications / elapsed:8.1f} 条/秒")
+    print(f"延迟 p50 {percentile(latencies, 0.5) * 1000:8.1f}ms  p90 {percentile(latencies, 0.9) * 1000:8.1f}ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:8.1f}ms  max {latencies[-1] * 1000:8.1f}ms")
+    print(f"send_notification 失败 {failed} 条 ({failed / args.notifications:.2%})")
+
+    # 对比替身实际收到的数量，计算各渠道的丢失
+    if sink is not None:
+        received = sink.counters["messages"]
+        lost = args.notifications - received
+        print(f"邮件     收到 {received}/{args.notifications}  丢失 {lost} ({lost / args.notifications:.2%})  "
+              f"注入拒绝 {sink.counters['rejected']}  新建连接 {sink.counters['connections']}")
+        sink.shutdown()
+    if server is not None:
+        expected = args.notifications * args.chats
+        received = server.counters["messages"]
+        lost = expected - received
+        print(f"Telegram 收到 {received}/{expected}  丢失 {lost} ({lost / expected:.2%})  "
+              f"注入错误 {server.counters['errors']}  限流 {server.counters['rate_limited']}")
+        server.shutdown()
+
+    for channel, stats in delivery_metrics.get_stats()["channels"].items():
+        delivery = stats.get("delivery_seconds")
+        if delivery:
+            print(f"  {channel:<9} 渠道端到端 p50 {delivery['p50'] * 1000:8.1f}ms  p99 {delivery['p99'] * 1000:8.1f}ms  "
+                  f"失败率 {stats['failure_rate']:.2%}")
+
+
+if __name__ == '__main__':
+    main()
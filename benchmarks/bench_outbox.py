@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+通知发件箱组提交基准测试
+
+多个线程同时向发件箱写入通知（模拟告警风暴），对比每条消息单独提交（max_batch=1）
+与组提交时的写入吞吐量和提交次数。
+
+用法:
+    python -m benchmarks.bench_outbox --messages 2000 --threads 16
+"""
+
+import os
+import time
+import logging
+import argparse
+import tempfile
+import threading
+
+from app.services.outbox import NotificationOutbox
+
+
+def run(path, messages, threads, max_batch):
+    """并发写入指定数量的通知，返回 (耗时, 提交次数)"""
+    outbox = NotificationOutbox(path, max_batch=max_batch)
+    outbox.open()
+    per_thread = messages // threads
+
+    def producer(index):
+        for i in range(per_thread):
+            outbox.append(f"服务异常: ep{index}-{i}", "连接超时", "error", f"ep{index}-{i}", ["email", "telegram"])
+
+    workers = [threading.Thread(target=producer, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    commits = outbox.stats["commits"]
+    outbox.close()
+    return elapsed, commits, per_thread * threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description='通知发件箱组提交基准测试')
+    parser.add_argument('--messages', type=int, default=2000, help='写入的通知数量')
+    parser.add_argument('--threads', type=int, default=16, help='并发写入线程数')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{args.threads} 个线程并发写入 {args.messages} 条通知 (synchronous=FULL)")
+        for label, max_batch in (("每条单独提交", 1), ("组提交", 500)):
+            path = os.path.join(directory, f"outbox-{max_batch}.db")
+            elapsed, commits, written = run(path, args.messages, args.threads, max_batch)
+            print(f"{label:<8} 耗时 {elapsed:7.3f}s  {written / elapsed:9.1f} 条/秒  提交 {commits} 次")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+SMTP连接池基准测试
+
+在本地SMTP接收端上分别以“每封邮件新建连接”和“连接池复用”两种方式调用
+NotificationService.send_email，对比每秒发送的邮件数量和登录次数。
+
+用法:
+    python -m benchmarks.bench_smtp_pool --messages 200 --latency-ms 5
+"""
+
+import time
+import logging
+import argparse
+
+from benchmarks.smtp_sink import SMTPSink
+
+
+def run(notifier, sink, messages, pooled):
+    """发送指定数量的邮件，返回 (耗时, 登录次数)"""
+    from app.services.smtp_pool import SMTPConnectionPool
+
+    pool = SMTPConnectionPool(notifier.email_config, max_size=2, enabled=pooled)
+    notifier.smtp_pool = pool
+    logins_before = sink.counters["logins"]
+
+    start = time.perf_counter()
+    for i in range(messages):
+        assert notifier.send_email(f"基准测试 {i}", "SMTP连接池基准测试邮件")
+    elapsed = time.perf_counter() - start
+    pool.close_all()
+    return elapsed, sink.counters["logins"] - logins_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SMTP连接池基准测试')
+    parser.add_argument('--messages', type=int, default=200, help='发送的邮件数量')
+    parser.add_argument('--latency-ms', type=float, default=5, help='SMTP接收端每个响应的注入延迟（毫秒）')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    from app.services.notifier import notifier
+
+    sink = SMTPSink(latency_ms=args.latency_ms).start()
+    notifier.email_config.update({
+        "enabled": True,
+        "smtp_server": "127.0.0.1",
+        "smtp_port": sink.port,
+        "use_tls": False,
+        "username": "bench",
+        "password": "bench",
+        "sender": "bench@localhost",
+        "recipients": ["ops@localhost"]
+    })
+
+    print(f"SMTP sink 127.0.0.1:{sink.port}, 响应延迟 {args.latency_ms}ms, 邮件数 {args.messages}")
+    for label, pooled in (("每封邮件新建连接", False), ("连接池复用", True)):
+        elapsed, logins = run(notifier, sink, args.messages, pooled)
+        print(f"{label:<12} 耗时 {elapsed:7.3f}s  {args.messages / elapsed:8.1f} 封/秒  登录 {logins} 次")
+
+    sink.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Telegram并发发送基准测试
+
+在本地Bot API替身上调用 NotificationService.send_telegram，对比单线程（逐个聊天发送）
+与并发发送时每条通知的耗时，以及建立的TCP连接数。
+
+用法:
+    python -m benchmarks.bench_telegram_fanout --chats 10 --notifications 20 --latency-ms 50
+"""
+
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_telegram import FakeTelegramServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Telegram并发发送基准测试')
+    parser.add_argument('--chats', type=int, default=10, help='聊天ID数量')
+    parser.add_argument('--notifications', type=int, default=20, help='发送的通知数量')
+    parser.add_argument('--latency-ms', type=float, default=50, help='Bot API替身每个请求的延迟（毫秒）')
+    parser.add_argument('--workers', type=int, default=8, help='并发发送线程数')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    from app.services.notifier import notifier
+
+    server = FakeTelegramServer(latency_ms=args.latency_ms).start()
+    notifier.telegram_config.update({
+        "enabled": True,
+        "token": "bench-token",
+        "chat_ids": list(range(1, args.chats + 1)),
+        "api_base": server.api_base
+    })
+
+    print(f"Bot API替身 {server.api_base}, 延迟 {args.latency_ms}ms, "
+          f"{args.chats} 个聊天, {args.notifications} 条通知")
+    for label, workers in (("逐个聊天发送", 1), (f"并发发送({args.workers}线程)", args.workers)):
+        notifier._telegram_executor = ThreadPoolExecutor(max_workers=workers)
+        connections_before = server.counters["connections"]
+        start = time.perf_counter()
+        for i in range(args.notifications):
+            assert notifier.send_telegram(f"基准测试 {i}", "Telegram并发发送基准测试")
+        elapsed = time.perf_counter() - start
+        print(f"{label:<16} 每条通知 {elapsed / args.notifications * 1000:8.1f}ms  "
+              f"总耗时 {elapsed:6.2f}s  新建连接 {server.counters['connections'] - connections_before} 个")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
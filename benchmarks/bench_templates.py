@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+通知渲染开销基准测试
+
+对比每条通知的渲染耗时：
+- 原方式: f-string 拼接主题和内容，每封邮件构造 MIMEMultipart 再 as_string()
+- 模板方式: 预编译模板渲染，邮件使用缓存的头部直接生成报文
+另外测量长消息按Telegram上限拆分的耗时。
+
+用法:
+    python -m benchmarks.bench_templates --iterations 20000
+"""
+
+import time
+import logging
+import argparse
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+
+
+def measure(func, iterations):
+    """返回每次调用的平均耗时（微秒）"""
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='通知渲染开销基准测试')
+    parser.add_argument('--iterations', type=int, default=20000, help='每种方式的渲染次数')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    from app.services.templates import message_templates, email_builder, split_telegram_message
+
+    sender = "monitor@example.com"
+    recipients = ["ops@example.com", "oncall@example.com"]
+    details = "HTTP 503: upstream connect error or disconnect/reset before headers"
+
+    def legacy(i):
+        name = f"ep{i}"
+        message = f"服务 {name} (GET https://example.com/{name}) 变为异常\n详情: {details}"
+        subject = f"🚨 错误: 服务异常: {name}"
+        msg = MIMEMultipart()
+        msg['Subject'] = subject
+        msg['From'] = sender
+        msg['To'] = ", ".join(recipients)
+        msg.attach(MIMEText(message, 'plain', 'utf-8'))
+        return msg.as_string()
+
+    def templated(i):
+        name = f"ep{i}"
+        values = {"name": name, "target": f"{name} (GET https://example.com/{name})", "details": details}
+        subject, message = message_templates.render("endpoint_down", values)
+        return email_builder.build(f"🚨 错误: {subject}", message, sender, recipients)
+
+    def render_only(i):
+        name = f"ep{i}"
+        return message_templates.render("endpoint_down", {"name": name, "target": name, "details": details})
+
+    print(f"每种方式渲染 {args.iterations} 次")
+    legacy_us = measure(legacy, args.iterations)
+    templated_us = measure(templated, args.iterations)
+    print(f"{'f-string + MIMEMultipart':<28} {legacy_us:8.1f} 微秒/条")
+    print(f"{'预编译模板 + 缓存邮件头':<24} {templated_us:8.1f} 微秒/条  ({legacy_us / templated_us:.1f}x)")
+    print(f"{'仅模板渲染':<23} {measure(render_only, args.iterations):8.1f} 微秒/条")
+
+    long_text = "\n".join(f"第 {i} 行: {details}" for i in range(300))
+    split_iterations = max(1, args.iterations // 20)
+    split_us = measure(lambda i: split_telegram_message(long_text), split_iterations)
+    parts = split_telegram_message(long_text)
+    print(f"{'Telegram拆分(' + str(len(long_text)) + '字符)':<26} {split_us:8.1f} 微秒/条  拆分为 {len(parts)} 条")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Webhook渠道基准测试
+
+多个线程同时通过 NotificationService.deliver 向本地Webhook接收端发送通知（模拟通知队列的投递线程），
+对比逐条POST与批量POST的吞吐量、请求数和连接数。
+
+用法:
+    python -m benchmarks.bench_webhook --notifications 1000 --latency-ms 5
+"""
+
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.webhook_sink import WebhookSink
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Webhook渠道基准测试')
+    parser.add_argument('--notifications', type=int, default=1000, help='发送的通知数量')
+    parser.add_argument('--latency-ms', type=float, default=5, help='接收端每个请求的延迟（毫秒）')
+    parser.add_argument('--senders', type=int, default=16, help='并发调用deliver的线程数')
+    parser.add_argument('--batch-size', type=int, default=50, help='批量模式每个请求的最大通知数')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    from app.services.notifier import notifier
+    from app.services.channels import WebhookChannel
+
+    sink = WebhookSink(latency_ms=args.latency_ms).start()
+    notifier.email_config["enabled"] = False
+    notifier.telegram_config["enabled"] = False
+
+    print(f"Webhook接收端 {sink.url}, 延迟 {args.latency_ms}ms, {args.notifications} 条通知, {args.senders} 个发送线程")
+    for label, batch_size in (("逐条POST", 1), (f"批量POST({args.batch_size})", args.batch_size)):
+        channel = WebhookChannel("bench", {
+            "enabled": True,
+            "url": sink.url,
+            "concurrency": 4,
+            "batch_size": batch_size,
+            "batch_wait_ms": 20,
+            "batch_key": "alerts"
+        })
+        notifier.channels = {"bench": channel}
+        before = dict(sink.counters)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.senders) as executor:
+            results = list(executor.map(
+                lambda i: notifier.deliver(f"服务异常: ep{i}", "连接超时", "error", f"ep{i}"),
+                range(args.notifications)
+            ))
+        elapsed = time.perf_counter() - start
+        channel.close()
+
+        assert all(result["bench"] for result in results)
+        print(f"{label:<14} 耗时 {elapsed:6.2f}s  {args.notifications / elapsed:8.1f} 条/秒  "
+              f"请求 {sink.counters['requests'] - before['requests']} 次  "
+              f"新建连接 {sink.counters['connections'] - before['connections']} 个")
+
+    sink.shutdown()
+
+
+if __name__ == '__main__':
+    main()
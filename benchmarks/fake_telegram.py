@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+本地Telegram Bot API替身
+
+实现 POST /bot<token>/sendMessage，使用HTTP/1.1保持连接，统计收到的消息数和TCP连接数。
+可以为每个请求注入固定延迟，模拟到Bot API的网络往返；也可以按聊天限制发送频率，
+超出时返回429和 parameters.retry_after，模拟Bot API的限流；超过4096字符的消息返回400。
+还可以按比例随机注入429（--throttle-rate）和500错误（--error-rate）。
+
+用法:
+    python -m benchmarks.fake_telegram --port 8081 --latency-ms 50 --chat-interval-ms 1000
+    python -m benchmarks.fake_telegram --error-rate 0.05 --throttle-rate 0.02
+    然后在配置中设置 notifications.telegram.api_base: http://127.0.0.1:8081
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeTelegramHandler(BaseHTTPRequestHandler):
+    """处理Bot API请求"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        if not self.path.endswith("/sendMessage"):
+            self.send_json(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+            return
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        text = payload.get("text") or ""
+        if len(text.encode("utf-16-le")) // 2 > 4096:
+            self.server.count("rejected")
+            self.send_json(400, {"ok": False, "error_code": 400, "description": "Bad Request: message is too long"})
+            return
+
+        fault = self.server.inject_fault()
+        if fault == "error":
+            self.send_json(500, {"ok": False, "error_code": 500, "description": "Internal Server Error: injected"})
+            return
+
+        retry_after = 1 if fault == "throttle" else self.server.check_rate(payload.get("chat_id"))
+        if retry_after:
+            self.send_json(429, {
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {retry_after}",
+                "parameters": {"retry_after": retry_after}
+            })
+            return
+
+        message_id = self.server.record(payload)
+        self.send_json(200, {
+            "ok": True,
+            "result": {"message_id": message_id, "chat": {"id": payload.get("chat_id")}, "text": payload.get("text")}
+        })
+
+
+class FakeTelegramServer(ThreadingHTTPServer):
+    """多线程Bot API替身，记录每个聊天收到的消息"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0, chat_interval_ms=0,
+                 error_rate=0, throttle_rate=0, seed=None):
+        super().__init__((host, port), FakeTelegramHandler)
+        self.latency = latency_ms / 1000.0
+        self.chat_interval = chat_interval_ms / 1000.0  # 同一聊天两条消息的最小间隔，0表示不限流
+        self.error_rate = error_rate  # 随机返回500的比例
+        self.throttle_rate = throttle_rate  # 随机返回429的比例
+        self._random = random.Random(seed)
+        self.counters = {"connections": 0, "messages": 0, "rate_limited": 0, "rejected": 0, "errors": 0}
+        self.messages = {}  # {chat_id: [text]}
+        self._last_message_at = {}
+        self._lock = threading.Lock()
+
+    @property
+    def api_base(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def inject_fault(self):
+        """按配置的比例随机决定本次请求是否注入故障，返回 "error"、"throttle" 或 None"""
+        if not self.error_rate and not self.throttle_rate:
+            return None
+        with self._lock:
+            roll = self._random.random()
+            if roll < self.error_rate:
+                self.counters["errors"] += 1
+                return "error"
+            if roll < self.error_rate + self.throttle_rate:
+                self.counters["rate_limited"] += 1
+                return "throttle"
+        return None
+
+    def check_rate(self, chat_id):
+        """检查聊天的发送频率，超出时返回需要等待的秒数，否则返回0"""
+        if not self.chat_interval:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_message_at.get(chat_id)
+            # 留出少量余量，避免客户端按整秒节流时因时钟抖动被误判
+            if last is not None and now - last < self.chat_interval * 0.9:
+                self.counters["rate_limited"] += 1
+                return max(1, int(self.chat_interval + 0.999))
+            self._last_message_at[chat_id] = now
+            return 0
+
+    def record(self, payload):
+        with self._lock:
+            self.counters["messages"] += 1
+            self.messages.setdefault(payload.get("chat_id"), []).append(payload.get("text"))
+            return self.counters["messages"]
+
+    def start(self):
+        """在后台线程中运行"""
+        thread = threading.Thread(target=self.serve_forever, name="fake-telegram", daemon=True)
+        thread.start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地Telegram Bot API替身')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8081, help='监听端口')
+    parser.add_argument('--latency-ms', type=float, default=0, help='每个请求的注入延迟（毫秒）')
+    parser.add_argument('--chat-interval-ms', type=float, default=0, help='同一聊天的最小发送间隔（毫秒），超出返回429')
+    parser.add_argument('--error-rate', type=float, default=0, help='随机返回500的请求比例')
+    parser.add_argument('--throttle-rate', type=float, default=0, help='随机返回429的请求比例')
+    args = parser.parse_args()
+
+    server = FakeTelegramServer(args.host, args.port, args.latency_ms, args.chat_interval_ms,
+                                args.error_rate, args.throttle_rate)
+    print(f"Fake Telegram Bot API 监听 {server.api_base}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"统计: {server.counters}")
+
+
+if __name__ == '__main__':
+    main()
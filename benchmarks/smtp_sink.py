@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+本地SMTP接收端（SMTP sink）
+
+用于在没有真实SMTP账号的情况下测试邮件发送。支持EHLO/HELO、AUTH（任意账号均通过）、
+MAIL/RCPT/DATA、NOOP、RSET、QUIT，不支持STARTTLS（发送端需配置 use_tls: false）。
+可以为每个响应注入固定延迟，模拟网络往返时间；也可以按比例随机以451临时错误拒绝邮件。
+
+用法:
+    python -m benchmarks.smtp_sink --port 2525 --latency-ms 20
+    python -m benchmarks.smtp_sink --reject-rate 0.05
+"""
+
+import time
+import random
+import argparse
+import threading
+import socketserver
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """处理单个SMTP会话"""
+
+    def reply(self, line):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.wfile.write((line + "\r\n").encode("utf-8"))
+        self.wfile.flush()
+
+    def handle(self):
+        self.server.count("connections")
+        self.reply("220 smtp-sink ready")
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            command = line[:4].upper()
+
+            if command in ("EHLO", "HELO"):
+                if command == "EHLO":
+                    self.wfile.write(b"250-smtp-sink\r\n250-AUTH PLAIN LOGIN\r\n")
+                self.reply("250 OK")
+            elif command == "AUTH":
+                self.server.count("logins")
+                parts = line.split()
+                if len(parts) == 2 and parts[1].upper() == "LOGIN":
+                    # AUTH LOGIN: 依次读取用户名和密码
+                    self.reply("334 VXNlcm5hbWU6")
+                    self.rfile.readline()
+                    self.reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                elif len(parts) == 2:
+                    # AUTH PLAIN 未附带凭据时等待下一行
+                    self.reply("334 ")
+                    self.rfile.readline()
+                self.reply("235 Authentication successful")
+            elif command in ("MAIL", "RCPT", "RSET"):
+                self.reply("250 OK")
+            elif command == "NOOP":
+                self.server.count("noops")
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                if self.server.should_reject():
+                    self.reply("451 4.3.0 Temporary failure: injected")
+                    continue
+                self.server.count("messages")
+                self.reply("250 OK queued")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """多线程SMTP接收端，统计连接、登录和邮件数量"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0, reject_rate=0, seed=None):
+        super().__init__((host, port), SMTPSinkHandler)
+        self.latency = latency_ms / 1000.0
+        self.reject_rate = reject_rate  # 随机拒绝邮件的比例
+        self._random = random.Random(seed)
+        self.counters = {"connections": 0, "logins": 0, "messages": 0, "noops": 0, "rejected": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def should_reject(self):
+        """按配置的比例随机决定是否拒绝当前邮件"""
+        if not self.reject_rate:
+            return False
+        with self._lock:
+            if self._random.random() < self.reject_rate:
+                self.counters["rejected"] += 1
+                return True
+        return False
+
+    def start(self):
+        """在后台线程中运行"""
+        thread = threading.Thread(target=self.serve_forever, name="smtp-sink", daemon=True)
+        thread.start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地SMTP接收端')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=2525, help='监听端口')
+    parser.add_argument('--latency-ms', type=float, default=0, help='每个响应的注入延迟（毫秒）')
+    parser.add_argument('--reject-rate', type=float, default=0, help='随机以451拒绝的邮件比例')
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.host, args.port, args.latency_ms, args.reject_rate)
+    print(f"SMTP sink 监听 {args.host}:{sink.port}")
+    try:
+        sink.serve_forever()
+    except KeyboardInterrupt:
+        print(f"统计: {sink.counters}")
+
+
+if __name__ == '__main__':
+    main()
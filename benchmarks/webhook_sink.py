@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+本地Webhook接收端
+
+接收任意路径的POST请求，请求体为JSON对象或数组（也支持 {"alerts": [...]} 形式的批量请求），
+统计请求数、通知条数和TCP连接数。可以为每个请求注入固定延迟。
+
+用法:
+    python -m benchmarks.webhook_sink --port 8082 --latency-ms 5
+"""
+
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class WebhookSinkHandler(BaseHTTPRequestHandler):
+    """处理Webhook请求"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        self.server.record(payload)
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class WebhookSink(ThreadingHTTPServer):
+    """多线程Webhook接收端"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0):
+        super().__init__((host, port), WebhookSinkHandler)
+        self.latency = latency_ms / 1000.0
+        self.counters = {"connections": 0, "requests": 0, "alerts": 0}
+        self.last_payload = None
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/alerts"
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def record(self, payload):
+        if isinstance(payload, dict) and isinstance(payload.get("alerts"), list):
+            alerts = len(payload["alerts"])
+        elif isinstance(payload, list):
+            alerts = len(payload)
+        else:
+            alerts = 1
+        with self._lock:
+            self.counters["requests"] += 1
+            self.counters["alerts"] += alerts
+            self.last_payload = payload
+
+    def start(self):
+        """在后台线程中运行"""
+        thread = threading.Thread(target=self.serve_forever, name="webhook-sink", daemon=True)
+        thread.start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地Webhook接收端')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8082, help='监听端口')
+    parser.add_argument('--latency-ms', type=float, default=0, help='每个请求的注入延迟（毫秒）')
+    args = parser.parse_args()
+
+    sink = WebhookSink(args.host, args.port, args.latency_ms)
+    print(f"Webhook接收端 {sink.url}")
+    try:
+        sink.serve_forever()
+    except KeyboardInterrupt:
+        print(f"统计: {sink.counters}")
+
+
+if __name__ == '__main__':
+    main()
@@ -52,10 +52,14 @@ After=network.target
 [Service]
 User=root
 WorkingDirectory=/opt/deploy/notify
-ExecStart=/opt/deploy/notify/venv/bin/python -m app
+ExecStart=/opt/deploy/notify/venv/bin/python -m app.main
 Restart=always
 RestartSec=10
 Environment=PYTHONUNBUFFERED=1
+# 停止时只向主进程发送SIGTERM，由其完成优雅停机（默认截止时间30秒）
+KillSignal=SIGTERM
+KillMode=mixed
+TimeoutStopSec=45
 
 [Install]
 WantedBy=multi-user.target
@@ -0,0 +1,49 @@
+from app.services.alert_dedup import AlertDeduplicator
+
+
+def make_deduplicator():
+    return AlertDeduplicator(
+        policies={"endpoint": {"resend_interval_seconds": 600}, "api": {"resend_interval_seconds": 0}},
+        default_policy={"resend_interval_seconds": 3600}
+    )
+
+
+def test_first_occurrence_and_state_change_are_sent():
+    dedup = make_deduplicator()
+    assert dedup.should_send("endpoint", "web", "down", now=1000)
+    assert dedup.should_send("endpoint", "web", "up", now=1001)
+    assert dedup.should_send("endpoint", "web", "down", now=1002)
+
+
+def test_unchanged_state_resent_after_interval():
+    dedup = make_deduplicator()
+    assert dedup.should_send("endpoint", "web", "down", now=1000)
+    assert not dedup.should_send("endpoint", "web", "down", now=1300)
+    assert dedup.should_send("endpoint", "web", "down", now=1600)
+    # 重发间隔从上次发送开始计算
+    assert not dedup.should_send("endpoint", "web", "down", now=2000)
+    assert dedup.should_send("endpoint", "web", "down", now=2200)
+
+
+def test_zero_interval_never_resends():
+    dedup = make_deduplicator()
+    assert dedup.should_send("api", "manual", "error", now=1000)
+    assert not dedup.should_send("api", "manual", "error", now=100000)
+
+
+def test_default_policy_and_stats():
+    dedup = make_deduplicator()
+    assert dedup.should_send("system", "cpu", "overload", now=1000)
+    assert not dedup.should_send("system", "cpu", "overload", now=4599)
+    assert dedup.should_send("system", "cpu", "overload", now=4600)
+    stats = dedup.get_stats()
+    assert stats["sent"] == 2 and stats["suppressed"] == 1
+    assert stats["suppressed_by_source"] == {"system": 1}
+
+
+def test_resources_are_tracked_separately():
+    dedup = make_deduplicator()
+    assert dedup.should_send("endpoint", "web", "down", now=1000)
+    assert dedup.should_send("endpoint", "api", "down", now=1000)
+    dedup.forget("endpoint", "web")
+    assert dedup.should_send("endpoint", "web", "down", now=1001)
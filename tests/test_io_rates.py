@@ -0,0 +1,18 @@
+from app.services.io_rates import WRAP_32, counter_delta
+
+
+def test_counter_delta_increasing():
+    assert counter_delta(100, 250) == 150
+    assert counter_delta(100, 100) == 0
+
+
+def test_counter_delta_32bit_wrap():
+    # 上次读数接近2^32，本次变小：按32位回绕计算
+    assert counter_delta(WRAP_32 - 10, 5) == 15
+    assert counter_delta(WRAP_32 // 2, 0) == WRAP_32 // 2
+
+
+def test_counter_delta_reset():
+    # 上次读数远小于2^31或超过32位范围：视为清零，增量为清零后累计的部分
+    assert counter_delta(1000, 40) == 40
+    assert counter_delta(WRAP_32 + 1000, 40) == 40
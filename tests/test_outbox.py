@@ -0,0 +1,80 @@
+import time
+
+import pytest
+
+from app.services.outbox import NotificationOutbox
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    outbox = NotificationOutbox(str(tmp_path / "outbox.db"), retry_base_seconds=0.2, max_attempts=3,
+                                lease_seconds=0.2)
+    outbox.open()
+    yield outbox
+    outbox.close()
+
+
+def counts(outbox):
+    stats = outbox.get_stats(timeout=5)
+    return stats["pending"], stats["delivered"], stats["dead"]
+
+
+def test_appended_notification_is_leased_to_the_queue(outbox):
+    outbox_id = outbox.append("主题", "内容", "error", "web", ["email", "telegram"])
+    # 刚写入时由内存队列投递，租约到期前不会被重试线程取出
+    assert outbox.claim_due() == []
+    time.sleep(0.25)
+    claimed = outbox.claim_due()
+    assert [item["id"] for item in claimed] == [outbox_id]
+    assert claimed[0]["channels"] == ["email", "telegram"]
+    # 取出后重新计算租约，不会被重复取出
+    assert outbox.claim_due() == []
+
+
+def test_lease_extends_and_exclude_skips(outbox):
+    first = outbox.append("a", "a", "info", None, ["email"])
+    second = outbox.append("b", "b", "info", None, ["email"])
+    time.sleep(0.15)
+    outbox.lease(first)
+    time.sleep(0.1)
+    assert [item["id"] for item in outbox.claim_due()] == [second]
+    time.sleep(0.25)
+    # 两条租约都已到期，仍在内存队列中的记录被跳过
+    assert [item["id"] for item in outbox.claim_due(exclude={first})] == [second]
+    assert [item["id"] for item in outbox.claim_due()] == [first]
+
+
+def test_partial_delivery_retries_only_failed_channels(outbox):
+    outbox_id = outbox.append("主题", "内容", "error", None, ["email", "telegram"])
+    outbox.mark(outbox_id, {"email": True, "telegram": False}, error="telegram: 502")
+    assert counts(outbox) == (1, 0, 0)
+    time.sleep(0.25)
+    claimed = outbox.claim_due()
+    assert [item["channels"] for item in claimed] == [["telegram"]]
+    outbox.mark(outbox_id, {"telegram": True})
+    assert counts(outbox) == (0, 1, 0)
+    time.sleep(0.25)
+    assert outbox.claim_due() == []
+
+
+def test_gives_up_after_max_attempts(outbox):
+    outbox_id = outbox.append("主题", "内容", "error", None, ["email"])
+    for _ in range(3):
+        outbox.mark(outbox_id, {"email": False}, error="smtp: 451")
+    assert counts(outbox) == (0, 0, 1)
+    time.sleep(0.25)
+    assert outbox.claim_due() == []
+
+
+def test_template_round_trip(outbox):
+    outbox.append("主题", "内容", "error", "web", ["telegram"],
+                  template=("endpoint_down", {"name": "web", "status_code": 502}))
+    time.sleep(0.25)
+    claimed = outbox.claim_due()
+    assert claimed[0]["template"] == ("endpoint_down", {"name": "web", "status_code": 502})
+
+
+def test_closed_outbox_rejects_operations(tmp_path):
+    outbox = NotificationOutbox(str(tmp_path / "outbox.db"))
+    with pytest.raises(RuntimeError):
+        outbox.append("主题", "内容", "info", None, ["email"])
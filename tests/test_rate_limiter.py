@@ -0,0 +1,38 @@
+import pytest
+
+from app.services.rate_limiter import TokenBucket
+
+
+def test_reservations_queue_in_order():
+    bucket = TokenBucket(rate=1, capacity=1)
+    now = bucket.updated_at
+    assert bucket.reserve(now) == 0
+    assert bucket.reserve(now) == pytest.approx(1)
+    assert bucket.reserve(now) == pytest.approx(2)
+
+
+def test_reservations_after_429_are_spaced_from_retry_after():
+    bucket = TokenBucket(rate=1, capacity=1)
+    now = bucket.updated_at
+    assert bucket.reserve(now) == 0
+    bucket.block_until(now + 30)
+    # 限流结束后按速率依次排开，而不是全部在第30秒发送
+    waits = [bucket.reserve(now) for _ in range(3)]
+    assert waits == pytest.approx([30, 31, 32])
+
+
+def test_429_keeps_existing_reservations_in_line():
+    bucket = TokenBucket(rate=1, capacity=1)
+    now = bucket.updated_at
+    bucket.reserve(now)
+    assert bucket.reserve(now) == pytest.approx(1)  # 429之前已排队的预约
+    bucket.block_until(now + 30)
+    assert bucket.reserve(now) == pytest.approx(31)
+
+
+def test_earlier_block_does_not_shorten_pause():
+    bucket = TokenBucket(rate=1, capacity=1)
+    now = bucket.updated_at
+    bucket.block_until(now + 30)
+    bucket.block_until(now + 10)
+    assert bucket.reserve(now) == pytest.approx(30)
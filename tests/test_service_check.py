@@ -0,0 +1,61 @@
+import copy
+
+import pytest
+
+from app.services.service_check import ServiceChecker
+
+
+@pytest.fixture
+def checker():
+    checker = ServiceChecker()
+    checker.endpoints = []
+    checker._endpoint_index = {}
+    checker.add_endpoint("web", "https://example.com", interval_minutes=5)
+    return checker
+
+
+def test_bulk_upsert_applies_all_valid_items(checker):
+    applied, results, changes = checker.bulk_upsert_endpoints([
+        {"name": "web", "url": "https://example.com", "interval_minutes": 1},
+        {"name": "api", "url": "https://example.com/api"}
+    ])
+    assert applied
+    assert [result["status"] for result in results] == ["updated", "created"]
+    assert [endpoint["name"] for endpoint in changes["interval_changed"]] == ["web"]
+    assert checker.get_endpoint_interval("web") == 1
+    assert "api" in checker._endpoint_index
+
+
+def test_bulk_upsert_is_all_or_nothing(checker):
+    before = copy.deepcopy(checker.endpoints)
+    applied, results, changes = checker.bulk_upsert_endpoints([
+        {"name": "web", "url": "https://example.com", "interval_minutes": 1},
+        {"name": "api", "url": "https://example.com/api"},
+        {"name": "bad", "url": "ftp://example.com"}
+    ])
+    assert not applied
+    assert [result["status"] for result in results] == ["valid", "valid", "invalid"]
+    assert results[2]["errors"]
+    assert changes == {"created": [], "updated": [], "interval_changed": []}
+    assert checker.endpoints == before
+    assert set(checker._endpoint_index) == {"web"}
+
+
+def test_bulk_upsert_rejects_duplicate_names_and_non_objects(checker):
+    applied, results, _ = checker.bulk_upsert_endpoints([
+        {"name": "api", "url": "https://example.com/a"},
+        {"name": "api", "url": "https://example.com/b"},
+        "not an object"
+    ])
+    assert not applied
+    assert [result["status"] for result in results] == ["valid", "invalid", "invalid"]
+    assert "api" not in checker._endpoint_index
+
+
+def test_bulk_upsert_reports_unchanged(checker):
+    applied, results, changes = checker.bulk_upsert_endpoints([
+        {"name": "web", "url": "https://example.com", "interval_minutes": 5}
+    ])
+    assert applied
+    assert results[0]["status"] == "unchanged"
+    assert changes["updated"] == []
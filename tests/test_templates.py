@@ -0,0 +1,33 @@
+from app.services.templates import TELEGRAM_MAX_LENGTH, _utf16_length, split_telegram_message
+
+
+def test_short_message_is_not_split():
+    assert split_telegram_message("正常长度的消息") == ["正常长度的消息"]
+
+
+def test_split_uses_utf16_length():
+    # 每个表情占两个UTF-16单元，按字符数不超限但按UTF-16长度超限
+    text = "😀" * 3000
+    assert len(text) <= TELEGRAM_MAX_LENGTH < _utf16_length(text)
+    parts = split_telegram_message(text)
+    assert len(parts) == 2
+    assert all(_utf16_length(part) <= TELEGRAM_MAX_LENGTH for part in parts)
+    assert parts[0].startswith("(1/2) ") and parts[1].startswith("(2/2) ")
+    assert "".join(part.split(" ", 1)[1] for part in parts) == text
+
+
+def test_split_prefers_newlines():
+    lines = [f"第{index}行 " + "x" * 50 for index in range(200)]
+    parts = split_telegram_message("\n".join(lines), max_parts=10)
+    for part in parts:
+        body = part.split(" ", 1)[1]
+        assert body.startswith("第") and body.rstrip().endswith("x")
+
+
+def test_split_truncates_after_max_parts():
+    text = "a" * (TELEGRAM_MAX_LENGTH * 5)
+    parts = split_telegram_message(text, max_parts=3)
+    assert len(parts) == 3
+    assert [part[:6] for part in parts] == ["(1/3) ", "(2/3) ", "(3/3) "]
+    assert "已截断" in parts[-1]
+    assert all(_utf16_length(part) <= TELEGRAM_MAX_LENGTH for part in parts)